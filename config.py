@@ -13,7 +13,6 @@
 
 import os
 from dotenv import load_dotenv
-from transformers import MarianMTModel, MarianTokenizer
 
 # 🔹 Carrega variáveis de ambiente a partir do ficheiro .env (ex: tokens API)
 load_dotenv()
@@ -21,6 +20,7 @@ load_dotenv()
 # 🔹 Diretórios principais do projeto
 DOCUMENTS_PATH = "data/documents"          # Onde ficam os ficheiros a indexar
 CHROMA_PATH = "embeddings_db/chroma_db"    # Caminho para a base de embeddings ChromaDB
+EMBEDDING_CACHE_PATH = "embeddings_db/embedding_cache"  # Cache de embeddings por chunk (sobrevive a rebuilds)
 
 # 🔹 Modelos a utilizar
 EMBEDDING_MODEL = "intfloat/e5-large-v2"   # Modelo de embeddings semânticos
@@ -30,21 +30,47 @@ VELVET_MODEL = "Almawave/Velvet-2B"        # Modelo de linguagem principal (LLM)
 # 🔹 Token da Hugging Face (para acesso aos modelos online)
 HF_TOKEN = os.getenv("HF_TOKEN")
 
-# 🔹 Tradutores pré-carregados com MarianMT (usados no módulo tradutor_local.py)
+# 🔹 Tradutores MarianMT por direção (carregados só no primeiro uso, em tradutor_local.py)
 TRADUTOR_MODELOS = {
-    "pt-en": {
-        "tokenizer": MarianTokenizer.from_pretrained("geralt/Opus-mt-pt-en"),
-        "model": MarianMTModel.from_pretrained("geralt/Opus-mt-pt-en")
-    },
-    "en-pt": {
-        "tokenizer": MarianTokenizer.from_pretrained("Helsinki-NLP/opus-mt-tc-big-en-pt"),
-        "model": MarianMTModel.from_pretrained("Helsinki-NLP/opus-mt-tc-big-en-pt")
-    }
+    "pt-en": "geralt/Opus-mt-pt-en",
+    "en-pt": "Helsinki-NLP/opus-mt-tc-big-en-pt"
 }
 
+# 🔹 Número máximo de frases por chamada ao MarianMT em traduzir_lote
+TRADUCAO_BATCH_SIZE = 16
+
+# 🔹 Cache de traduções (LRU em memória + SQLite em disco)
+TRADUCAO_CACHE_ATIVA = os.getenv("TRADUCAO_CACHE_ATIVA", "1") != "0"
+TRADUCAO_CACHE_PATH = "data/cache/traducoes.sqlite3"
+TRADUCAO_CACHE_MEMORIA = 2048      # Entradas mantidas em memória
+TRADUCAO_CACHE_DISCO = 100_000     # Entradas máximas no ficheiro SQLite
+
+# 🔹 Cache semântica de respostas (perguntas repetidas não voltam a passar pelo RAG/Velvet)
+RESPOSTAS_CACHE_ATIVA = os.getenv("RESPOSTAS_CACHE_ATIVA", "1") != "0"
+RESPOSTAS_CACHE_PATH = "data/cache/respostas.sqlite3"
+RESPOSTAS_CACHE_LIMIAR = 0.95       # Semelhança de cosseno mínima entre perguntas (e mesmos termos-chave)
+RESPOSTAS_CACHE_MAX = 500           # Entradas máximas (remove as menos usadas)
+RESPOSTAS_CACHE_TTL = 7 * 24 * 3600  # Validade de cada resposta em segundos
+
+# 🔹 Escrita de logs/métricas em segundo plano (controllers/logger.py)
+LOG_FLUSH_INTERVALO = 1.0    # Segundos máximos até as linhas chegarem ao disco
+LOG_FLUSH_LINHAS = 200       # Linhas em buffer que forçam escrita imediata
+
+# 🔹 Tradutores int8 (quantização dinâmica para CPU); ativar com TRADUCAO_QUANTIZADA=1
+TRADUCAO_QUANTIZADA = os.getenv("TRADUCAO_QUANTIZADA", "0") == "1"
+TRADUCAO_QUANTIZADA_PATH = "data/cache/marian_int8"
+
 # 🔹 Token do bot do Discord (se usado)
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
+# 🔹 Servidor local de inferência (um único processo com os modelos, partilhado por CLI/Discord/GUI)
+SERVIDOR_HOST = os.getenv("SERVIDOR_HOST", "127.0.0.1")
+SERVIDOR_PORTA = int(os.getenv("SERVIDOR_PORTA", "8765"))
+SERVIDOR_URL = f"http://{SERVIDOR_HOST}:{SERVIDOR_PORTA}"
+# Segundos à espera que o servidor arrancado automaticamente responda a /saude
+# (imports do Flask/torch em máquinas lentas; os modelos carregam no 1º pedido, sem timeout)
+SERVIDOR_ARRANQUE_TIMEOUT = int(os.getenv("SERVIDOR_ARRANQUE_TIMEOUT", "120"))
+
 # 🔹 Parâmetros de geração do modelo Velvet
 VELVET_PARAMS = {
     "max_new_tokens": 300,          # Número máximo de tokens gerados
@@ -54,6 +80,28 @@ VELVET_PARAMS = {
     "repetition_penalty": 1.2       # Penaliza repetições
 }
 
+# 🔹 Resposta extrativa: com um chunk de confiança muito alta (score do CrossEncoder)
+#     as melhores frases dele são a resposta, sem gerar com o Velvet
+RESPOSTA_EXTRATIVA_ATIVA = os.getenv("RESPOSTA_EXTRATIVA_ATIVA", "1") != "0"
+EXTRATIVO_LIMIAR = float(os.getenv("EXTRATIVO_LIMIAR", "8.0"))   # Score mínimo do melhor chunk
+EXTRATIVO_MAX_FRASES = 3                                          # Frases do chunk na resposta
+
+# 🔹 Perfil de execução do Velvet (models/perfil_execucao.py); "auto" deteta o hardware
+VELVET_DISPOSITIVO = os.getenv("VELVET_DISPOSITIVO", "auto")   # "auto", "cpu" ou "cuda"
+VELVET_PRECISAO = os.getenv("VELVET_PRECISAO", "auto")         # "auto", "bf16", "fp16" ou "fp32"
+VELVET_THREADS = int(os.getenv("VELVET_THREADS", "0"))          # Threads intra-op (0 = núcleos físicos)
+VELVET_THREADS_INTEROP = int(os.getenv("VELVET_THREADS_INTEROP", "0"))  # Threads inter-op (0 = omissão do torch)
+VELVET_COMPILAR = os.getenv("VELVET_COMPILAR", "0") == "1"      # torch.compile do forward
+VELVET_INT8 = os.getenv("VELVET_INT8", "0") == "1"              # Pesos Linear em int8 (só CPU)
+
+# 🔹 Batching dinâmico: pedidos de geração concorrentes partilham um só `generate`
+#     Mais débito com vários utilizadores, mas cada pedido só termina quando a linha
+#     mais longa do lote termina (uma resposta curta espera pela mais longa)
+VELVET_BATCH_MAX = int(os.getenv("VELVET_BATCH_MAX", "4"))   # Prompts por lote (1 = sem batching)
+VELVET_BATCH_JANELA = 0.05                                   # Segundos à espera de mais pedidos
+# 🔹 KV-cache de prefixos (contexto RAG) reaproveitada entre perguntas; 0 desativa
+VELVET_KV_CACHE_MB = int(os.getenv("VELVET_KV_CACHE_MB", "512"))
+
 # 🔹 _Template para geração de prompts no modo CLI/GUI
 CHATBOT_PROMPT_TEMPLATE = (
     "Contexto:\n{contexto}\n\n"
@@ -65,6 +113,17 @@ CHATBOT_PROMPT_TEMPLATE = (
 CHUNK_SIZE = 1200             # Tamanho de cada chunk (bloco de texto)
 CHUNK_OVERLAP = 200          # Sobreposição entre chunks para não perder contexto
 K_SIMILARITY_SEARCH = 7      # Número de documentos mais semelhantes a retornar
+INDEX_BATCH_SIZE = 64        # Chunks por batch de embeddings/escrita na indexação
+INDEX_PUBLICAR_BATCHES = 10  # A cada N batches o BM25 é gravado e os chunks já escritos ficam pesquisáveis
+# Processos para carregar/dividir documentos em paralelo (1 = sequencial)
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "1"))
+
+# Pesquisa híbrida (BM25 + embeddings), fundida por Reciprocal Rank Fusion
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")   # "hybrid" ou "dense"
+HYBRID_DENSE_K = 10          # Candidatos da pesquisa vetorial
+HYBRID_LEXICAL_K = 10        # Candidatos da pesquisa BM25
+HYBRID_CANDIDATES = 10       # Candidatos fundidos enviados ao reranker
+RRF_K = 60                   # Constante do Reciprocal Rank Fusion
 
 # Parâmetro para _top-k documentos retornados nas buscas semânticas
 TOP_K_SEARCH = 5
@@ -8,19 +8,29 @@
 #     - Tradução bidirecional (PT ➜ EN ➜ PT)
 #     - Geração de resposta com Velvet-2B
 #     - Validação automática por palavras-chave
+# 🔹 Devolver respostas já dadas a perguntas iguais/parecidas (cache semântica)
+# 🔹 Resposta extrativa (sem Velvet) quando o melhor chunk tem score muito alto
+#     e é uma definição: melhores frases do chunk + fonte e página
+# 🔹 Streaming opcional: cada frase traduzida é entregue a `ao_receber_frase`
 # 🔹 Exibir métricas de resposta (tokens, tempo, validação)
 # 🔹 Guardar a interação completa:
-#     - Em histórico (velvet_respostas.json)
+#     - Em histórico (velvet_respostas.jsonl)
 #     - Em ficheiro temporário com a última resposta (velvet_ultima_resposta.json)
 #     - Em ficheiro de métricas (velvet_metrics.jsonl)
 #     - Em ficheiro de logs técnicos (velvet_logs.txt)
 # ============================================================
 
+import os
 import time
 import re
-from models.velvet_runner import generate_response, salvar_completo_em_arquivo  # Geração e gravação
-from models.rag_engine import retrieve_context                         # Busca com RAG
-from models.tradutor_local import traduzir                             # Tradução PT/EN
+from models.velvet_runner import generate_response, gerar_frases_stream, salvar_completo_em_arquivo  # Geração e gravação
+from models.rag_engine import retrieve_context, get_embeddings, versao_indice  # Busca com RAG
+from models.tradutor_local import traduzir_lote, PerguntaTraduzida, dividir_em_frases  # Tradução PT/EN
+from models.bm25_index import tokenizar                                # Termos da pergunta (resposta extrativa)
+from models.cache_traducao import get_cache_traducao                   # Estatísticas da cache de traduções
+from models.cache_respostas import get_cache_respostas                 # Cache semântica de respostas
+from config import TRADUCAO_CACHE_ATIVA, RESPOSTAS_CACHE_ATIVA
+from config import RESPOSTA_EXTRATIVA_ATIVA, EXTRATIVO_LIMIAR, EXTRATIVO_MAX_FRASES
 from datetime import datetime
 
 from controllers.logger import salvar_metricas, log_evento  # <--- NOVO IMPORT
@@ -40,52 +50,151 @@ def validar_resposta_por_keywords(resposta: str, contexto: str, min_match: int =
     comuns = set(palavras_contexto).intersection(set(palavras_resposta))
     return len(comuns) >= min_match, len(comuns)
 
+# Frases com cara de definição ("X é um...", "define-se", "consiste em")
+PADRAO_DEFINICAO = re.compile(
+    r"\b(é|são)\s+(um|uma|o|a|os|as)\b|\bdefine-se\b|\bdesigna-se\b|\bconsiste\b|\brepresenta\b",
+    re.IGNORECASE
+)
+
+
+def resposta_extrativa(pergunta: str, selecionados, limiar: float = EXTRATIVO_LIMIAR,
+                       max_frases: int = EXTRATIVO_MAX_FRASES):
+    """
+    Resposta extraída do melhor chunk do contexto, sem gerar com o Velvet.
+
+    Args:
+        pergunta (str): Pergunta do utilizador em PT.
+        selecionados: (doc, score) dos chunks que entraram no contexto (debug_ctx["selected_docs"]).
+        limiar (float): Score mínimo do melhor chunk.
+        max_frases (int): Número máximo de frases do extrato.
+
+    Returns:
+        str | None: Extrato com a fonte, ou None se a confiança não chegar
+        (score abaixo do limiar, chunk sem frase de definição ou sem termos da pergunta).
+    """
+    if not selecionados:
+        return None
+    doc, score = max(selecionados, key=lambda par: par[1])
+    metadata = doc.metadata or {}
+    texto = metadata.get("texto_limpo") or doc.page_content
+    if score < limiar or not PADRAO_DEFINICAO.search(texto):
+        return None
+
+    # Frases ordenadas por termos da pergunta (+1 se forem definição); mantém a ordem original
+    termos = set(tokenizar(pergunta))
+    frases = [frase for paragrafo in dividir_em_frases(texto) for frase in paragrafo]
+    relevancia = [len(termos & set(tokenizar(f))) + bool(PADRAO_DEFINICAO.search(f)) for f in frases]
+    melhores = [i for i in sorted(range(len(frases)), key=lambda i: relevancia[i], reverse=True)[:max_frases]
+                if relevancia[i] > 0]
+    if not melhores:
+        return None
+
+    fonte = os.path.basename(str(metadata.get("source", "?")))
+    pagina = metadata.get("page", "?")
+    extrato = " ".join(frases[i] for i in sorted(melhores))
+    return f"{extrato}\n\n📄 Fonte: {fonte} (pág. {pagina})"
+
 # Função principal que processa cada pergunta
 
 
-def process_user_input(question: str) -> str:
+def process_user_input(question: str, ao_receber_frase=None) -> str:
+    """
+    Responde a uma pergunta em PT.
+    Se `ao_receber_frase` for dado, a resposta é gerada em streaming e a função
+    é chamada com cada frase PT assim que fica pronta (numa thread de trabalho).
+    """
     log_evento(f"Pergunta recebida: {question}")
 
     print("\n🔍 [DEBUG] Entrou em process_user_input()")
     print(f"🔍 [DEBUG] Pergunta recebida: {question}")
 
+    # Pergunta já respondida com o índice atual? Evita RAG + Velvet
+    vetor_pergunta = None
+    if RESPOSTAS_CACHE_ATIVA:
+        inicio = time.time()
+        cache = get_cache_respostas()
+        resposta_cache, vetor_pergunta = cache.procurar(question, versao_indice(), get_embeddings().embed_query)
+        if resposta_cache is not None:
+            duracao = time.time() - inicio
+            log_evento(f"Resposta da cache semântica ({duracao:.2f}s): {question} | {cache.estatisticas()}")
+            print(f"\n⚡ [DEBUG] Resposta obtida da cache semântica em {duracao:.2f}s")
+            return {
+                "resposta_pt": resposta_cache,
+                "tempo_execucao": round(duracao, 2),
+                "resposta_tokens": contar_tokens(resposta_cache),
+                "validacao_keywords": True,
+                "cache": True
+            }
+
+    # Pergunta traduzida para EN uma única vez (RAG e prompt usam a mesma tradução)
+    pergunta = PerguntaTraduzida(question)
+
     # Obtém contexto, scores e dados brutos com debug incluído
     context_pt, scores, context_en, context_norm, debug_ctx = retrieve_context(
-        question, return_scores=True, return_raw=True
+        pergunta, return_scores=True, return_raw=True
     )
 
     print(f"\n📚 [DEBUG] Contexto traduzido (PT, início): {context_pt[:120]}...")
 
-    # Traduz a pergunta para inglês
-    question_en = traduzir(question, origem='pt', destino='en')
+    # Chunk muito bem pontuado e definitório: responde com as frases dele, sem Velvet
+    extrativa = (resposta_extrativa(question, debug_ctx.get("selected_docs", []))
+                 if RESPOSTA_EXTRATIVA_ATIVA else None)
 
     # Cria prompt final a ser enviado ao Velvet
-    prompt_en = f"Context:\n{debug_ctx['context_en']}\n\nQuestion: {question_en}\nAnswer:"
-    print(f"\n🧠 [DEBUG] Prompt final (EN) enviado à Velvet:\n{prompt_en}\n")
+    prompt_en = "" if extrativa else f"Context:\n{debug_ctx['context_en']}\n\nQuestion: {pergunta.en}\nAnswer:"
+    if extrativa is None:
+        print(f"\n🧠 [DEBUG] Prompt final (EN) enviado à Velvet:\n{prompt_en}\n")
 
     # Mede tempo de geração
     inicio = time.time()
-    resposta_en = generate_response(prompt_en)
-    duracao = time.time() - inicio
+    resposta_transmitida = None
+    if extrativa is not None:
+        print(f"\n⚡ [DEBUG] Resposta extrativa (score ≥ {EXTRATIVO_LIMIAR})")
+        resposta_en = ""
+        resposta_final = extrativa
+        if ao_receber_frase is not None:
+            resposta_transmitida = extrativa
+            ao_receber_frase(extrativa)
+        duracao = time.time() - inicio
+    elif ao_receber_frase is not None:
+        # Frases traduzidas à medida que o Velvet as termina (já não é preciso traduzir no fim)
+        partes_en, partes_pt = [], []
+        for frase_en, frase_pt, separador in gerar_frases_stream(prompt_en):
+            partes_en.append(frase_en + separador)
+            partes_pt.append(frase_pt + separador)
+            if len(partes_pt) == 1:
+                log_evento(f"Primeira frase em streaming após {time.time() - inicio:.2f}s")
+            ao_receber_frase(frase_pt + separador)
+        resposta_en = "".join(partes_en)
+        resposta_final = resposta_transmitida = "".join(partes_pt).strip()
+        duracao = time.time() - inicio
+    else:
+        resposta_en = generate_response(prompt_en, lang="en")
+        duracao = time.time() - inicio
 
     print(f"\n💬 [DEBUG] Resposta bruta (EN) gerada pelo Velvet:\n{resposta_en.strip()}")
 
-    # Tenta traduzir de volta para português
-    try:
-        resposta_final = traduzir(resposta_en.strip(), origem="en", destino="pt")
-    except Exception as e:
-        print("⚠️ Erro na tradução da resposta:", e)
-        resposta_final = resposta_en.strip()
+    # Tenta traduzir de volta para português (só respostas geradas sem streaming)
+    if extrativa is None and resposta_transmitida is None:
+        try:
+            resposta_final = traduzir_lote([resposta_en.strip()], origem="en", destino="pt")[0]
+        except Exception as e:
+            print("⚠️ Erro na tradução da resposta:", e)
+            resposta_final = resposta_en.strip()
 
     # Validação da resposta com palavras-chave
     valido, num_keywords = validar_resposta_por_keywords(resposta_final, context_pt)
     if not valido or len(resposta_final) < 10:
         resposta_final = "⚠️ Não foi possível gerar uma resposta adequada com base no contexto."
+    elif RESPOSTAS_CACHE_ATIVA:
+        # Só respostas validadas ficam em cache
+        get_cache_respostas().guardar(question, resposta_final, versao_indice(), get_embeddings().embed_query,
+                                      vetor=vetor_pergunta)
 
     # Exibe métricas no terminal
     print("\n📊 [MÉTRICAS DE RESPOSTA]")
     print(f"🔸 Prompt Tokens:        {contar_tokens(prompt_en)}")
-    print(f"🔸 Resposta Tokens:      {contar_tokens(resposta_en)}")
+    print(f"🔸 Resposta Tokens:      {contar_tokens(resposta_en or resposta_final)}")
     print(f"🔸 Tempo de geração:     {duracao:.2f}s")
     print(f"🔸 Palavras-chave comuns: {num_keywords}")
     print(f"🔸 Validação por keywords: {'✅' if valido else '❌'}")
@@ -101,13 +210,16 @@ def process_user_input(question: str) -> str:
         "pergunta": question,
         "tempo_execucao": round(duracao, 2),
         "prompt_tokens": contar_tokens(prompt_en),
-        "resposta_tokens": contar_tokens(resposta_en),
+        "resposta_tokens": contar_tokens(resposta_en or resposta_final),
         "palavras_chave_comuns": num_keywords,
-        "validacao_keywords": valido
+        "validacao_keywords": valido,
+        "modo": "extrativo" if extrativa else "gerado"
     })
 
     # Log técnico detalhado
-    log_evento(f"Processada pergunta: {question} | Tokens: {contar_tokens(prompt_en)} prompt, {contar_tokens(resposta_en)} resposta | Tempo: {duracao:.2f}s | Validação: {valido}")
+    log_evento(f"Processada pergunta: {question} | Tokens: {contar_tokens(prompt_en)} prompt, {contar_tokens(resposta_en or resposta_final)} resposta | Tempo: {duracao:.2f}s | Validação: {valido}")
+    if TRADUCAO_CACHE_ATIVA:
+        log_evento(f"Cache de tradução: {get_cache_traducao().estatisticas()}")
 
     # Guarda tudo no histórico local com estrutura completa
     salvar_completo_em_arquivo({
@@ -118,13 +230,13 @@ def process_user_input(question: str) -> str:
         "metricas": {
             "tempo_execucao": round(duracao, 2),
             "prompt_tokens": contar_tokens(prompt_en),
-            "resposta_tokens": contar_tokens(resposta_en),
+            "resposta_tokens": contar_tokens(resposta_en or resposta_final),
             "palavras_chave_comuns": num_keywords,
             "validacao_keywords": valido
         },
         "scores": [{"doc": trecho.page_content, "score": float(score)} for trecho, score in scores],
         "caminhos_de_gravacao": {
-            "historico": "data/respostas/velvet_respostas.json",
+            "historico": "data/respostas/velvet_respostas.jsonl",
             "ultima_resposta": "data/respostas/velvet_ultima_resposta.json"
         },
         "resposta_pt": resposta_final,
@@ -134,6 +246,8 @@ def process_user_input(question: str) -> str:
     return {
         "resposta_pt": resposta_final,
         "tempo_execucao": round(duracao, 2),
-        "resposta_tokens": contar_tokens(resposta_en),
-        "validacao_keywords": valido
+        "resposta_tokens": contar_tokens(resposta_en or resposta_final),
+        "validacao_keywords": valido,
+        # True se o texto já mostrado em streaming é a resposta final
+        "transmitida": resposta_final == resposta_transmitida
     }
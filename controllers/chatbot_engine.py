@@ -9,11 +9,25 @@
 # 🔹 Suporte para retorno direto ou impressão da melhor resposta
 # ============================================================
 
-from sentence_transformers import SentenceTransformer, util
+import threading
 from models.rag_engine import get_chroma_db
 from config import EMBEDDING_MODEL, TOP_K_SEARCH, MAX_DOC_CHARS
 from controllers.logger import log_evento
 
+# Modelo SentenceTransformer partilhado (carregado na primeira pesquisa)
+_modelo = None
+_modelo_lock = threading.Lock()
+
+
+def get_modelo_embeddings():
+    global _modelo
+    if _modelo is None:
+        with _modelo_lock:
+            if _modelo is None:
+                from sentence_transformers import SentenceTransformer
+                _modelo = SentenceTransformer(EMBEDDING_MODEL)
+    return _modelo
+
 
 def busca_local_heuristica(
     pergunta: str,
@@ -33,10 +47,12 @@ def busca_local_heuristica(
         - Limita resposta a MAX_DOC_CHARS carateres.
         - Todos os eventos relevantes são registados via logger.
     """
+    from sentence_transformers import util
+
     log_evento(f"🔍 Pergunta recebida: {pergunta}")
 
-    # Carrega modelo de embeddings definido em config
-    model = SentenceTransformer(EMBEDDING_MODEL)
+    # Modelo de embeddings definido em config (reutilizado entre chamadas)
+    model = get_modelo_embeddings()
 
     # Acede à base local de embeddings via ChromaDB
     collection = get_chroma_db()
@@ -0,0 +1,129 @@
+# ============================================================
+# cliente_inferencia.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Cliente leve do servidor de inferência (controllers/servidor_inferencia.py)
+#     usado pelo CLI, pelo bot Discord e pelo Mini LLM Local
+# 🔹 Não importa torch/transformers: os modelos vivem só no servidor
+# 🔹 Se o servidor não estiver a correr, é arrancado automaticamente
+#     (processo separado, output em logs/servidor_inferencia.log)
+#     - Os pedidos vão direto ao servidor; só uma ligação recusada leva a
+#       arrancá-lo (ou esperar que acabe de arrancar) e repetir o pedido
+# 🔹 Só usa a biblioteca padrão (urllib)
+# ============================================================
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from config import SERVIDOR_URL, SERVIDOR_ARRANQUE_TIMEOUT
+
+RAIZ_PROJETO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVIDOR_LOG = os.path.join("logs", "servidor_inferencia.log")
+
+_arranque_lock = threading.Lock()
+
+
+class ServidorIndisponivel(RuntimeError):
+    pass
+
+
+def estado_servidor(timeout: float = 2.0):
+    """Devolve o JSON de /saude ou None se o servidor não responder."""
+    try:
+        with urllib.request.urlopen(f"{SERVIDOR_URL}/saude", timeout=timeout) as resposta:
+            return json.load(resposta)
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def garantir_servidor():
+    """Arranca o servidor de inferência se ainda não estiver a correr."""
+    if estado_servidor() is not None:
+        return
+    with _arranque_lock:
+        if estado_servidor() is not None:
+            return
+        print("🚀 A iniciar o servidor de inferência local...")
+        os.makedirs(os.path.dirname(SERVIDOR_LOG), exist_ok=True)
+        with open(SERVIDOR_LOG, "a", encoding="utf-8") as log:
+            subprocess.Popen(
+                [sys.executable, "-m", "controllers.servidor_inferencia"],
+                cwd=RAIZ_PROJETO, stdout=log, stderr=subprocess.STDOUT,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0,
+                start_new_session=os.name != 'nt'
+            )
+        limite = time.time() + SERVIDOR_ARRANQUE_TIMEOUT
+        while time.time() < limite:
+            if estado_servidor(timeout=1.0) is not None:
+                return
+            time.sleep(0.5)
+        raise ServidorIndisponivel(f"O servidor de inferência não arrancou (ver {SERVIDOR_LOG}).")
+
+
+def _abrir(pedido):
+    """urlopen sem timeout (a geração pode demorar; o 1º pedido ainda carrega os modelos)."""
+    try:
+        return urllib.request.urlopen(pedido)
+    except urllib.error.HTTPError as e:
+        # Erros do servidor vêm como {"erro": ...} (mesma mensagem do modo streaming)
+        try:
+            erro = json.load(e).get("erro", str(e))
+        except ValueError:
+            erro = str(e)
+        raise RuntimeError(erro) from e
+
+
+def _pedir(pedido):
+    """Envia o pedido direto; só se a ligação falhar arranca o servidor e repete."""
+    try:
+        return _abrir(pedido)
+    except urllib.error.URLError:
+        garantir_servidor()
+        return _abrir(pedido)
+
+
+def _post(caminho: str, dados: dict):
+    return _pedir(urllib.request.Request(
+        f"{SERVIDOR_URL}{caminho}",
+        data=json.dumps(dados).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    ))
+
+
+def perguntar(pergunta: str, ao_receber_frase=None) -> dict:
+    """Equivalente remoto de `process_user_input` (mesma assinatura e resultado)."""
+    with _post("/perguntar", {"pergunta": pergunta, "stream": ao_receber_frase is not None}) as resposta:
+        if ao_receber_frase is None:
+            return json.load(resposta)
+        for linha in resposta:
+            dados = json.loads(linha)
+            if "frase" in dados:
+                ao_receber_frase(dados["frase"])
+            elif "erro" in dados:
+                raise RuntimeError(dados["erro"])
+            else:
+                return dados["resultado"]
+    raise ServidorIndisponivel("Ligação ao servidor de inferência terminou sem resultado.")
+
+
+def obter_contextos(pergunta: str, k: int = 5, top: int = 3) -> list[dict]:
+    """Pesquisa + reranking no servidor. Devolve [{conteudo, metadata, score}]."""
+    with _post("/contextos", {"pergunta": pergunta, "k": k, "top": top}) as resposta:
+        return json.load(resposta)
+
+
+def gerar(prompt: str) -> str:
+    with _post("/gerar", {"prompt": prompt}) as resposta:
+        return json.load(resposta)["resposta"]
+
+
+def contar_documentos():
+    """Nº de chunks indexados no servidor (None se não for possível contar)."""
+    with _pedir(urllib.request.Request(f"{SERVIDOR_URL}/documentos")) as resposta:
+        return json.load(resposta).get("documentos")
@@ -1,25 +1,20 @@
 # Mini LLM Local - Consolidado (com feedback supervisionado)
+# Pesquisa e geração feitas pelo servidor de inferência local (cliente_inferencia)
 
 from PIL import UnidentifiedImageError
 import os
-import json
-from sentence_transformers import CrossEncoder
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, Toplevel
 from PIL import Image, ImageTk
 from datetime import datetime
-from models.velvet_runner import generate_response
+from types import SimpleNamespace
+from controllers.cliente_inferencia import obter_contextos, gerar, contar_documentos
+from models.memoria_respostas import MemoriaRespostas
 
 
-CHROMA_PATH = "embeddings_db/chroma_db"
-EMBEDDING_MODEL = "intfloat/e5-large-v2"
-RESPOSTAS_MEMORIA = "data/respostas/respostas_memoria.json"
-
-embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-vectorstore = Chroma(persist_directory=CHROMA_PATH, embedding_function=embedding_model)
-_reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+_memoria = None
+_memoria_lock = threading.Lock()
 
 
 def normalizar_pergunta(texto):
@@ -33,97 +28,51 @@ def normalizar_pergunta(texto):
     )
 
 
-def salvar_resposta_memoria(pergunta, contexto, score, origem, pagina):
-    caminho = os.path.join("data", "respostas", "respostas_memoria.json")
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
-
-    pergunta_key = normalizar_pergunta(pergunta)
-
-    # Ler estrutura atual, que pode ser lista (antiga) ou dicionário (novo)
-    if os.path.exists(caminho):
-        try:
-            with open(caminho, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-
-            # Se for lista, migrar para dicionário
-            if isinstance(dados, list):
-                novo_dados = {}
-                for entrada in dados:
-                    key = normalizar_pergunta(entrada.get("pergunta", ""))
-                    if key:
-                        novo_dados[key] = {
-                            "contexto": entrada.get("contexto", ""),
-                            "score": float(entrada.get("score", 0)),
-                            "fonte": entrada.get("fonte", "?"),
-                            "pagina": entrada.get("pagina", "?"),
-                            "timestamp": entrada.get("data", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                        }
-                dados = novo_dados
-        except json.JSONDecodeError:
-            dados = {}
-    else:
-        dados = {}
+def get_memoria():
+    """Memória de contextos escolhidos (SQLite), aberta uma única vez."""
+    global _memoria
+    if _memoria is None:
+        with _memoria_lock:
+            if _memoria is None:
+                _memoria = MemoriaRespostas(normalizar_pergunta)
+    return _memoria
 
-    # Guardar nova resposta
-    dados[pergunta_key] = {
-        "contexto": contexto,
-        "score": float(score),
-        "fonte": origem,
-        "pagina": pagina,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-
-    # Escrever no ficheiro
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=2, ensure_ascii=False)
 
+def salvar_resposta_memoria(pergunta, contexto, score, origem, pagina):
+    pergunta_key = normalizar_pergunta(pergunta)
+    get_memoria().guardar(pergunta_key, contexto, score, origem, pagina)
     print(f"💾 Contexto memorizado (normalizado) para: '{pergunta_key}'")
 
 
 def busca_local_heuristica(pergunta: str, k: int = 5, forcar_popup=False):
     pergunta_key = normalizar_pergunta(pergunta)
-    caminho = "data/respostas/respostas_memoria.json"
 
     print(f"\n🔍 Pergunta feita: {pergunta}")
     print(f"🔑 Chave normalizada: {pergunta_key}")
-    print(f"📁 Verificando memória em: {caminho}")
-
-    if not forcar_popup and os.path.exists(caminho):
-        try:
-            with open(caminho, "r", encoding="utf-8") as f:
-                memoria = json.load(f)
-                print(f"📘 Memória carregada com {len(memoria)} entradas.")
-            if pergunta_key in memoria:
-                item = memoria[pergunta_key]
-                print("✅ Entrada encontrada na memória!")
-                resposta = f"{item['contexto'].strip()}\n\n📄 Fonte: {item['fonte']} (pág. {item['pagina']})"
-                return resposta, None
-            else:
-                print("❌ Entrada NÃO encontrada na memória.")
-        except Exception as e:
-            print(f"⚠️ Erro ao ler memória: {e}")
+
+    if forcar_popup:
+        print("⚠️ Popup forçado manualmente (forcar_popup=True)")
     else:
-        if forcar_popup:
-            print("⚠️ Popup forçado manualmente (forcar_popup=True)")
-        elif not os.path.exists(caminho):
-            print("🚫 Ficheiro de memória não encontrado.")
+        item = get_memoria().get(pergunta_key)
+        if item is not None:
+            print("✅ Entrada encontrada na memória!")
+            resposta = f"{item['contexto'].strip()}\n\n📄 Fonte: {item['fonte']} (pág. {item['pagina']})"
+            return resposta, None
+        print("❌ Entrada NÃO encontrada na memória.")
 
     # Recorre ao RAG normal se não encontrou na memória
     print("🔎 Gerando nova resposta com RAG...")
 
-    pergunta_formatada = f"query: {pergunta}"
-    resultados = vectorstore.similarity_search_with_score(pergunta_formatada, k=k)
-    docs = [doc for doc, _ in resultados if doc]
-    pairs = [(pergunta, doc.page_content) for doc in docs if doc.page_content]
-    scores = _reranker.predict(pairs)
-    reranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
-
-    return None, reranked[:3]
+    reranked = [
+        (SimpleNamespace(page_content=c["conteudo"], metadata=c["metadata"]), c["score"])
+        for c in obter_contextos(pergunta, k=k, top=3)
+    ]
+    return None, reranked
 
 
 def gerar_resposta_final(pergunta, contexto):
     prompt = f"{contexto}\n\nPergunta: {pergunta}\nResposta:"
-    resposta = generate_response(prompt)  # Esta deve vir do teu modelo (Velvet ou outro)
+    resposta = gerar(prompt)  # Velvet no servidor de inferência
     return resposta
 
 
@@ -231,7 +180,7 @@ def run_chatbot_gui():
         print(f"⚠️ Erro inesperado ao carregar o logo: {e}")
 
     ttk.Label(janela, text="Chatbot Local - Base Semântica", font=("Arial", 14, "bold")).pack(pady=5)
-    total_docs = len(vectorstore.get())
+    total_docs = contar_documentos() or 0
     ttk.Label(janela, text=f"📚 Documentos carregados: {total_docs}", font=("Arial", 10)).pack(pady=2)
 
     chat_box = scrolledtext.ScrolledText(janela, wrap="word", font=("Courier New", 11), height=18)
@@ -6,25 +6,116 @@
 #     - Salva cada métrica como linha JSON (velvet_metrics.jsonl)
 # 🔹 Registar eventos técnicos e de sistema em log textual
 #     - Regista cada evento no ficheiro velvet_logs.txt
+# 🔹 Escrita em segundo plano:
+#     - As funções só colocam a linha numa fila (nunca bloqueiam em disco)
+#     - Uma thread agrupa as linhas por ficheiro e escreve de
+#       LOG_FLUSH_INTERVALO em LOG_FLUSH_INTERVALO segundos, ou logo que
+#       haja LOG_FLUSH_LINHAS em espera, e ao terminar o programa
 # 🔹 Garantir que os diretórios de dados e logs existem
 # 🔹 Acrescentar timestamps a todas as entradas de métricas e logs
 # ============================================================
 
+import atexit
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+from config import LOG_FLUSH_INTERVALO, LOG_FLUSH_LINHAS
+
+
+class EscritorEmFundo:
+    """Fila de linhas (caminho, texto) escritas em lote por uma thread daemon."""
+
+    def __init__(self, intervalo=LOG_FLUSH_INTERVALO, max_linhas=LOG_FLUSH_LINHAS):
+        self.intervalo = intervalo
+        self.max_linhas = max_linhas
+        self._fila = queue.SimpleQueue()
+        self._thread = None
+        self._arranque_lock = threading.Lock()
+        self._escrita_lock = threading.Lock()
+        self._pastas_criadas = set()
+
+    def escrever(self, caminho, linha):
+        self._fila.put((caminho, linha))
+        if self._thread is None:
+            self._arrancar()
+
+    def flush(self, timeout=5.0):
+        """Escreve já tudo o que está na fila (chamado também no fim do programa)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._escrever_lote(self._esvaziar_fila())
+            return
+        # Marcador na fila: a thread escreve tudo o que vem antes dele e avisa
+        escrito = threading.Event()
+        self._fila.put((None, escrito))
+        escrito.wait(timeout)
+
+    def _arrancar(self):
+        with self._arranque_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._ciclo, name="logger-escritor", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _ciclo(self):
+        while True:
+            # Espera pela primeira linha, depois junta as seguintes até ao intervalo/limite
+            pendentes = [self._fila.get()]
+            limite = time.monotonic() + self.intervalo
+            while len(pendentes) < self.max_linhas and pendentes[-1][0] is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pendentes.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._escrever_lote(pendentes)
+            for caminho, escrito in pendentes:
+                if caminho is None:
+                    escrito.set()
+
+    def _esvaziar_fila(self):
+        pendentes = []
+        while True:
+            try:
+                pendentes.append(self._fila.get_nowait())
+            except queue.Empty:
+                return pendentes
+
+    def _escrever_lote(self, pendentes):
+        if not pendentes:
+            return
+        por_ficheiro = {}
+        for caminho, linha in pendentes:
+            if caminho is None:  # marcador de flush
+                continue
+            por_ficheiro.setdefault(caminho, []).append(linha)
+        with self._escrita_lock:
+            for caminho, linhas in por_ficheiro.items():
+                try:
+                    pasta = os.path.dirname(caminho)
+                    if pasta and pasta not in self._pastas_criadas:
+                        os.makedirs(pasta, exist_ok=True)
+                        self._pastas_criadas.add(pasta)
+                    with open(caminho, "a", encoding="utf-8") as f:
+                        f.write("".join(linhas))
+                except OSError as e:
+                    print(f"⚠️ Erro ao escrever em {caminho}: {e}")
+
+
+_escritor = EscritorEmFundo()
+
 
 def salvar_metricas(metricas, caminho="data/metrics/velvet_metrics.jsonl"):
     """Acrescenta uma linha JSON com métricas ao ficheiro velvet_metrics.jsonl"""
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
     metricas["timestamp"] = datetime.now().isoformat()
-    with open(caminho, "a", encoding="utf-8") as f:
-        f.write(json.dumps(metricas, ensure_ascii=False) + "\n")
+    _escritor.escrever(caminho, json.dumps(metricas, ensure_ascii=False) + "\n")
 
 
 def log_evento(msg, caminho="logs/velvet_logs.txt"):
     """Acrescenta um evento ao ficheiro de _logs técnicos"""
-    os.makedirs(os.path.dirname(caminho), exist_ok=True)
-    with open(caminho, "a", encoding="utf-8") as f:
-        f.write(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {msg}\n")
+    _escritor.escrever(caminho, f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {msg}\n")
@@ -0,0 +1,116 @@
+# ============================================================
+# servidor_inferencia.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Um único processo dono dos modelos (Velvet-2B, e5-large, CrossEncoder,
+#     MarianMT), partilhado por todas as interfaces (CLI, Discord, GUI local)
+# 🔹 Servidor Flask em SERVIDOR_HOST:SERVIDOR_PORTA (só localhost por omissão)
+# 🔹 Endpoints:
+#     - GET  /saude      ➜ resposta imediata (servidor vivo), sem tocar em modelos nem na BD
+#     - GET  /documentos ➜ nº de chunks indexados (contado uma vez por versão do índice)
+#     - POST /perguntar  ➜ process_user_input (JSON ou streaming NDJSON por frase)
+#     - POST /contextos  ➜ pesquisa + reranking usados pelo Mini LLM Local
+#     - POST /gerar      ➜ generate_response para um prompt já montado (PT por omissão)
+# 🔹 Os clientes estão em controllers/cliente_inferencia.py
+# 🔹 Arranque: python -m controllers.servidor_inferencia
+# ============================================================
+
+import json
+import os
+import queue
+import sys
+import threading
+
+from flask import Flask, Response, jsonify, request
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import SERVIDOR_HOST, SERVIDOR_PORTA
+from controllers.chatbot_controller import process_user_input
+from controllers.logger import log_evento
+from models.rag_engine import get_chroma_db, get_reranker, versao_indice
+from models.velvet_runner import generate_response
+
+app = Flask(__name__)
+
+# (versão do índice, nº de chunks): só volta a contar depois de um build/update
+_contagem = (None, None)
+_contagem_lock = threading.Lock()
+
+
+@app.get("/saude")
+def saude():
+    return jsonify({"estado": "ok", "pid": os.getpid()})
+
+
+@app.get("/documentos")
+def documentos():
+    global _contagem
+    versao = versao_indice()
+    with _contagem_lock:
+        if _contagem[0] != versao:
+            try:
+                _contagem = (versao, len(get_chroma_db().get(include=[])["ids"]))
+            except Exception as e:
+                log_evento(f"Erro ao contar documentos: {e}")
+                return jsonify({"documentos": None})
+        return jsonify({"documentos": _contagem[1]})
+
+
+@app.post("/perguntar")
+def perguntar():
+    dados = request.get_json(force=True)
+    pergunta = dados.get("pergunta", "")
+    if not dados.get("stream"):
+        try:
+            return jsonify(process_user_input(pergunta))
+        except Exception as e:
+            log_evento(f"Erro no servidor de inferência: {e}")
+            return jsonify({"erro": str(e)}), 500
+
+    # Streaming: uma linha JSON por frase e, no fim, a linha com o resultado completo
+    linhas = queue.SimpleQueue()
+
+    def trabalhar():
+        try:
+            resultado = process_user_input(pergunta, lambda frase: linhas.put({"frase": frase}))
+            linhas.put({"resultado": resultado})
+        except Exception as e:
+            log_evento(f"Erro no servidor de inferência: {e}")
+            linhas.put({"erro": str(e)})
+
+    threading.Thread(target=trabalhar, name="pergunta-stream", daemon=True).start()
+
+    def gerar_linhas():
+        while True:
+            linha = linhas.get()
+            yield json.dumps(linha, ensure_ascii=False) + "\n"
+            if "frase" not in linha:
+                break
+
+    return Response(gerar_linhas(), mimetype="application/x-ndjson")
+
+
+@app.post("/contextos")
+def contextos():
+    dados = request.get_json(force=True)
+    pergunta = dados.get("pergunta", "")
+    resultados = get_chroma_db().similarity_search_with_score(f"query: {pergunta}", k=int(dados.get("k", 5)))
+    docs = [doc for doc, _ in resultados if doc and doc.page_content]
+    scores = get_reranker().predict([(pergunta, doc.page_content) for doc in docs]) if docs else []
+    reranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)[:int(dados.get("top", 3))]
+    return jsonify([
+        {"conteudo": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+        for doc, score in reranked
+    ])
+
+
+@app.post("/gerar")
+def gerar():
+    dados = request.get_json(force=True)
+    return jsonify({"resposta": generate_response(dados.get("prompt", ""), lang=dados.get("lang", "pt"))})
+
+
+if __name__ == "__main__":
+    print(f"🚀 Servidor de inferência em http://{SERVIDOR_HOST}:{SERVIDOR_PORTA}")
+    log_evento(f"Servidor de inferência iniciado (pid {os.getpid()})")
+    app.run(host=SERVIDOR_HOST, port=SERVIDOR_PORTA, threaded=True)
@@ -0,0 +1,179 @@
+# ============================================================
+# agendador_lotes.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Juntar pedidos de geração concorrentes (ex: vários utilizadores do
+#     Discord ao mesmo tempo) num único `model.generate` em lote
+# 🔹 Uma thread recolhe prompts durante `janela` segundos (até `max_lote`),
+#     faz padding à esquerda e gera todos de uma vez
+# 🔹 Os resultados são devolvidos a cada pedido:
+#     - Pedidos normais ➜ texto completo no fim
+#     - Pedidos em streaming ➜ pedaços de texto à medida que os tokens saem
+#       (StreamerLote separa os tokens de cada linha do lote)
+# 🔹 Pedidos sozinhos no lote reaproveitam a KV-cache do contexto
+#     (cache_prefixos.py), processando só a pergunta
+# 🔹 Se o lote falhar, os pedidos são repetidos um a um (um pedido com
+#     problemas não faz falhar os restantes)
+# ============================================================
+
+import queue
+import threading
+import time
+
+# Marca o fim do streaming de um pedido
+FIM_STREAM = object()
+
+
+class PedidoGeracao:
+    def __init__(self, prompt: str, streaming: bool = False):
+        self.prompt = prompt
+        self.streaming = streaming
+        self.pedacos = queue.SimpleQueue() if streaming else None
+        self.resultado = None
+        self.erro = None
+        self.transmitido = False  # já recebeu texto em streaming (não pode ser repetido)
+        self._concluido = threading.Event()
+
+    def concluir(self, resultado=None, erro=None):
+        self.resultado = resultado
+        self.erro = erro
+        if self.streaming:
+            self.pedacos.put(FIM_STREAM)
+        self._concluido.set()
+
+    def esperar(self) -> str:
+        self._concluido.wait()
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+    def iterar(self):
+        """Pedaços de texto gerado (só para pedidos em streaming)."""
+        while (pedaco := self.pedacos.get()) is not FIM_STREAM:
+            yield pedaco
+        if self.erro is not None:
+            raise self.erro
+
+
+class StreamerLote:
+    """
+    Streamer para `generate` com batch > 1 (o TextIteratorStreamer só aceita 1).
+    Acumula os IDs de cada linha e envia o texto novo ao pedido respetivo
+    sempre que uma palavra fica completa.
+    """
+
+    def __init__(self, tokenizer, pedidos, eos_ids):
+        self.tokenizer = tokenizer
+        self.pedidos = pedidos
+        self.eos_ids = eos_ids
+        self.ids = [[] for _ in pedidos]
+        self.enviado = [0] * len(pedidos)
+        self.terminado = [False] * len(pedidos)
+        self._prompt_recebido = False
+
+    def put(self, valores):
+        if not self._prompt_recebido:  # a 1ª chamada traz os IDs do prompt
+            self._prompt_recebido = True
+            return
+        for i, token in enumerate(valores.reshape(len(self.pedidos), -1)[:, -1].tolist()):
+            if self.terminado[i]:
+                continue
+            if token in self.eos_ids:
+                self.terminado[i] = True
+                self._enviar(i, final=True)
+                continue
+            self.ids[i].append(token)
+            self._enviar(i)
+
+    def end(self):
+        for i in range(len(self.pedidos)):
+            if not self.terminado[i]:
+                self.terminado[i] = True
+                self._enviar(i, final=True)
+
+    def _enviar(self, i, final=False):
+        pedido = self.pedidos[i]
+        if not pedido.streaming:
+            return
+        texto = self.tokenizer.decode(self.ids[i], skip_special_tokens=True)
+        # Só envia até ao último espaço/quebra de linha (tokens podem formar meia palavra)
+        fim = len(texto) if final else max(texto.rfind(" "), texto.rfind("\n")) + 1
+        if fim > self.enviado[i]:
+            pedido.transmitido = True
+            pedido.pedacos.put(texto[self.enviado[i]:fim])
+            self.enviado[i] = fim
+
+
+class AgendadorLotes:
+    def __init__(self, obter_gerador, parametros: dict, janela: float, max_lote: int, cache_prefixos=None):
+        self.obter_gerador = obter_gerador
+        self.cache_prefixos = cache_prefixos
+        self.parametros = parametros
+        self.janela = janela
+        self.max_lote = max_lote
+        self._fila = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._ciclo, name="velvet-lotes", daemon=True)
+        self._thread.start()
+
+    def submeter(self, prompt: str, streaming: bool = False) -> PedidoGeracao:
+        pedido = PedidoGeracao(prompt, streaming)
+        self._fila.put(pedido)
+        return pedido
+
+    def _ciclo(self):
+        while True:
+            lote = [self._fila.get()]
+            limite = time.monotonic() + self.janela
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._processar(lote)
+
+    def _processar(self, lote):
+        try:
+            resultados = self._gerar_lote(lote)
+        except Exception as e:
+            if len(lote) == 1:
+                lote[0].concluir(erro=e)
+                return
+            # Repete um a um; pedidos que já mostraram texto em streaming ficam com o erro
+            for pedido in lote:
+                if pedido.transmitido:
+                    pedido.concluir(erro=e)
+                else:
+                    self._processar([pedido])
+            return
+        for pedido, resultado in zip(lote, resultados):
+            pedido.concluir(resultado)
+
+    def _gerar_lote(self, lote):
+        import torch
+
+        gerador = self.obter_gerador()
+        # Tokenizer já com pad_token e padding à esquerda (configurado em load_model)
+        tokenizer, model = gerador.tokenizer, gerador.model
+
+        extra = {}
+        if len(lote) == 1 and self.cache_prefixos is not None:
+            # Lotes com prefixos diferentes não partilham KV-cache: só pedidos isolados a usam
+            input_ids, kv = self.cache_prefixos.preparar(model, tokenizer, lote[0].prompt)
+            entradas = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+            if kv is not None:
+                extra["past_key_values"] = kv
+        else:
+            entradas = tokenizer([p.prompt for p in lote], return_tensors="pt", padding=True).to(model.device)
+        eos = model.generation_config.eos_token_id
+        eos_ids = set(eos if isinstance(eos, list) else [eos])
+        streamer = StreamerLote(tokenizer, lote, eos_ids)
+        with torch.inference_mode():
+            saida = model.generate(**entradas, **self.parametros,
+                                   pad_token_id=tokenizer.pad_token_id, streamer=streamer, **extra)
+
+        n_prompt = entradas["input_ids"].shape[1]
+        # Só o texto gerado (o prompt não volta a ser traduzido nem guardado como resposta)
+        return [tokenizer.decode(linha[n_prompt:], skip_special_tokens=True) for linha in saida]
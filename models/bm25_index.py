@@ -0,0 +1,102 @@
+# ============================================================
+# bm25_index.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Índice lexical BM25 dos chunks, construído pelo RAGLibraryManager
+#     ao lado da ChromaDB (mesmos IDs dos chunks)
+# 🔹 Em disco guarda-se o índice direto {id: {termo: frequência}},
+#     o que permite remover chunks em updates incrementais
+# 🔹 O índice invertido (termo ➜ chunks) é montado em memória na 1ª pesquisa
+# 🔹 Termos sem acentos e em minúsculas ("secundário" = "secundario")
+# ============================================================
+
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+BM25_FILE = "bm25_index.json"
+
+# Palavras demasiado comuns para ajudarem na pesquisa
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das",
+    "em", "no", "na", "nos", "nas", "por", "para", "com", "sem", "e", "ou", "que",
+    "se", "ao", "aos", "é", "ser", "sao", "qual", "quais", "como", "entre", "mais",
+    "the", "of", "and", "to", "in", "is", "what", "an", "are", "which", "how"
+}
+
+
+def tokenizar(texto: str) -> list[str]:
+    """Minúsculas, sem acentos, palavras com 2+ letras, sem stopwords."""
+    texto = unicodedata.normalize("NFKD", texto.lower()).encode("ASCII", "ignore").decode("ASCII")
+    return [t for t in re.findall(r"\w{2,}", texto) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, path, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.docs = {}          # {id: {termo: frequência}}
+        self._postings = None   # {termo: {id: frequência}}, montado sob demanda
+        self._doc_len = None
+        self._avg_len = 0.0
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.docs = json.load(f)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, chunk_id, texto):
+        self.docs[chunk_id] = dict(Counter(tokenizar(texto)))
+        self._postings = None
+
+    def remove(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.docs.pop(chunk_id, None)
+        self._postings = None
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.docs, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def search(self, query, k=10):
+        """
+        Devolve até `k` pares (id, score BM25) por ordem decrescente,
+        e o número de termos da pergunta presentes em cada chunk.
+        Returns: list[tuple[str, float, int]]
+        """
+        termos = set(tokenizar(query))
+        if not termos or not self.docs:
+            return []
+        self._montar_invertido()
+
+        n_docs = len(self.docs)
+        scores = Counter()
+        termos_presentes = Counter()
+        for termo in termos:
+            postings = self._postings.get(termo)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[chunk_id] / self._avg_len)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+                termos_presentes[chunk_id] += 1
+        return [(chunk_id, score, termos_presentes[chunk_id]) for chunk_id, score in scores.most_common(k)]
+
+    def _montar_invertido(self):
+        if self._postings is not None:
+            return
+        self._postings = {}
+        self._doc_len = {}
+        for chunk_id, termos in self.docs.items():
+            self._doc_len[chunk_id] = sum(termos.values())
+            for termo, tf in termos.items():
+                self._postings.setdefault(termo, {})[chunk_id] = tf
+        self._avg_len = (sum(self._doc_len.values()) / len(self._doc_len)) or 1.0
@@ -0,0 +1,118 @@
+# ============================================================
+# cache_embeddings.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Guardar os embeddings já calculados de cada chunk, fora da ChromaDB
+#     (sobrevive a clear_chroma / rebuild completo)
+# 🔹 Chave: (modelo de embeddings, hash do texto normalizado do chunk)
+# 🔹 Um par de ficheiros por modelo:
+#     - <modelo>.f32         ➜ matriz float32 (uma linha por chunk), lida com np.memmap
+#     - <modelo>.json        ➜ modelo e dimensão dos vetores
+#     - <modelo>.rows.jsonl  ➜ índice {hash: linha}, só acrescentado (uma linha JSON por chunk)
+# 🔹 Um rebuild só corre o modelo para chunks nunca vistos
+# ============================================================
+
+import json
+import os
+import re
+import threading
+
+from config import EMBEDDING_CACHE_PATH
+
+
+class CacheEmbeddings:
+    def __init__(self, model_name, cache_path=EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        os.makedirs(cache_path, exist_ok=True)
+        nome_seguro = re.sub(r"[^\w.-]", "_", model_name)
+        self.data_path = os.path.join(cache_path, f"{nome_seguro}.f32")
+        self.index_path = os.path.join(cache_path, f"{nome_seguro}.json")
+        self.rows_path = os.path.join(cache_path, f"{nome_seguro}.rows.jsonl")
+        self._lock = threading.Lock()
+        self._matriz = None
+        self.dim = None
+        self.rows = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                dados = json.load(f)
+            self.dim = dados.get("dim")
+            if dados.get("rows"):
+                # Formato antigo: índice completo dentro do .json
+                self._acrescentar_linhas(dados["rows"].items())
+                self._guardar_indice()
+        self.rows.update(self._ler_linhas())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get_many(self, hashes):
+        """Devolve {hash: vetor (lista de floats)} para os hashes que estão em cache."""
+        with self._lock:
+            encontrados = [h for h in hashes if h in self.rows]
+            if not encontrados:
+                return {}
+            matriz = self._abrir_matriz()
+            return {h: matriz[self.rows[h]].tolist() for h in encontrados}
+
+    def add_many(self, hashes, vectors):
+        """Acrescenta vetores novos ao fim da matriz e atualiza o índice."""
+        import numpy as np
+
+        with self._lock:
+            novos = [(h, v) for h, v in zip(hashes, vectors) if h not in self.rows]
+            if not novos:
+                return
+            dados = np.asarray([v for _, v in novos], dtype=np.float32)
+            if self.dim is None:
+                self.dim = int(dados.shape[1])
+            elif dados.shape[1] != self.dim:
+                raise ValueError(f"Dimensão {dados.shape[1]} diferente da cache ({self.dim}) para {self.model_name}.")
+
+            # Linha inicial pelo tamanho real do ficheiro (robusto a escritas interrompidas)
+            primeira = self._linhas_no_ficheiro()
+            with open(self.data_path, "ab") as f:
+                dados.tofile(f)
+            for i, (h, _) in enumerate(novos):
+                self.rows[h] = primeira + i
+            self._matriz = None  # a matriz cresceu: reabre no próximo get
+            if not os.path.exists(self.index_path):
+                self._guardar_indice()
+            # Só depois dos vetores estarem no .f32: o índice nunca aponta para linhas em falta
+            self._acrescentar_linhas((h, self.rows[h]) for h, _ in novos)
+
+    def _abrir_matriz(self):
+        import numpy as np
+
+        if self._matriz is None:
+            self._matriz = np.memmap(self.data_path, dtype=np.float32, mode="r",
+                                     shape=(self._linhas_no_ficheiro(), self.dim))
+        return self._matriz
+
+    def _linhas_no_ficheiro(self):
+        if not os.path.exists(self.data_path):
+            return 0
+        return os.path.getsize(self.data_path) // (4 * self.dim)
+
+    def _guardar_indice(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": self.dim}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _acrescentar_linhas(self, pares):
+        with open(self.rows_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps([h, linha]) + "\n" for h, linha in pares))
+
+    def _ler_linhas(self):
+        """Lê o índice {hash: linha}; ignora uma última linha meio escrita."""
+        rows = {}
+        if not os.path.exists(self.rows_path):
+            return rows
+        with open(self.rows_path, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    h, n = json.loads(linha)
+                except (ValueError, TypeError):
+                    continue
+                rows[h] = n
+        return rows
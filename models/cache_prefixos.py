@@ -0,0 +1,102 @@
+# ============================================================
+# cache_prefixos.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Reaproveitar o prefill do Velvet quando perguntas seguidas usam o
+#     mesmo contexto RAG (mesmos chunks no início do prompt)
+# 🔹 O prompt é dividido em:
+#     - Prefixo: "Context:\n...\n\nQuestion:" ➜ KV-cache guardada
+#     - Sufixo:  " <pergunta>\nAnswer:"      ➜ único texto processado de novo
+# 🔹 LRU limitada por memória (`orcamento_mb`), medida pelo tamanho real
+#     dos tensores key/value de todas as camadas
+# 🔹 A cache guardada nunca é alterada: cada geração usa uma cópia
+# ============================================================
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Fronteira entre o contexto (reaproveitável) e a pergunta
+SEPARADOR_PERGUNTA = "\n\nQuestion:"
+
+
+def dividir_prompt(prompt: str):
+    """Devolve (prefixo, sufixo) ou None se o prompt não tiver a forma contexto + pergunta."""
+    corte = prompt.rfind(SEPARADOR_PERGUNTA)
+    if corte <= 0:
+        return None
+    corte += len(SEPARADOR_PERGUNTA)
+    return prompt[:corte], prompt[corte:]
+
+
+def tamanho_kv(past_key_values) -> int:
+    """Bytes ocupados pelos tensores da KV-cache."""
+    camadas = past_key_values.to_legacy_cache() if hasattr(past_key_values, "to_legacy_cache") else past_key_values
+    return sum(t.numel() * t.element_size() for camada in camadas for t in camada)
+
+
+class CachePrefixos:
+    def __init__(self, orcamento_mb: int):
+        self.orcamento = orcamento_mb * 1024 * 1024
+        self._entradas = OrderedDict()  # hash do prefixo ➜ (ids do prefixo, past_key_values, bytes)
+        self._ocupado = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def preparar(self, model, tokenizer, prompt: str):
+        """
+        Tokeniza o prompt como prefixo + sufixo e devolve (input_ids, past_key_values).
+        past_key_values é uma cópia da cache do prefixo (calculada agora se não existir),
+        ou None se o prompt não tiver prefixo reaproveitável.
+        """
+        import torch
+
+        partes = dividir_prompt(prompt)
+        if partes is None:
+            return tokenizer(prompt, return_tensors="pt")["input_ids"].to(model.device), None
+        prefixo, sufixo = partes
+        chave = hashlib.sha256(prefixo.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entrada is None:
+            ids_prefixo = tokenizer(prefixo, return_tensors="pt")["input_ids"].to(model.device)
+            with torch.inference_mode():
+                kv = model(input_ids=ids_prefixo, use_cache=True).past_key_values
+            entrada = (ids_prefixo, kv, tamanho_kv(kv))
+            self._guardar(chave, entrada)
+
+        ids_prefixo, kv, _ = entrada
+        ids_sufixo = tokenizer(sufixo, return_tensors="pt", add_special_tokens=False)["input_ids"].to(model.device)
+        # generate acrescenta tokens à cache recebida: a original fica intacta para o próximo uso
+        with torch.inference_mode():
+            kv_copia = copy.deepcopy(kv)
+        return torch.cat([ids_prefixo, ids_sufixo], dim=1), kv_copia
+
+    def estatisticas(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entradas": len(self._entradas),
+            "ocupado_mb": round(self._ocupado / (1024 * 1024), 1)
+        }
+
+    def _guardar(self, chave, entrada):
+        if entrada[2] > self.orcamento:
+            return  # prefixo maior que o orçamento inteiro: não vale a pena guardar
+        with self._lock:
+            if chave in self._entradas:
+                return
+            self._entradas[chave] = entrada
+            self._ocupado += entrada[2]
+            while self._ocupado > self.orcamento:
+                _, (_, _, tamanho) = self._entradas.popitem(last=False)
+                self._ocupado -= tamanho
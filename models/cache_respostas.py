@@ -0,0 +1,216 @@
+# ============================================================
+# cache_respostas.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Responder de imediato a perguntas já respondidas (ex: "O que é UML ?"),
+#     sem recuperar contexto nem gerar com o Velvet
+# 🔹 Pergunta igual (após normalização) ➜ hit direto, sem calcular embeddings
+# 🔹 Pergunta parecida ➜ semelhança de cosseno entre embeddings das perguntas
+#     acima de `limiar` (matriz numpy em memória, uma linha por entrada)
+#     E os mesmos termos-chave: o e5 dá semelhanças altas a perguntas com a mesma
+#     forma e conceitos diferentes ("O que é agregação?" vs "O que é composição?")
+# 🔹 Invalidação:
+#     - Toda a cache quando a versão do índice RAG muda (novos documentos)
+#     - Entradas com mais de `ttl` segundos
+#     - Acima de `max_entradas`, remove as usadas há mais tempo
+# 🔹 Persistida em SQLite (sobrevive a reinícios do CLI/bot)
+# ============================================================
+
+import os
+import sqlite3
+import threading
+import time
+
+from config import RESPOSTAS_CACHE_PATH, RESPOSTAS_CACHE_LIMIAR, RESPOSTAS_CACHE_MAX, RESPOSTAS_CACHE_TTL
+from models.cache_traducao import normalizar_texto_cache
+from models.bm25_index import tokenizar
+
+# Palavras que mudam a forma da pergunta mas não o que se pergunta
+PALAVRAS_PERGUNTA = {
+    "explica", "explique", "define", "defina", "descreve", "descreva",
+    "significa", "significado", "conceito", "definicao", "diz", "diga"
+}
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    """Minúsculas, espaços normalizados e sem pontuação final ("O que é UML ?" = "o que é uml")."""
+    return normalizar_texto_cache(pergunta).lower().rstrip(" ?!.")
+
+
+def termos_chave(pergunta: str) -> frozenset:
+    """Termos de conteúdo da pergunta ("Explica o que é UML" ➜ {"uml"})."""
+    return frozenset(tokenizar(pergunta)) - PALAVRAS_PERGUNTA
+
+
+class CacheRespostas:
+    def __init__(self,
+                 caminho=RESPOSTAS_CACHE_PATH,
+                 limiar=RESPOSTAS_CACHE_LIMIAR,
+                 max_entradas=RESPOSTAS_CACHE_MAX,
+                 ttl=RESPOSTAS_CACHE_TTL):
+        self.caminho = caminho
+        self.limiar = limiar
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits_exatos = 0
+        self.hits_semanticos = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " pergunta TEXT PRIMARY KEY,"
+            " embedding BLOB NOT NULL,"
+            " resposta TEXT NOT NULL,"
+            " versao_indice REAL NOT NULL,"
+            " criado REAL NOT NULL,"
+            " ultimo_acesso REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        # {pergunta normalizada: [embedding, resposta, criado, ultimo_acesso]}
+        self._entradas = {}
+        self._versao = None
+        self._matriz = None      # embeddings empilhados, reconstruída quando as entradas mudam
+        self._chaves = []
+        for pergunta, embedding, resposta, versao, criado, acesso in self._conn.execute(
+            "SELECT pergunta, embedding, resposta, versao_indice, criado, ultimo_acesso FROM respostas"
+        ):
+            self._versao = versao
+            self._entradas[pergunta] = [embedding, resposta, criado, acesso]
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def procurar(self, pergunta: str, versao: float, embed_fn):
+        """
+        Devolve (resposta guardada para `pergunta` ou None, embedding da pergunta).
+        `embed_fn(texto)` só é chamada se não houver correspondência exata; o embedding
+        (None se não foi calculado) pode ser passado a guardar() para não o repetir.
+        """
+        import numpy as np
+
+        chave = normalizar_pergunta(pergunta)
+        with self._lock:
+            self._validar(versao)
+            if chave in self._entradas:
+                self.hits_exatos += 1
+                return self._usar(chave), None
+            if not self._entradas:
+                self.misses += 1
+                return None, None
+
+        vetor = self._normalizar_vetor(embed_fn(chave))
+        with self._lock:
+            matriz = self._montar_matriz()
+            if matriz is None:
+                self.misses += 1
+                return None, vetor
+            semelhancas = matriz @ vetor
+            termos = termos_chave(chave)
+            # Candidatas acima do limiar, da mais parecida para a menos parecida
+            for i in np.argsort(-semelhancas):
+                if semelhancas[i] < self.limiar:
+                    break
+                if termos_chave(self._chaves[i]) == termos:
+                    self.hits_semanticos += 1
+                    return self._usar(self._chaves[i]), vetor
+            self.misses += 1
+            return None, vetor
+
+    def guardar(self, pergunta: str, resposta: str, versao: float, embed_fn, vetor=None):
+        """Guarda a resposta associada ao embedding da pergunta (`vetor`, se já calculado em procurar())."""
+        chave = normalizar_pergunta(pergunta)
+        if vetor is None:
+            vetor = embed_fn(chave)
+        embedding = self._normalizar_vetor(vetor).tobytes()
+        agora = time.time()
+        with self._lock:
+            self._validar(versao)
+            self._versao = versao
+            self._entradas[chave] = [embedding, resposta, agora, agora]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, embedding, resposta, versao, agora, agora)
+            )
+            excesso = len(self._entradas) - self.max_entradas
+            if excesso > 0:
+                antigas = sorted(self._entradas, key=lambda c: self._entradas[c][3])[:excesso]
+                self._remover(antigas)
+            self._conn.commit()
+            self._matriz = None
+
+    def estatisticas(self) -> dict:
+        total = self.hits_exatos + self.hits_semanticos + self.misses
+        return {
+            "hits_exatos": self.hits_exatos,
+            "hits_semanticos": self.hits_semanticos,
+            "misses": self.misses,
+            "taxa_acerto": round((self.hits_exatos + self.hits_semanticos) / total, 3) if total else 0.0,
+            "entradas": len(self._entradas)
+        }
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._matriz = None
+            self._conn.execute("DELETE FROM respostas")
+            self._conn.commit()
+
+    def _validar(self, versao):
+        # Índice RAG reconstruído/atualizado: as respostas podem estar desatualizadas
+        if self._versao is not None and self._versao != versao and self._entradas:
+            self._entradas.clear()
+            self._conn.execute("DELETE FROM respostas")
+            self._matriz = None
+        self._versao = versao
+
+        limite = time.time() - self.ttl
+        expiradas = [c for c, (_, _, criado, _) in self._entradas.items() if criado < limite]
+        if expiradas:
+            self._remover(expiradas)
+        self._conn.commit()
+
+    def _usar(self, chave):
+        entrada = self._entradas[chave]
+        entrada[3] = time.time()
+        self._conn.execute("UPDATE respostas SET ultimo_acesso = ? WHERE pergunta = ?", (entrada[3], chave))
+        self._conn.commit()
+        return entrada[1]
+
+    def _remover(self, chaves):
+        for chave in chaves:
+            self._entradas.pop(chave, None)
+        self._conn.executemany("DELETE FROM respostas WHERE pergunta = ?", [(c,) for c in chaves])
+        self._matriz = None
+
+    def _montar_matriz(self):
+        import numpy as np
+
+        if self._matriz is None and self._entradas:
+            self._chaves = list(self._entradas)
+            self._matriz = np.stack([np.frombuffer(self._entradas[c][0], dtype=np.float32) for c in self._chaves])
+        return self._matriz
+
+    @staticmethod
+    def _normalizar_vetor(vetor):
+        import numpy as np
+
+        vetor = np.asarray(vetor, dtype=np.float32)
+        return vetor / (np.linalg.norm(vetor) or 1.0)
+
+
+# Instância partilhada (criada no primeiro uso)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_respostas() -> CacheRespostas:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheRespostas()
+    return _cache
@@ -0,0 +1,148 @@
+# ============================================================
+# cache_traducao.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Evitar traduzir novamente textos já traduzidos pelo MarianMT
+# 🔹 Cache em dois níveis:
+#     - Memória: LRU (OrderedDict) limitada a `max_memoria` entradas
+#     - Disco: SQLite limitado a `max_disco` entradas (remove as menos usadas)
+# 🔹 Chave: (direção, modelo, hash SHA-256 do texto normalizado)
+# 🔹 Contadores de hits/misses para métricas
+# ============================================================
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import TRADUCAO_CACHE_PATH, TRADUCAO_CACHE_MEMORIA, TRADUCAO_CACHE_DISCO
+
+
+def normalizar_texto_cache(texto: str) -> str:
+    """Normaliza Unicode e espaços para que variações triviais partilhem a mesma entrada."""
+    texto = unicodedata.normalize("NFC", texto or "")
+    return " ".join(texto.split())
+
+
+class CacheTraducao:
+    # A limpeza do disco só corre de N em N inserções (evita COUNT(*) a cada escrita)
+    INTERVALO_LIMPEZA = 100
+
+    def __init__(self,
+                 caminho=TRADUCAO_CACHE_PATH,
+                 max_memoria=TRADUCAO_CACHE_MEMORIA,
+                 max_disco=TRADUCAO_CACHE_DISCO):
+        self.caminho = caminho
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._insercoes = 0
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS traducoes ("
+            " chave TEXT PRIMARY KEY,"
+            " traducao TEXT NOT NULL,"
+            " ultimo_acesso REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acesso ON traducoes (ultimo_acesso)")
+        self._conn.commit()
+
+    @staticmethod
+    def chave(direcao: str, modelo: str, texto: str) -> str:
+        texto_hash = hashlib.sha256(normalizar_texto_cache(texto).encode("utf-8")).hexdigest()
+        return f"{direcao}|{modelo}|{texto_hash}"
+
+    def get(self, direcao: str, modelo: str, texto: str):
+        """Devolve a tradução guardada ou None (memória primeiro, depois disco)."""
+        chave = self.chave(direcao, modelo, texto)
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.hits_memoria += 1
+                return self._memoria[chave]
+
+            linha = self._conn.execute(
+                "SELECT traducao FROM traducoes WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE traducoes SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave)
+            )
+            self._conn.commit()
+            self.hits_disco += 1
+            self._guardar_em_memoria(chave, linha[0])
+            return linha[0]
+
+    def set(self, direcao: str, modelo: str, texto: str, traducao: str):
+        """Guarda uma tradução nos dois níveis."""
+        chave = self.chave(direcao, modelo, texto)
+        with self._lock:
+            self._guardar_em_memoria(chave, traducao)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO traducoes (chave, traducao, ultimo_acesso) VALUES (?, ?, ?)",
+                (chave, traducao, time.time())
+            )
+            self._insercoes += 1
+            if self._insercoes % self.INTERVALO_LIMPEZA == 0:
+                self._limpar_disco()
+            self._conn.commit()
+
+    def estatisticas(self) -> dict:
+        total = self.hits_memoria + self.hits_disco + self.misses
+        return {
+            "hits_memoria": self.hits_memoria,
+            "hits_disco": self.hits_disco,
+            "misses": self.misses,
+            "taxa_acerto": round((self.hits_memoria + self.hits_disco) / total, 3) if total else 0.0,
+            "entradas_memoria": len(self._memoria)
+        }
+
+    def limpar(self):
+        """Apaga todas as entradas (memória e disco)."""
+        with self._lock:
+            self._memoria.clear()
+            self._conn.execute("DELETE FROM traducoes")
+            self._conn.commit()
+
+    def _guardar_em_memoria(self, chave, traducao):
+        self._memoria[chave] = traducao
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _limpar_disco(self):
+        # Remove as entradas acedidas há mais tempo acima do limite
+        total = self._conn.execute("SELECT COUNT(*) FROM traducoes").fetchone()[0]
+        excesso = total - self.max_disco
+        if excesso > 0:
+            self._conn.execute(
+                "DELETE FROM traducoes WHERE chave IN ("
+                " SELECT chave FROM traducoes ORDER BY ultimo_acesso ASC LIMIT ?)",
+                (excesso,)
+            )
+
+
+# Instância partilhada (criada no primeiro uso)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_traducao() -> CacheTraducao:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheTraducao()
+    return _cache
@@ -0,0 +1,77 @@
+# ============================================================
+# historico.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Histórico de interações em JSON Lines (`velvet_respostas.jsonl`)
+#     - Cada resposta acrescenta UMA linha (sem reler nem reescrever o ficheiro)
+#     - Escritas serializadas por lock (Discord pode responder em paralelo)
+# 🔹 Leitura em streaming, entrada a entrada (relatórios e métricas)
+# 🔹 Migração automática do antigo `velvet_respostas.json` (lista JSON),
+#     que fica guardado como `velvet_respostas.json.migrado`
+# ============================================================
+
+import json
+import os
+import threading
+from pathlib import Path
+
+HISTORICO_FILE = Path("data/respostas/velvet_respostas.jsonl")
+HISTORICO_JSON_ANTIGO = Path("data/respostas/velvet_respostas.json")
+
+_historico_lock = threading.Lock()
+
+
+def migrar_historico_json(antigo: Path = HISTORICO_JSON_ANTIGO, destino: Path = HISTORICO_FILE) -> int:
+    """Converte o histórico antigo (lista JSON) para JSONL. Devolve o número de entradas migradas."""
+    if not antigo.exists():
+        return 0
+    with open(antigo, encoding="utf-8") as f:
+        try:
+            entradas = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Histórico antigo inválido, não migrado ({antigo}): {e}")
+            return 0
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    # As entradas antigas vêm primeiro, mantendo a ordem cronológica
+    tmp_path = destino.with_suffix(".jsonl.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f_out:
+        for entrada in entradas:
+            f_out.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        if destino.exists():
+            with open(destino, encoding="utf-8") as f_atual:
+                for linha in f_atual:
+                    f_out.write(linha)
+    os.replace(tmp_path, destino)
+    os.replace(antigo, antigo.with_name(antigo.name + ".migrado"))
+    print(f"📦 Histórico migrado para {destino}: {len(entradas)} entradas.")
+    return len(entradas)
+
+
+def registar_interacao(detalhes: dict, caminho: Path = HISTORICO_FILE):
+    """Acrescenta uma interação ao histórico (uma linha JSON)."""
+    linha = json.dumps(detalhes, ensure_ascii=False) + "\n"
+    with _historico_lock:
+        if HISTORICO_JSON_ANTIGO.exists() and caminho == HISTORICO_FILE:
+            migrar_historico_json()
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linha)
+
+
+def iterar_historico(caminho: Path = HISTORICO_FILE):
+    """Lê o histórico entrada a entrada (ignora linhas incompletas/corrompidas)."""
+    if caminho == HISTORICO_FILE and HISTORICO_JSON_ANTIGO.exists():
+        with _historico_lock:
+            migrar_historico_json()
+    if not caminho.exists():
+        return
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                continue
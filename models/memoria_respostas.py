@@ -0,0 +1,91 @@
+# ============================================================
+# memoria_respostas.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Guardar os contextos escolhidos no Mini LLM Local (llm_local.py)
+#     por pergunta normalizada
+# 🔹 SQLite com a pergunta como chave primária:
+#     - Carregado uma vez para um dicionário em memória (procura O(1))
+#     - Cada nova entrada é um único INSERT OR REPLACE (sem reescrever tudo)
+# 🔹 Migra automaticamente o antigo respostas_memoria.json (lista ou dicionário)
+# ============================================================
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+MEMORIA_DB_PATH = "data/respostas/respostas_memoria.sqlite3"
+MEMORIA_JSON_ANTIGO = "data/respostas/respostas_memoria.json"
+
+
+class MemoriaRespostas:
+    def __init__(self, normalizar, caminho=MEMORIA_DB_PATH, json_antigo=MEMORIA_JSON_ANTIGO):
+        self.caminho = caminho
+        self._normalizar = normalizar  # usado para migrar o formato antigo em lista
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memoria ("
+            " pergunta TEXT PRIMARY KEY,"
+            " contexto TEXT NOT NULL,"
+            " score REAL,"
+            " fonte TEXT,"
+            " pagina TEXT,"
+            " timestamp TEXT)"
+        )
+        self._conn.commit()
+
+        self._entradas = {
+            pergunta: {"contexto": contexto, "score": score, "fonte": fonte, "pagina": pagina, "timestamp": ts}
+            for pergunta, contexto, score, fonte, pagina, ts in self._conn.execute("SELECT * FROM memoria")
+        }
+        if not self._entradas and json_antigo and os.path.exists(json_antigo):
+            self._migrar_json(json_antigo)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, pergunta_key):
+        return pergunta_key in self._entradas
+
+    def get(self, pergunta_key):
+        return self._entradas.get(pergunta_key)
+
+    def guardar(self, pergunta_key, contexto, score, fonte, pagina, timestamp=None):
+        entrada = {
+            "contexto": contexto,
+            "score": float(score),
+            "fonte": fonte,
+            "pagina": str(pagina),
+            "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        with self._lock:
+            self._entradas[pergunta_key] = entrada
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memoria VALUES (?, ?, ?, ?, ?, ?)",
+                (pergunta_key, *entrada.values())
+            )
+            self._conn.commit()
+
+    def _migrar_json(self, caminho_json):
+        try:
+            with open(caminho_json, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Não foi possível migrar {caminho_json}: {e}")
+            return
+
+        # Formato antigo (lista de entradas) ou dicionário {pergunta normalizada: entrada}
+        if isinstance(dados, list):
+            dados = {
+                self._normalizar(e.get("pergunta", "")): {**e, "timestamp": e.get("data")}
+                for e in dados
+            }
+        for key, entrada in dados.items():
+            if key:
+                self.guardar(key, entrada.get("contexto", ""), entrada.get("score", 0),
+                             entrada.get("fonte", "?"), entrada.get("pagina", "?"), entrada.get("timestamp"))
+        print(f"📦 Memória migrada de {caminho_json}: {len(self._entradas)} entradas.")
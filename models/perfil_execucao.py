@@ -0,0 +1,111 @@
+# ============================================================
+# perfil_execucao.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# 🔹 Escolher como o Velvet corre na máquina atual (em vez de device=0 fixo)
+#     - Dispositivo: CUDA se existir, senão CPU
+#     - Precisão: bf16 em GPUs/CPUs com suporte nativo, fp16 nas restantes
+#       GPUs, fp32 nos CPUs sem bf16
+#     - Threads intra-op / inter-op do torch
+#     - torch.compile opcional do forward
+#     - Pesos int8 opcionais (quantização dinâmica das camadas Linear, só CPU)
+# 🔹 Tudo configurável em config.py (VELVET_*), "auto" por omissão
+# 🔹 Relatório de arranque com o perfil ativo
+# ============================================================
+
+import os
+
+from config import (VELVET_DISPOSITIVO, VELVET_PRECISAO, VELVET_THREADS, VELVET_THREADS_INTEROP,
+                    VELVET_COMPILAR, VELVET_INT8)
+
+
+def _cpu_suporta_bf16() -> bool:
+    """AVX512-BF16 ou AMX: bf16 é mais rápido que fp32 no CPU. Sem estas extensões é mais lento."""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def _nucleos_fisicos() -> int:
+    # Hyper-threading não ajuda em matmul: metade dos CPUs lógicos é uma boa aproximação
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def detetar_perfil() -> dict:
+    """Resolve as opções "auto" para o hardware atual."""
+    import torch
+
+    dispositivo = VELVET_DISPOSITIVO
+    if dispositivo == "auto":
+        dispositivo = "cuda" if torch.cuda.is_available() else "cpu"
+
+    int8 = VELVET_INT8 and dispositivo == "cpu"
+    precisao = VELVET_PRECISAO
+    if int8:
+        precisao = "fp32"  # a quantização dinâmica parte de pesos fp32
+    elif precisao == "auto":
+        if dispositivo == "cuda":
+            precisao = "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+        else:
+            precisao = "bf16" if _cpu_suporta_bf16() else "fp32"
+
+    return {
+        "dispositivo": dispositivo,
+        "precisao": precisao,
+        "dtype": {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}[precisao],
+        "threads": VELVET_THREADS or (_nucleos_fisicos() if dispositivo == "cpu" else torch.get_num_threads()),
+        "threads_interop": VELVET_THREADS_INTEROP or None,
+        "compilar": VELVET_COMPILAR,
+        "int8": int8,
+        "avisos": ["VELVET_INT8 ignorado: só disponível em CPU."] if VELVET_INT8 and not int8 else []
+    }
+
+
+def configurar_threads(perfil: dict):
+    """Tem de correr antes de qualquer trabalho paralelo do torch (inter-op só pode ser definido uma vez)."""
+    import torch
+
+    torch.set_num_threads(perfil["threads"])
+    if perfil["threads_interop"]:
+        try:
+            torch.set_num_interop_threads(perfil["threads_interop"])
+        except RuntimeError as e:
+            perfil["avisos"].append(f"Threads inter-op não alteradas: {e}")
+
+
+def preparar_modelo(model, perfil: dict):
+    """Aplica int8 e torch.compile ao modelo já carregado com o dtype do perfil."""
+    import torch
+
+    if perfil["int8"]:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    if perfil["compilar"]:
+        try:
+            # Só o forward: o objeto continua a ser o modelo HF (generate, config, pipeline)
+            forward_compilado = torch.compile(model.forward)
+            # torch.compile só compila na 1ª chamada: um forward curto aqui faz com que
+            # uma falha de compilação caia já no except (e não na 1ª pergunta)
+            model.to(perfil["dispositivo"])
+            with torch.inference_mode():
+                forward_compilado(input_ids=torch.zeros((1, 8), dtype=torch.long, device=model.device))
+            model.forward = forward_compilado
+        except Exception as e:
+            perfil["compilar"] = False
+            perfil["avisos"].append(f"torch.compile indisponível: {e}")
+    return model
+
+
+def relatorio_perfil(perfil: dict) -> str:
+    linhas = [
+        "⚙️ Perfil de execução do Velvet:",
+        f"   └ Dispositivo: {perfil['dispositivo']}",
+        f"   └ Precisão: {perfil['precisao']}{' (pesos Linear em int8)' if perfil['int8'] else ''}",
+        f"   └ Threads: {perfil['threads']} intra-op, {perfil['threads_interop'] or 'omissão'} inter-op",
+        f"   └ torch.compile: {'sim' if perfil['compilar'] else 'não'}",
+    ]
+    linhas += [f"   ⚠️ {aviso}" for aviso in perfil["avisos"]]
+    return "\n".join(linhas)
@@ -5,22 +5,118 @@
 # 🔹 Limita por tokens, remove ruído como títulos, figuras, números, refs.
 # ============================================================
 
-from langchain_chroma import Chroma
-from sentence_transformers import CrossEncoder
+import os
+import threading
+import time
 import unicodedata
-from langchain_huggingface import HuggingFaceEmbeddings
-from transformers import AutoTokenizer
-from config import CHROMA_PATH, EMBEDDING_MODEL, K_SIMILARITY_SEARCH, MAX_PROMPT_TOKENS
-from models.tradutor_local import traduzir
+from config import CHROMA_PATH, EMBEDDING_MODEL, RERANKER_MODEL, K_SIMILARITY_SEARCH, MAX_PROMPT_TOKENS
+from config import RETRIEVAL_MODE, HYBRID_DENSE_K, HYBRID_LEXICAL_K, HYBRID_CANDIDATES, RRF_K
+from models.tradutor_local import traduzir_lote, PerguntaTraduzida
+from models.bm25_index import BM25Index, BM25_FILE, tokenizar
 import re
 
-# === Inicialização de embeddings, tokenizer e reranker ===
-embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
-reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+# === Embeddings, tokenizer e reranker (carregados só no primeiro uso) ===
+_embeddings = None
+_tokenizer = None
+_reranker = None
+_modelos_lock = threading.Lock()
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        with _modelos_lock:
+            if _embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                _embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    return _embeddings
+
+def get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        with _modelos_lock:
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    return _tokenizer
+
+def get_reranker():
+    global _reranker
+    if _reranker is None:
+        with _modelos_lock:
+            if _reranker is None:
+                from sentence_transformers import CrossEncoder
+                _reranker = CrossEncoder(RERANKER_MODEL)
+    return _reranker
+
+# === Vectorstore partilhado pelo processo ===
+# Reaberto automaticamente quando o RAGLibraryManager marca o índice como
+# atualizado (ficheiro INDEX_VERSION_FILE), mesmo que noutro processo.
+INDEX_VERSION_FILE = "index_version"
+_chroma_db = None
+_chroma_versao = None
+_bm25 = None
+_bm25_versao = None
+_chroma_lock = threading.Lock()
+
+def versao_indice(chroma_path: str = CHROMA_PATH) -> float:
+    """Versão do índice (mtime do ficheiro de versão); 0.0 se nunca foi marcado."""
+    try:
+        return os.stat(os.path.join(chroma_path, INDEX_VERSION_FILE)).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+def marcar_indice_atualizado(chroma_path: str = CHROMA_PATH):
+    """Chamado após build/update: muda a versão do índice e fecha o handle local."""
+    os.makedirs(chroma_path, exist_ok=True)
+    with open(os.path.join(chroma_path, INDEX_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+    invalidar_chroma_db()
+
+def invalidar_chroma_db():
+    global _chroma_db, _chroma_versao, _bm25, _bm25_versao
+    with _chroma_lock:
+        _chroma_db = None
+        _chroma_versao = None
+        _bm25 = None
+        _bm25_versao = None
+
+def limpar_cache_chromadb():
+    """
+    O chromadb guarda um System por pasta dentro do processo (SharedSystemClient):
+    sem limpar essa cache, reabrir o Chroma devolve o mesmo cliente, que não vê
+    rebuilds (pasta apagada e recriada) feitos por outro processo.
+    """
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+    except ImportError:
+        try:
+            from chromadb.api.client import SharedSystemClient
+        except ImportError:
+            return
+    SharedSystemClient.clear_system_cache()
 
 def get_chroma_db():
-    return Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
+    global _chroma_db, _chroma_versao
+    versao = versao_indice(CHROMA_PATH)
+    if _chroma_db is None or _chroma_versao != versao:
+        with _chroma_lock:
+            if _chroma_db is None or _chroma_versao != versao:
+                from langchain_chroma import Chroma
+                limpar_cache_chromadb()
+                _chroma_db = Chroma(persist_directory=CHROMA_PATH, embedding_function=get_embeddings())
+                _chroma_versao = versao
+    return _chroma_db
+
+def get_bm25_index() -> BM25Index:
+    """Índice BM25 do RAGLibraryManager, recarregado quando a versão do índice muda."""
+    global _bm25, _bm25_versao
+    versao = versao_indice(CHROMA_PATH)
+    if _bm25 is None or _bm25_versao != versao:
+        with _chroma_lock:
+            if _bm25 is None or _bm25_versao != versao:
+                _bm25 = BM25Index(os.path.join(CHROMA_PATH, BM25_FILE))
+                _bm25_versao = versao
+    return _bm25
 
 def normalize_text(text: str, max_length: int = 1000) -> str:
     text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
@@ -55,6 +151,22 @@ def truncate_by_tokens(text: str, max_tokens: int, tok) -> str:
     truncated_tokens = tokens[:max_tokens]
     return tok.decode(truncated_tokens)
 
+def dados_chunk(doc, tok):
+    """
+    Devolve (texto limpo, nº de tokens, chave de duplicado) de um chunk.
+    Usa os valores pré-calculados pelo RAGLibraryManager (metadata "texto_limpo",
+    "n_tokens", "hash_norm"); calcula-os só para chunks de índices antigos.
+    """
+    meta = doc.metadata or {}
+    if "texto_limpo" in meta and "n_tokens" in meta and "hash_norm" in meta:
+        return meta["texto_limpo"], meta["n_tokens"], meta["hash_norm"]
+    texto = doc.page_content
+    return (
+        limpar_ruido_contexto(texto),
+        len(tok.encode(texto, add_special_tokens=False)),
+        " ".join(texto.split())
+    )
+
 def is_generic_context(context: str) -> bool:
     # Heurística: demasiado curto, só exemplos, ruído, ou ausência de frases declarativas
     if len(context) < 100:
@@ -63,20 +175,58 @@ def is_generic_context(context: str) -> bool:
         return True
     return False
 
-def retrieve_context(query: str, k: int = K_SIMILARITY_SEARCH, max_candidates: int = 20, return_scores: bool = False, return_raw: bool = False):
+def _chave_doc(doc) -> str:
+    # hash_norm é também o ID do chunk na Chroma e no índice BM25
+    return (doc.metadata or {}).get("hash_norm") or getattr(doc, "id", None) or doc.page_content
+
+def recuperar_candidatos_hibridos(query: str, query_en: str, k: int = HYBRID_CANDIDATES):
+    """
+    Candidatos para o reranker a partir de BM25 (pergunta PT) e embeddings (pergunta EN),
+    fundidos por Reciprocal Rank Fusion e limitados a `k`.
+    Se houver pelo menos `k` chunks com todos os termos da pergunta (termos exatos
+    como "diagrama de classes"), a pesquisa vetorial nem é feita.
+    """
+    from langchain.schema import Document
+
+    lexicais = get_bm25_index().search(query, k=HYBRID_LEXICAL_K)
+    n_termos = len(set(tokenizar(query)))
+    completos = [chunk_id for chunk_id, _, presentes in lexicais if presentes == n_termos]
+    chroma_db = get_chroma_db()
+    densos = [] if n_termos and len(completos) >= k else chroma_db.similarity_search(query_en, k=HYBRID_DENSE_K)
+
+    fusao = {}
+    docs = {}
+    for rank, doc in enumerate(densos, 1):
+        chave = _chave_doc(doc)
+        docs[chave] = doc
+        fusao[chave] = fusao.get(chave, 0.0) + 1.0 / (RRF_K + rank)
+    for rank, (chunk_id, _, _) in enumerate(lexicais, 1):
+        fusao[chunk_id] = fusao.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+    ordem = sorted(fusao, key=fusao.get, reverse=True)[:k]
+
+    # Chunks só encontrados pelo BM25: texto e metadata vêm da Chroma pelo ID
+    em_falta = [chave for chave in ordem if chave not in docs]
+    if em_falta:
+        encontrados = chroma_db.get(ids=em_falta)
+        for chunk_id, texto, meta in zip(encontrados["ids"], encontrados["documents"], encontrados["metadatas"]):
+            docs[chunk_id] = Document(page_content=texto, metadata=meta or {})
+    return [docs[chave] for chave in ordem if chave in docs]
+
+def retrieve_context(query, k: int = K_SIMILARITY_SEARCH, max_candidates: int = 20, return_scores: bool = False, return_raw: bool = False):
+    """`query` pode ser texto PT ou uma PerguntaTraduzida (reaproveita a tradução EN já feita)."""
     debug_ctx = {}
     debug_ctx["context_en"] = ""
 
-    try:
-        query_en = traduzir(query, origem="pt", destino="en")
-        debug_ctx["query_en"] = query_en
-    except Exception as erro_tq:
-        print("❌ Erro ao traduzir a query:", erro_tq)
-        query_en = query
-        debug_ctx["query_en"] = query_en
+    pergunta = query if isinstance(query, PerguntaTraduzida) else PerguntaTraduzida(query)
+    query, query_en = pergunta.pt, pergunta.en
+    debug_ctx["query_en"] = query_en
 
-    chroma_db = get_chroma_db()
-    context_docs = chroma_db.similarity_search(query_en, k=max_candidates)
+    if RETRIEVAL_MODE == "hybrid":
+        context_docs = recuperar_candidatos_hibridos(query, query_en)
+        debug_ctx["modo_pesquisa"] = "hybrid"
+    else:
+        context_docs = get_chroma_db().similarity_search(query_en, k=max_candidates)
+        debug_ctx["modo_pesquisa"] = "dense"
 
     if not context_docs:
         contexto_vazio = "Sem contexto relevante encontrado."
@@ -89,23 +239,24 @@ def retrieve_context(query: str, k: int = K_SIMILARITY_SEARCH, max_candidates: i
 
     # Rerank CrossEncoder
     pairs = [(query_en, doc.page_content) for doc in context_docs]
-    scores = reranker.predict(pairs)
+    scores = get_reranker().predict(pairs)
     reranked = sorted(zip(context_docs, scores), key=lambda x: x[1], reverse=True)
     TOP_N = 12
 
+    tokenizer = get_tokenizer()
     selected_chunks = []
+    selected_docs = []
+    selected_scores = []
     token_count = 0
-    seen_texts = set()
+    seen_keys = set()
 
     for doc, score in reranked:
-        chunk_text = doc.page_content
-        chunk_tokens = len(tokenizer.encode(chunk_text, add_special_tokens=False))
-        if any(chunk_text in s or s in chunk_text for s in seen_texts):
+        # Texto limpo, nº de tokens e hash vêm da indexação (só lookups e somas)
+        chunk_clean, chunk_tokens, chunk_key = dados_chunk(doc, tokenizer)
+        if chunk_key in seen_keys:
             continue
 
-        # Heurística anti-ruído (descarta chunk se for detetado ruído)
-        chunk_clean = limpar_ruido_contexto(chunk_text)
-        # Se ficou demasiado curto após limpeza, ignora
+        # Heurística anti-ruído: se ficou demasiado curto após limpeza, ignora
         if len(chunk_clean) < 100:
             continue
 
@@ -113,22 +264,32 @@ def retrieve_context(query: str, k: int = K_SIMILARITY_SEARCH, max_candidates: i
             break
 
         selected_chunks.append(chunk_clean)
+        selected_docs.append(doc)
+        selected_scores.append(score)
         token_count += chunk_tokens
-        seen_texts.add(chunk_text)
+        seen_keys.add(chunk_key)
 
     # Junta todos os chunks relevantes até ao máximo de tokens
     context_pt = "\n\n".join(selected_chunks)
     context_pt_truncado = truncate_by_tokens(context_pt, MAX_PROMPT_TOKENS, tokenizer)
     debug_ctx["context_pt"] = context_pt_truncado
+    # (doc, score) dos chunks que entraram no contexto (nem todos os reranked entram)
+    debug_ctx["selected_docs"] = list(zip(selected_docs, selected_scores))
 
     # Heurística genérica de contexto fraco
     if is_generic_context(context_pt_truncado):
         print("⚠️ O contexto recuperado é genérico ou contém ruído.")
 
-    # Traduzir para EN
+    # Contexto EN: traduções guardadas na indexação (metadata "texto_en").
+    # Só chunks de índices antigos, sem tradução guardada, passam pelo MarianMT.
     try:
-        context_en = traduzir(context_pt_truncado, origem="pt", destino="en")
-        context_en = truncate_by_tokens(context_en, MAX_PROMPT_TOKENS, tokenizer)
+        textos_en = [doc.metadata.get("texto_en", "") for doc in selected_docs]
+        em_falta = [i for i, texto_en in enumerate(textos_en) if not texto_en]
+        if em_falta:
+            traducoes = traduzir_lote([selected_chunks[i] for i in em_falta], origem="pt", destino="en")
+            for i, traducao in zip(em_falta, traducoes):
+                textos_en[i] = traducao
+        context_en = truncate_by_tokens("\n\n".join(textos_en), MAX_PROMPT_TOKENS, tokenizer)
         debug_ctx["context_en"] = context_en
     except Exception as erro_ctx:
         print("⚠️ Erro ao traduzir o contexto para EN:", erro_ctx)
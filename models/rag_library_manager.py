@@ -3,13 +3,18 @@ import hashlib
 import json
 import logging
 import re
-from transformers import AutoTokenizer
-from config import MAX_PROMPT_TOKENS
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, PyPDFLoader
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from config import MAX_PROMPT_TOKENS, INDEX_BATCH_SIZE, INDEX_WORKERS, INDEX_PUBLICAR_BATCHES
 from config import CHROMA_PATH, EMBEDDING_MODEL, DOCUMENTS_PATH, CHUNK_SIZE, CHUNK_OVERLAP
+from models.rag_engine import limpar_ruido_contexto, marcar_indice_atualizado
+from models.rag_engine import invalidar_chroma_db, limpar_cache_chromadb
+from models.tradutor_local import traduzir_lote
+from models.cache_embeddings import CacheEmbeddings
+from models.bm25_index import BM25Index, BM25_FILE
 
+os.makedirs("logs", exist_ok=True)
 logging.basicConfig(filename="logs/rag_library_manager.log", level=logging.INFO)
 
 def split_by_semantic_patterns(text):
@@ -27,6 +32,10 @@ def split_by_semantic_patterns(text):
     # Garante que não tenta fazer strip em None
     return [c.strip() for c in re.split(pattern, text, flags=re.MULTILINE) if c and isinstance(c, str) and c.strip()]
 
+def chunk_hash(text):
+    """Hash do conteúdo normalizado (espaços) de um chunk; serve também de ID na Chroma."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
 def is_informative_chunk(text):
     """
     Heurística para filtrar chunks inúteis antes de indexar.
@@ -59,73 +68,313 @@ class RAGLibraryManager:
                  chroma_path=CHROMA_PATH,
                  embedding_model=EMBEDDING_MODEL,
                  chunk_size=CHUNK_SIZE,
-                 chunk_overlap=CHUNK_OVERLAP):
+                 chunk_overlap=CHUNK_OVERLAP,
+                 batch_size=INDEX_BATCH_SIZE,
+                 workers=INDEX_WORKERS,
+                 publicar_batches=INDEX_PUBLICAR_BATCHES):
         self.documents_path = documents_path
         self.chroma_path = chroma_path
         self.embedding_model = embedding_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
-        self.tokenizer = AutoTokenizer.from_pretrained(self.embedding_model)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.publicar_batches = publicar_batches
+        self._embeddings = None
+        self._tokenizer = None
+        self._embedding_cache = None
+        self._bm25 = None
+        self._vetores_batch = _EmbeddingsPreCalculados(self)
         self.max_tokens_per_chunk = MAX_PROMPT_TOKENS
         self.chunks_indexed_path = os.path.join(self.chroma_path, "indexed_docs.json")
         os.makedirs(self.chroma_path, exist_ok=True)
 
+    @property
+    def embeddings(self):
+        """Modelo de embeddings, carregado só quando é preciso indexar."""
+        if self._embeddings is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            self._embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+        return self._embeddings
+
+    @property
+    def embedding_cache(self):
+        """Cache persistente de embeddings por (modelo, hash do chunk)."""
+        if self._embedding_cache is None:
+            self._embedding_cache = CacheEmbeddings(self.embedding_model)
+        return self._embedding_cache
+
+    @property
+    def bm25(self):
+        """Índice lexical BM25, guardado ao lado da ChromaDB (mesmos IDs)."""
+        if self._bm25 is None:
+            self._bm25 = BM25Index(os.path.join(self.chroma_path, BM25_FILE))
+        return self._bm25
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.embedding_model)
+        return self._tokenizer
+
     def build(self, force_rebuild=False, progress_callback=None):
-        """Cria ou reconstrói a base vetorial."""
+        """Cria ou reconstrói a base vetorial (em streaming, ficheiro a ficheiro)."""
         if force_rebuild:
             self.clear_chroma()
             logging.info("ChromaDB limpa para rebuild total.")
 
-        all_docs = self._load_documents()
-        if not all_docs:
+        prev_index = self._load_indexed_docs()
+        paths = self._list_files()
+        if not paths:
             logging.warning("Nenhum documento encontrado para indexar.")
             return
 
-        chunks = self._split_and_clean(all_docs)
-        unique_chunks = self._deduplicate_chunks(chunks)
-        self._index_chunks(unique_chunks, progress_callback=progress_callback)
-        self._save_indexed_docs(all_docs)
-        logging.info("Build/Rebuild finalizado com %d chunks únicos.", len(unique_chunks))
+        # Sem force_rebuild, chunks repetidos são substituídos (upsert pelo ID);
+        # no fim removem-se os que já não pertencem a nenhum ficheiro.
+        self._delete_legacy_chunks(prev_index)
+        file_index = {}
+        chunks = self._stream_chunks(paths, file_index, progress_callback=progress_callback)
+        total = self._index_chunks(chunks)
+        self._delete_stale_chunks(prev_index, file_index)
+        self.bm25.save()
+        self._save_indexed_docs(file_index)
+        marcar_indice_atualizado(self.chroma_path)
+        logging.info("Build/Rebuild finalizado com %d chunks únicos.", total)
 
     def update(self, progress_callback=None):
-        """Update incremental: só indexa documentos novos ou alterados."""
+        """
+        Update incremental: só indexa ficheiros novos ou alterados.
+        - Ficheiros com mtime/tamanho iguais nem são lidos; se só o mtime mudou,
+          compara o hash dos bytes antes de fazer parsing.
+        - Os chunks antigos de ficheiros alterados ou removidos são apagados.
+        - Chunks já indexados por outros ficheiros não são duplicados.
+        """
         prev_index = self._load_indexed_docs()
-        all_docs = self._load_documents()
-        new_or_modified = [doc for doc in all_docs if self._needs_update(doc, prev_index)]
-        if not new_or_modified:
+        paths = self._list_files()
+        file_index = {}
+        changed = []
+        for path in paths:
+            prev = prev_index.get(path)
+            # Ficheiro novo (sem entrada no índice) conta sempre como alterado
+            state = None if prev is None else self._file_state(path, prev)
+            if state is None:
+                changed.append(path)
+            else:
+                file_index[path] = state
+
+        removed = [path for path in prev_index if path not in paths]
+        if not changed and not removed:
+            self._save_indexed_docs(file_index)
             logging.info("Nenhum documento novo ou alterado para indexar.")
             return
 
-        chunks = self._split_and_clean(new_or_modified)
-        unique_chunks = self._deduplicate_chunks(chunks)
-        self._index_chunks(unique_chunks, progress_callback=progress_callback)
-        self._save_indexed_docs(all_docs)
-        logging.info("Update incremental finalizado com %d novos chunks.", len(unique_chunks))
+        # Chunks dos ficheiros inalterados contam como já vistos
+        seen = {h for entry in file_index.values() for h in entry.get("chunks", [])}
+        self._delete_legacy_chunks(prev_index)
+        chunks = self._stream_chunks(changed, file_index, progress_callback=progress_callback, seen=seen)
+        total = self._index_chunks(chunks)
+        self._delete_stale_chunks(prev_index, file_index)
+        self.bm25.save()
+        self._save_indexed_docs(file_index)
+        marcar_indice_atualizado(self.chroma_path)
+        logging.info("Update incremental: %d ficheiros alterados, %d removidos, %d novos chunks.",
+                     len(changed), len(removed), total)
 
-    def _index_chunks(self, chunks, progress_callback=None):
-        if not chunks:
-            logging.info("Nenhum chunk para indexar.")
+    def _iter_files(self, paths):
+        """
+        Gera (path, docs, chunks) por ficheiro, pela ordem de `paths`.
+        Com workers > 1 usa um ProcessPoolExecutor (um ficheiro por tarefa),
+        com no máximo 2 * workers ficheiros em curso para limitar a memória.
+        """
+        if self.workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     initializer=_init_worker,
+                                     initargs=(self.embedding_model, self.max_tokens_per_chunk)) as pool:
+                in_flight = deque()
+                for path in paths:
+                    in_flight.append((path, pool.submit(_load_and_split_file, path)))
+                    if len(in_flight) >= 2 * self.workers:
+                        path_done, future = in_flight.popleft()
+                        yield (path_done, *future.result())
+                while in_flight:
+                    path_done, future = in_flight.popleft()
+                    yield (path_done, *future.result())
+        else:
+            for path in paths:
+                docs = self._load_file(path)
+                yield path, docs, self._split_and_clean(docs)
+
+    def _stream_chunks(self, paths, file_index, progress_callback=None, seen=None):
+        """
+        Gera os chunks únicos, ficheiro a ficheiro (load ➜ split ➜ dedup).
+        Preenche `file_index` com o estado de cada ficheiro e os hashes dos seus chunks.
+        Só os hashes dos chunks ficam em memória entre ficheiros.
+        """
+        seen = set() if seen is None else seen
+        for n, (path, docs, chunks) in enumerate(self._iter_files(paths), 1):
+            hashes = [chunk_hash(chunk.page_content) for chunk in chunks if chunk.page_content]
+            file_index[path] = {**self._file_state(path), "chunks": list(dict.fromkeys(hashes))}
+            yield from self._deduplicate_chunks(chunks, seen)
+            self._report_progress(progress_callback, n, len(paths))
+
+    def _delete_legacy_chunks(self, prev_index):
+        """Índices antigos (IDs aleatórios, sem lista de chunks): apaga os chunks pela fonte."""
+        legacy_sources = [path for path, entry in prev_index.items() if "chunks" not in entry]
+        if not legacy_sources:
             return
-        db = Chroma(persist_directory=self.chroma_path, embedding_function=self.embeddings)
-        total = len(chunks)
-        for idx, chunk in enumerate(chunks, 1):
-            db.add_documents([chunk])
-            # Safe callback para progress bar (Tkinter deve receber via .after())
-            if progress_callback:
-                try:
-                    progress_callback(idx, total)
-                except Exception as exc:
-                    logging.warning(f"Erro no progress_callback: {exc}")
+        db = self._open_db()
+        for path in legacy_sources:
+            db.delete(where={"source": path})
+        logging.info("Removidos chunks de %d ficheiros do índice antigo.", len(legacy_sources))
+
+    def _delete_stale_chunks(self, prev_index, file_index):
+        """Apaga os chunks indexados antes que já não pertencem a nenhum ficheiro atual."""
+        current = {h for entry in file_index.values() for h in entry.get("chunks", [])}
+        stale_ids = sorted({h for entry in prev_index.values() for h in entry.get("chunks", [])} - current)
+        if not stale_ids:
+            return
+        db = self._open_db()
+        for i in range(0, len(stale_ids), self.batch_size):
+            db.delete(ids=stale_ids[i:i + self.batch_size])
+        self.bm25.remove(stale_ids)
+        logging.info("Removidos %d chunks de versões antigas.", len(stale_ids))
+
+    def _open_db(self):
+        # A embedding_function devolve os vetores já calculados do batch em escrita:
+        # o modelo nem é carregado quando tudo vem da cache.
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory=self.chroma_path, embedding_function=self._vetores_batch)
+
+    def _index_chunks(self, chunks):
+        """
+        Indexa chunks (lista ou gerador) em batches de `batch_size`.
+        Os embeddings de um batch são calculados numa thread de fundo enquanto
+        o batch anterior é escrito na Chroma: no máximo dois batches em memória.
+        A cada INDEX_PUBLICAR_BATCHES batches o BM25 é gravado e o índice marcado
+        como atualizado, para os chunks já escritos ficarem pesquisáveis durante
+        a ingestão (o build/update volta a marcar no fim).
+        Returns: número de chunks indexados.
+        """
+        db = None
+        total = 0
+        n_batches = 0
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = None
+            for batch in self._batches(chunks):
+                if db is None:
+                    db = self._open_db()
+                self._annotate_chunks(batch)
+                future = pool.submit(self._embed_batch, batch)
+                if pending:
+                    total += self._write_batch(db, *pending)
+                    n_batches += 1
+                    if n_batches % self.publicar_batches == 0:
+                        self._publicar_parcial()
+                pending = (batch, future)
+            if pending:
+                total += self._write_batch(db, *pending)
+                n_batches += 1
+
+        if db is None:
+            logging.info("Nenhum chunk para indexar.")
+            return 0
         db.persist()
-        logging.info("Indexação finalizada com sucesso.")
+        logging.info("Indexação finalizada com sucesso (%d chunks em %d batches).", total, n_batches)
+        return total
+
+    def _publicar_parcial(self):
+        """Torna visíveis aos leitores (servidor, outros processos) os batches já escritos."""
+        self.bm25.save()
+        marcar_indice_atualizado(self.chroma_path)
+
+    def _batches(self, chunks):
+        iterator = iter(chunks)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _write_batch(self, db, batch, future):
+        # IDs endereçados pelo conteúdo: reindexar o mesmo chunk substitui-o
+        ids = [chunk_hash(chunk.page_content) for chunk in batch]
+        self._vetores_batch.vetores = dict(zip(ids, future.result()))
+        db.add_texts(
+            [chunk.page_content for chunk in batch],
+            metadatas=[chunk.metadata for chunk in batch],
+            ids=ids
+        )
+        self._vetores_batch.vetores = {}
+        for chunk_id, chunk in zip(ids, batch):
+            self.bm25.add(chunk_id, chunk.page_content)
+        return len(batch)
 
-    def _load_documents(self):
-        txt_loader = DirectoryLoader(self.documents_path, glob="**/*.txt", loader_cls=TextLoader)
-        pdf_loader = DirectoryLoader(self.documents_path, glob="**/*.pdf", loader_cls=PyPDFLoader)
-        docs = txt_loader.load() + pdf_loader.load()
-        valid_docs = [doc for doc in docs if self._is_valid_document(doc)]
-        return valid_docs
+    def _embed_batch(self, batch):
+        """Embeddings de um batch; o modelo só corre para chunks que não estão na cache."""
+        hashes = [chunk_hash(chunk.page_content) for chunk in batch]
+        cached = self.embedding_cache.get_many(hashes)
+        missing = [i for i, h in enumerate(hashes) if h not in cached]
+        if missing:
+            vectors = self.embeddings.embed_documents([batch[i].page_content for i in missing])
+            self.embedding_cache.add_many([hashes[i] for i in missing], vectors)
+            cached.update(zip((hashes[i] for i in missing), vectors))
+        return [cached[h] for h in hashes]
+
+    @staticmethod
+    def _report_progress(progress_callback, current, total):
+        # Safe callback para progress bar (Tkinter deve receber via .after())
+        if progress_callback:
+            try:
+                progress_callback(current, total)
+            except Exception as exc:
+                logging.warning(f"Erro no progress_callback: {exc}")
+
+    def _annotate_chunks(self, chunks):
+        """
+        Pré-calcula, uma vez por chunk, tudo o que o retrieve_context precisa:
+        - metadata["texto_limpo"]: texto sem ruído (limpar_ruido_contexto)
+        - metadata["n_tokens"]: nº de tokens do chunk (tokenizer de embeddings)
+        - metadata["hash_norm"]: hash do texto normalizado (deteção de duplicados)
+        - metadata["texto_en"]: tradução EN do texto limpo
+        """
+        textos_limpos = [limpar_ruido_contexto(chunk.page_content) for chunk in chunks]
+        for chunk, texto_limpo in zip(chunks, textos_limpos):
+            # Cópia: os chunks do mesmo documento partilham o dicionário de metadata
+            chunk.metadata = {
+                **chunk.metadata,
+                "texto_limpo": texto_limpo,
+                "n_tokens": len(self.tokenizer.encode(chunk.page_content, add_special_tokens=False)),
+                "hash_norm": chunk_hash(chunk.page_content)
+            }
+        try:
+            # Cada chunk só é traduzido uma vez (fica na metadata): sem passar pela cache
+            textos_en = traduzir_lote(textos_limpos, origem="pt", destino="en", usar_cache=False)
+        except Exception as exc:
+            logging.warning(f"Erro ao traduzir chunks na indexação: {exc}")
+            return
+        for chunk, texto_en in zip(chunks, textos_en):
+            chunk.metadata["texto_en"] = texto_en
+        logging.info("Traduzidos %d chunks para EN.", len(chunks))
+
+    def _list_files(self):
+        """Ficheiros .txt e .pdf da biblioteca, por ordem estável (chunks sempre na mesma ordem)."""
+        files = []
+        for root, _, names in os.walk(self.documents_path):
+            for name in names:
+                if name.lower().endswith((".txt", ".pdf")):
+                    files.append(os.path.join(root, name))
+        return sorted(files)
+
+    def _load_file(self, path):
+        from langchain_community.document_loaders import TextLoader, PyPDFLoader
+        loader_cls = PyPDFLoader if path.lower().endswith(".pdf") else TextLoader
+        try:
+            docs = loader_cls(path).load()
+        except Exception as exc:
+            logging.warning(f"Erro ao carregar {path}: {exc}")
+            return []
+        return [doc for doc in docs if self._is_valid_document(doc)]
 
     def _split_and_clean(self, docs):
         from langchain.schema import Document
@@ -170,14 +419,15 @@ class RAGLibraryManager:
         return refined_chunks
 
     @staticmethod
-    def _deduplicate_chunks(chunks):
-        seen = set()
+    def _deduplicate_chunks(chunks, seen=None):
+        # `seen` permite deduplicar entre ficheiros processados em streaming
+        seen = set() if seen is None else seen
         unique = []
         for chunk in chunks:
             content = getattr(chunk, "page_content", "")
             if not content or not isinstance(content, str):
                 continue
-            h = hashlib.sha256(content.strip().encode("utf-8")).hexdigest()
+            h = chunk_hash(content)
             if h not in seen:
                 seen.add(h)
                 unique.append(chunk)
@@ -201,27 +451,26 @@ class RAGLibraryManager:
         return hasattr(doc, "page_content") and len(doc.page_content.strip()) > 50
 
     @staticmethod
-    def _needs_update(doc, prev_index):
-        # Doc hash ou modificação de timestamp
-        meta = getattr(doc, "metadata", {})
-        path = meta.get("source", "")
-        if not path:
-            return True
+    def _file_state(path, prev=None):
+        """
+        Estado de um ficheiro no índice (mtime, tamanho, hash dos bytes).
+        Com `prev`, devolve o estado atualizado se o ficheiro não mudou
+        ou None se mudou (o hash só é calculado quando o mtime/tamanho diferem).
+        Entradas sem lista de chunks (índice antigo) contam sempre como alteradas.
+        """
         stat = os.stat(path)
-        doc_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
-        prev = prev_index.get(path, {})
-        return prev.get("hash") != doc_hash or prev.get("mtime") != stat.st_mtime
+        if prev and "chunks" in prev and prev.get("mtime") == stat.st_mtime and prev.get("size") == stat.st_size:
+            return prev
+        with open(path, "rb") as f:
+            file_hash = hashlib.sha256(f.read()).hexdigest()
+        state = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": file_hash}
+        if prev is None:
+            return state
+        if prev.get("hash") == file_hash and "chunks" in prev:
+            return {**state, "chunks": prev["chunks"]}
+        return None
 
-    def _save_indexed_docs(self, docs):
-        index = {}
-        for doc in docs:
-            meta = getattr(doc, "metadata", {})
-            path = meta.get("source", "")
-            if not path:
-                continue
-            stat = os.stat(path)
-            doc_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
-            index[path] = {"hash": doc_hash, "mtime": stat.st_mtime}
+    def _save_indexed_docs(self, index):
         with open(self.chunks_indexed_path, "w", encoding="utf-8") as f:
             json.dump(index, f, indent=2)
 
@@ -236,3 +485,40 @@ class RAGLibraryManager:
         if os.path.exists(self.chroma_path):
             shutil.rmtree(self.chroma_path)
             os.makedirs(self.chroma_path, exist_ok=True)
+        self._bm25 = None
+        # O cliente chromadb em cache ainda aponta para a pasta apagada
+        invalidar_chroma_db()
+        limpar_cache_chromadb()
+
+
+class _EmbeddingsPreCalculados:
+    """
+    embedding_function da Chroma do manager: os vetores de cada batch já foram
+    calculados (ou lidos da cache) por _embed_batch e são só devolvidos pelo hash.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.vetores = {}
+
+    def embed_documents(self, texts):
+        return [self.vetores[chunk_hash(text)] for text in texts]
+
+    def embed_query(self, text):
+        return self.manager.embeddings.embed_query(text)
+
+
+# === Workers do ProcessPoolExecutor (load + split de um ficheiro por tarefa) ===
+_worker_manager = None
+
+
+def _init_worker(embedding_model, max_tokens_per_chunk):
+    # Cada processo cria o seu manager (e tokenizer) uma única vez
+    global _worker_manager
+    _worker_manager = RAGLibraryManager(embedding_model=embedding_model, workers=1)
+    _worker_manager.max_tokens_per_chunk = max_tokens_per_chunk
+
+
+def _load_and_split_file(path):
+    docs = _worker_manager._load_file(path)
+    return docs, _worker_manager._split_and_clean(docs)
@@ -3,12 +3,107 @@
 # ============================================================
 # Objetivo:
 # 🔹 Tradução automática local entre Português e Inglês (PT ⇄ EN)
-# 🔹 Utiliza modelos MarianMT da HuggingFace, carregados via config.py
+# 🔹 Utiliza modelos MarianMT da HuggingFace, definidos em config.py
+# 🔹 Os modelos só são carregados na primeira tradução (get_tradutor)
 # 🔹 Evita dependência de APIs externas, garantindo privacidade e performance
 # 🔹 Fornece funções específicas e genéricas para tradução unidirecional e bidirecional
+# 🔹 Tradução em lote (traduzir_lote) por frases, em batches com padding
+# 🔹 Cache persistente (cache_traducao.py): traduções repetidas não passam pelo MarianMT
+# 🔹 Modo opcional int8 (TRADUCAO_QUANTIZADA): quantização dinâmica para CPU,
+#     com os pesos quantizados guardados em disco para arranques rápidos
 # ============================================================
 
-from config import TRADUTOR_MODELOS
+import os
+import re
+import threading
+from config import TRADUTOR_MODELOS, TRADUCAO_BATCH_SIZE, TRADUCAO_CACHE_ATIVA
+from config import TRADUCAO_QUANTIZADA, TRADUCAO_QUANTIZADA_PATH
+from models.cache_traducao import get_cache_traducao
+
+# Tradutores já carregados, por direção ("pt-en" / "en-pt")
+_tradutores = {}
+_tradutores_lock = threading.Lock()
+
+
+# === Carregamento sob demanda ===
+
+def get_tradutor(direcao: str) -> dict:
+    """
+    Devolve o tokenizer e o modelo MarianMT de uma direção, carregando-os no primeiro uso.
+
+    Args:
+        direcao (str): Chave de TRADUTOR_MODELOS ('pt-en' ou 'en-pt').
+
+    Returns:
+        dict: {"tokenizer": MarianTokenizer, "model": MarianMTModel}
+    """
+    if direcao not in _tradutores:
+        with _tradutores_lock:
+            if direcao not in _tradutores:
+                _tradutores[direcao] = carregar_tradutor(direcao, quantizado=TRADUCAO_QUANTIZADA)
+    return _tradutores[direcao]
+
+
+def modelo_id(direcao: str) -> str:
+    """Identificador do modelo em uso (distingue fp32 de int8 na cache de traduções)."""
+    return TRADUTOR_MODELOS[direcao] + (":int8" if TRADUCAO_QUANTIZADA else "")
+
+
+def carregar_tradutor(direcao: str, quantizado: bool = False) -> dict:
+    """
+    Carrega o tokenizer e o modelo MarianMT de uma direção (sem partilhar instâncias).
+
+    Args:
+        direcao (str): Chave de TRADUTOR_MODELOS ('pt-en' ou 'en-pt').
+        quantizado (bool): Se True, usa a versão int8 com quantização dinâmica.
+
+    Returns:
+        dict: {"tokenizer": MarianTokenizer, "model": MarianMTModel}
+    """
+    from transformers import MarianMTModel, MarianTokenizer
+    nome_modelo = TRADUTOR_MODELOS[direcao]
+    model = _carregar_modelo_int8(nome_modelo) if quantizado else MarianMTModel.from_pretrained(nome_modelo)
+    return {
+        "tokenizer": MarianTokenizer.from_pretrained(nome_modelo),
+        "model": model
+    }
+
+
+def _carregar_modelo_int8(nome_modelo: str):
+    """
+    Modelo MarianMT com as camadas Linear quantizadas para int8 (torch dynamic quantization).
+    O state_dict quantizado fica em TRADUCAO_QUANTIZADA_PATH: nos arranques seguintes
+    o modelo é criado a partir da configuração, sem carregar os pesos fp32.
+    Um ficheiro ilegível (corrompido, versão incompatível) é apagado e gerado de novo.
+    """
+    import torch
+    from transformers import GenerationConfig, MarianConfig, MarianMTModel
+
+    nome_ficheiro = re.sub(r"[^\w.-]", "_", nome_modelo) + f"-int8-torch{torch.__version__}.pt"
+    caminho = os.path.join(TRADUCAO_QUANTIZADA_PATH, nome_ficheiro)
+
+    if os.path.exists(caminho):
+        try:
+            model = MarianMTModel(MarianConfig.from_pretrained(nome_modelo))
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.load_state_dict(torch.load(caminho, map_location="cpu", weights_only=True))
+        except Exception as erro:
+            print(f"⚠️ Cache int8 inválida ({caminho}): {erro}. A gerar de novo.")
+            os.remove(caminho)
+        else:
+            # Criado só a partir da configuração: os parâmetros de geração do modelo
+            # (num_beams, max_length, bad_words_ids...) têm de ser lidos à parte
+            model.generation_config = GenerationConfig.from_pretrained(nome_modelo)
+            model.eval()
+            return model
+
+    model = MarianMTModel.from_pretrained(nome_modelo)
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    os.makedirs(TRADUCAO_QUANTIZADA_PATH, exist_ok=True)
+    torch.save(model.state_dict(), caminho + ".tmp")
+    os.replace(caminho + ".tmp", caminho)
+    model.eval()
+    return model
 
 
 # === Funções de Tradução ===
@@ -23,8 +118,9 @@ def traduzir_pt_para_en(texto: str) -> str:
     Returns:
         str: Tradução em inglês.
     """
-    tokenizer = TRADUTOR_MODELOS["pt-en"]["tokenizer"]
-    model = TRADUTOR_MODELOS["pt-en"]["model"]
+    tradutor = get_tradutor("pt-en")
+    tokenizer = tradutor["tokenizer"]
+    model = tradutor["model"]
     inputs = tokenizer([texto], return_tensors="pt", padding=True)
     translated = model.generate(**inputs)
     return tokenizer.decode(translated[0], skip_special_tokens=True)
@@ -40,8 +136,9 @@ def traduzir_en_para_pt(texto: str) -> str:
     Returns:
         str: Tradução em português.
     """
-    tokenizer = TRADUTOR_MODELOS["en-pt"]["tokenizer"]
-    model = TRADUTOR_MODELOS["en-pt"]["model"]
+    tradutor = get_tradutor("en-pt")
+    tokenizer = tradutor["tokenizer"]
+    model = tradutor["model"]
     inputs = tokenizer([texto], return_tensors="pt", padding=True)
     translated = model.generate(**inputs)
     return tokenizer.decode(translated[0], skip_special_tokens=True)
@@ -63,8 +160,141 @@ def traduzir(texto: str, origem: str = "pt", destino: str = "en") -> str:
         ValueError: Se a combinação de idiomas for inválida.
     """
     if origem == "pt" and destino == "en":
-        return traduzir_pt_para_en(texto)
+        funcao = traduzir_pt_para_en
     elif origem == "en" and destino == "pt":
-        return traduzir_en_para_pt(texto)
+        funcao = traduzir_en_para_pt
     else:
         raise ValueError(f"Tradução não suportada: '{origem}' -> '{destino}'. Use 'pt' ou 'en'.")
+
+    if not TRADUCAO_CACHE_ATIVA:
+        return funcao(texto)
+
+    direcao = f"{origem}-{destino}"
+    cache = get_cache_traducao()
+    traducao = cache.get(direcao, modelo_id(direcao), texto)
+    if traducao is None:
+        traducao = funcao(texto)
+        cache.set(direcao, modelo_id(direcao), texto, traducao)
+    return traducao
+
+
+# === Tradução em Lote ===
+
+# Fim de frase: pontuação final seguida de espaço
+_FIM_DE_FRASE = re.compile(r"(?<=[.!?;])\s+")
+
+
+class PerguntaTraduzida:
+    """
+    Pergunta do utilizador em PT com a tradução EN feita uma única vez.
+    O mesmo objeto passa pelo RAG (pesquisa/reranking) e pelo prompt do Velvet.
+    """
+
+    def __init__(self, texto_pt: str):
+        self.pt = texto_pt
+        self._en = None
+
+    @property
+    def en(self) -> str:
+        if self._en is None:
+            try:
+                self._en = traduzir(self.pt, origem="pt", destino="en")
+            except Exception as erro:
+                print("❌ Erro ao traduzir a pergunta:", erro)
+                self._en = self.pt
+        return self._en
+
+    def __str__(self):
+        return self.pt
+
+
+def dividir_em_frases(texto: str) -> list[list[str]]:
+    """
+    Divide um texto em parágrafos (linhas vazias) e cada parágrafo em frases.
+
+    Args:
+        texto (str): Texto a segmentar.
+
+    Returns:
+        list[list[str]]: Lista de parágrafos, cada um com a sua lista de frases.
+    """
+    paragrafos = []
+    for paragrafo in re.split(r"\n\s*\n", texto or ""):
+        frases = [f.strip() for f in _FIM_DE_FRASE.split(paragrafo.replace("\n", " ")) if f.strip()]
+        if frases:
+            paragrafos.append(frases)
+    return paragrafos
+
+
+def traduzir_lote(textos: list[str], origem: str = "pt", destino: str = "en",
+                  batch_size: int = TRADUCAO_BATCH_SIZE, usar_cache: bool = True) -> list[str]:
+    """
+    Traduz vários textos de uma vez, frase a frase, em poucos batches.
+
+    As frases de todos os textos são ordenadas por comprimento e agrupadas
+    em batches com padding (menos desperdício por batch), traduzidas com uma
+    chamada a `model.generate` por batch e depois repostas na ordem original.
+    Evita o truncamento silencioso do MarianMT em contextos longos.
+    Cada frase é procurada primeiro na cache de traduções (exceto com usar_cache=False).
+
+    Args:
+        textos (list[str]): Textos a traduzir.
+        origem (str): Código do idioma de origem ('pt' ou 'en').
+        destino (str): Código do idioma de destino ('pt' ou 'en').
+        batch_size (int): Número máximo de frases por chamada a `generate`.
+        usar_cache (bool): False para traduções feitas uma só vez (ex: chunks na
+            indexação), que encheriam a cache e expulsariam as traduções de runtime.
+
+    Returns:
+        list[str]: Traduções, pela mesma ordem de `textos` (parágrafos preservados).
+
+    Raises:
+        ValueError: Se a combinação de idiomas for inválida.
+    """
+    direcao = f"{origem}-{destino}"
+    if direcao not in TRADUTOR_MODELOS:
+        raise ValueError(f"Tradução não suportada: '{origem}' -> '{destino}'. Use 'pt' ou 'en'.")
+
+    # 1. Segmenta: cada frase guarda (texto, parágrafo) a que pertence
+    segmentos = []
+    for i, texto in enumerate(textos):
+        for p, frases in enumerate(dividir_em_frases(texto)):
+            for frase in frases:
+                segmentos.append((i, p, frase))
+    if not segmentos:
+        return ["" for _ in textos]
+
+    # 2. Frases já traduzidas vêm da cache; só as restantes vão ao MarianMT
+    modelo = modelo_id(direcao)
+    cache = get_cache_traducao() if TRADUCAO_CACHE_ATIVA and usar_cache else None
+    traducoes = [""] * len(segmentos)
+    pendentes = []
+    for j, (_, _, frase) in enumerate(segmentos):
+        em_cache = cache.get(direcao, modelo, frase) if cache else None
+        if em_cache is None:
+            pendentes.append(j)
+        else:
+            traducoes[j] = em_cache
+
+    # 3. Traduz por batches de frases com comprimento semelhante
+    if pendentes:
+        tradutor = get_tradutor(direcao)
+        tokenizer = tradutor["tokenizer"]
+        model = tradutor["model"]
+        ordem = sorted(pendentes, key=lambda j: len(segmentos[j][2]))
+        for inicio in range(0, len(ordem), batch_size):
+            indices = ordem[inicio:inicio + batch_size]
+            inputs = tokenizer([segmentos[j][2] for j in indices], return_tensors="pt",
+                               padding=True, truncation=True)
+            translated = model.generate(**inputs)
+            for j, traducao in zip(indices, tokenizer.batch_decode(translated, skip_special_tokens=True)):
+                traducoes[j] = traducao.strip()
+                if cache:
+                    cache.set(direcao, modelo, segmentos[j][2], traducoes[j])
+
+    # 4. Reagrupa frases em parágrafos e parágrafos em textos
+    resultado = [{} for _ in textos]
+    for (i, p, _), traducao in zip(segmentos, traducoes):
+        resultado[i].setdefault(p, []).append(traducao)
+    return ["\n\n".join(" ".join(frases) for _, frases in sorted(paragrafos.items()))
+            for paragrafos in resultado]
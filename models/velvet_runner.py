@@ -2,20 +2,28 @@
 # velvet_runner.py - Duarte Grilo 2201320 - Projeto Informático
 # ============================================================
 # Este módulo é responsável por:
-# 🔹 Carregar o modelo de linguagem Velvet (HF)
-# 🔹 Gerar respostas traduzidas (PT ➜ EN ➜ PT)
+# 🔹 Carregar o modelo de linguagem Velvet (HF) com o perfil de execução da máquina
+# 🔹 Gerar respostas a partir de prompts em EN (ou PT, com tradução)
+# 🔹 Gerar respostas em streaming, frase a frase já traduzida para PT
+# 🔹 Pedidos concorrentes agrupados em lotes (agendador_lotes.py)
+# 🔹 KV-cache dos contextos RAG repetidos (cache_prefixos.py)
 # 🔹 Validar respostas por palavras-chave
 # 🔹 Guardar as respostas geradas:
-#     - Num ficheiro de histórico (`velvet_respostas.json`)
+#     - Num ficheiro de histórico (`velvet_respostas.jsonl`, só acrescenta)
 #     - Num ficheiro temporário com a última resposta (`velvet_ultima_resposta.json`)
 # ============================================================
 
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-from config import VELVET_MODEL, HF_TOKEN, VELVET_PARAMS
+from config import VELVET_MODEL, HF_TOKEN, VELVET_PARAMS, VELVET_BATCH_MAX, VELVET_BATCH_JANELA, VELVET_KV_CACHE_MB
 import json
 import os
+import re
+import threading
 from pathlib import Path
-from models.tradutor_local import traduzir_pt_para_en, traduzir_en_para_pt
+from models.tradutor_local import traduzir_lote
+from models.historico import registar_interacao, HISTORICO_FILE
+from models.agendador_lotes import AgendadorLotes
+from models.cache_prefixos import CachePrefixos
+from models.perfil_execucao import detetar_perfil, configurar_threads, preparar_modelo, relatorio_perfil
 
 # ============================================================
 # 🔧 Carregamento do modelo Velvet-2B a partir do HuggingFace
@@ -23,44 +31,122 @@ from models.tradutor_local import traduzir_pt_para_en, traduzir_en_para_pt
 
 
 def load_model():
+    from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+
+    # Dispositivo, precisão, threads, int8 e compile (VELVET_* em config.py)
+    perfil = detetar_perfil()
+    configurar_threads(perfil)
+
     # Tokenizer e modelo definidos no config.py
     tokenizer = AutoTokenizer.from_pretrained(VELVET_MODEL, token=HF_TOKEN)
-    model = AutoModelForCausalLM.from_pretrained(VELVET_MODEL, token=HF_TOKEN)
+    # Geração em lote (agendador_lotes.py): padding à esquerda, o texto novo começa logo a seguir ao prompt
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    model = AutoModelForCausalLM.from_pretrained(VELVET_MODEL, token=HF_TOKEN, torch_dtype=perfil["dtype"])
+    model = preparar_modelo(model, perfil)
+    print(relatorio_perfil(perfil))
 
     # Cria um pipeline de geração de texto com os parâmetros definidos
     return pipeline(
         "text-generation",
         model=model,
         tokenizer=tokenizer,
-        device=0,  # Usa GPU (0) se disponível; CPU (-1) se não
+        device=perfil["dispositivo"],
         **VELVET_PARAMS  # Ex: max_new_tokens, temperature, top_k, etc.
     )
 
 
-# Inicialização do pipeline ao carregar o módulo
-model_generator = load_model()
+# Pipeline criado só na primeira geração (import do módulo fica leve)
+_model_generator = None
+_model_lock = threading.Lock()
+
+
+def get_model_generator():
+    global _model_generator
+    if _model_generator is None:
+        with _model_lock:
+            if _model_generator is None:
+                _model_generator = load_model()
+    return _model_generator
+
+
+# Agendador que junta pedidos concorrentes num só generate (thread criada no 1º uso)
+_agendador = None
+
+
+def get_agendador() -> AgendadorLotes:
+    global _agendador
+    if _agendador is None:
+        with _model_lock:
+            if _agendador is None:
+                cache = CachePrefixos(VELVET_KV_CACHE_MB) if VELVET_KV_CACHE_MB > 0 else None
+                _agendador = AgendadorLotes(get_model_generator, VELVET_PARAMS,
+                                            janela=VELVET_BATCH_JANELA, max_lote=VELVET_BATCH_MAX,
+                                            cache_prefixos=cache)
+    return _agendador
 
 # ============================================================
 # 🧠 Geração de resposta traduzida com Velvet
 # ============================================================
 
 
-def generate_response(prompt: str) -> str:
-    # Traduz o prompt do utilizador para inglês
-    prompt_en = traduzir_pt_para_en(prompt)
+def generate_response(prompt: str, lang: str = "en") -> str:
+    """
+    Gera a continuação do prompt com o Velvet.
+
+    Args:
+        prompt (str): Prompt completo.
+        lang (str): Idioma do prompt e da resposta devolvida.
+            "en" ➜ nenhuma tradução (o chamador já tem o prompt em inglês).
+            "pt" ➜ prompt traduzido PT ➜ EN e resposta EN ➜ PT.
+    """
+    prompt_en = traduzir_lote([prompt], origem="pt", destino="en")[0] if lang == "pt" else prompt
+
+    # Gera resposta com Velvet (em lote com outros pedidos que cheguem ao mesmo tempo)
+    resposta_en = get_agendador().submeter(prompt_en).esperar().strip()
+    if lang == "en":
+        return resposta_en
+
+    # Traduz de volta para português e remove prefixos como "Resposta:" caso existam
+    resposta_pt = traduzir_lote([resposta_en], origem="en", destino="pt")[0]
+    return resposta_pt.split("Resposta:")[-1].strip()
+
+# ============================================================
+# ⚡ Geração em streaming (tokens ➜ frases EN ➜ frases PT)
+# ============================================================
+
+# Fim de frase no texto gerado: pontuação seguida de espaço, ou quebra de linha
+_FIM_DE_FRASE_STREAM = re.compile(r"(?<=[.!?;])\s+|\n+")
+
 
-    # Gera resposta com Velvet
-    generated = model_generator(prompt_en)
+def gerar_tokens_stream(prompt_en: str):
+    """
+    Gera a resposta do Velvet token a token.
+    A geração corre na thread do agendador de lotes; os pedaços de texto EN
+    são devolvidos assim que formam palavras completas.
+    """
+    yield from get_agendador().submeter(prompt_en, streaming=True).iterar()
 
-    # Extrai o texto gerado
-    resposta_en = generated[0]['generated_text']
 
-    # Traduz de volta para português
-    resposta_pt = traduzir_en_para_pt(resposta_en)
+def gerar_frases_stream(prompt_en: str):
+    """
+    Streaming de frases completas: cada frase EN terminada é traduzida logo para PT.
 
-    # Remove prefixos como "Resposta:" caso existam
-    resposta_limpa = resposta_pt.split("Resposta:")[-1].strip()
-    return resposta_limpa
+    Yields:
+        tuple[str, str, str]: (frase_en, frase_pt, separador a seguir à frase: espaço ou parágrafo)
+    """
+    buffer = ""
+    for pedaco in gerar_tokens_stream(prompt_en):
+        buffer += pedaco
+        while (fim := _FIM_DE_FRASE_STREAM.search(buffer)) is not None:
+            frase = buffer[:fim.start()].strip()
+            separador = "\n\n" if "\n" in fim.group() else " "
+            buffer = buffer[fim.end():]
+            if frase:
+                yield frase, traduzir_lote([frase], origem="en", destino="pt")[0], separador
+    if buffer.strip():
+        yield buffer.strip(), traduzir_lote([buffer.strip()], origem="en", destino="pt")[0], ""
 
 # ============================================================
 # ✅ Validação de resposta com base em palavras-chave
@@ -83,41 +169,27 @@ def validar_resposta_por_keywords(resposta: str, contexto: str, min_match: int =
 # ============================================================
 
 
-# Caminhos dos ficheiros JSON
-VELVET_HIST_FILE = Path("data/respostas/velvet_respostas.json")
+# Caminhos dos ficheiros de histórico e última resposta
+VELVET_HIST_FILE = HISTORICO_FILE
 VELVET_LAST_FILE = Path("data/respostas/velvet_ultima_resposta.json")
 
-# Garante que a pasta 'data/respostas' existe
-os.makedirs(VELVET_HIST_FILE.parent, exist_ok=True)
-
 
 def salvar_completo_em_arquivo(detalhes: dict):
     """
     Guarda os detalhes completos da interação com o modelo.
-    Cria dois ficheiros:
-    1. Histórico acumulado (JSON com lista)
-    2. Última resposta (JSON individual)
+    1. Histórico acumulado (JSONL, uma linha acrescentada por interação)
+    2. Última resposta (JSON individual, substituído atomicamente)
     """
+    # 1. Acrescenta ao histórico sem reler o ficheiro
+    registar_interacao(detalhes)
 
-    # 1. Carrega ou inicia o histórico
-    if VELVET_HIST_FILE.exists():
-        with open(VELVET_HIST_FILE, encoding="utf-8") as f:
-            historico = json.load(f)
-    else:
-        historico = []
-
-    # 2. Acrescenta a nova entrada ao histórico
-    historico.append(detalhes)
-
-    # 3. Guarda o histórico atualizado
-    with open(VELVET_HIST_FILE, "w", encoding="utf-8") as f:
-        json.dump(historico, f, indent=2, ensure_ascii=False)
-
-    # 4. Atualiza o ficheiro com a última resposta
-    with open(VELVET_LAST_FILE, "w", encoding="utf-8") as f:
+    # 2. Atualiza o ficheiro com a última resposta (tmp único por thread)
+    tmp_path = VELVET_LAST_FILE.with_name(f"{VELVET_LAST_FILE.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(detalhes, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, VELVET_LAST_FILE)
 
-    # 5. Confirmação no terminal
+    # 3. Confirmação no terminal
     print("📝 Resposta guardada em:")
     print(f"   └ Histórico → {VELVET_HIST_FILE}")
     print(f"   └ Última resposta → {VELVET_LAST_FILE}")
@@ -0,0 +1,115 @@
+# ============================================================
+# comparar_quantizacao.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Comparar os tradutores MarianMT fp32 com as versões int8 (TRADUCAO_QUANTIZADA).
+#
+# Funcionalidades:
+# 🔹 Usa as perguntas reais guardadas em velvet_metrics.jsonl
+# 🔹 Traduz PT ➜ EN com os dois modelos e EN ➜ PT de volta
+# 🔹 Mede a latência média por tradução em cada modo
+# 🔹 Mede a semelhança entre as traduções int8 e fp32 (0 a 1)
+# 🔹 Gera relatório Markdown em tests/relatorios/relatorio_quantizacao.md
+# ============================================================
+
+import json
+import sys
+import os
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.tradutor_local import carregar_tradutor
+
+metricas_path = Path("data/metrics/velvet_metrics.jsonl")
+relatorio_md_path = Path("tests/relatorios/relatorio_quantizacao.md")
+
+# Perguntas usadas se o ficheiro de métricas não existir
+PERGUNTAS_BASE = [
+    "o que é um diagrama de classes?",
+    "O que é UML?",
+    "o que é um diagrama de casos de utilização?",
+    "Qual a diferença entre um ator primário e um ator secundário?"
+]
+
+
+def carregar_perguntas():
+    if not metricas_path.exists():
+        return PERGUNTAS_BASE
+    perguntas = []
+    with open(metricas_path, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                pergunta = json.loads(linha).get("pergunta", "").strip()
+            except json.JSONDecodeError:
+                continue
+            if pergunta and pergunta not in perguntas:
+                perguntas.append(pergunta)
+    return perguntas or PERGUNTAS_BASE
+
+
+def traduzir_com(tradutor, textos):
+    """Traduz frase a frase e devolve (traduções, tempo médio por frase)."""
+    tokenizer, model = tradutor["tokenizer"], tradutor["model"]
+    traducoes = []
+    inicio = time.perf_counter()
+    for texto in textos:
+        inputs = tokenizer([texto], return_tensors="pt", padding=True)
+        gerado = model.generate(**inputs)
+        traducoes.append(tokenizer.decode(gerado[0], skip_special_tokens=True))
+    return traducoes, (time.perf_counter() - inicio) / max(len(textos), 1)
+
+
+def semelhanca(a, b):
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+if __name__ == "__main__":
+    perguntas = carregar_perguntas()
+    print(f"🔹 {len(perguntas)} perguntas para comparar.")
+
+    resultados = {}
+    linhas = []
+    for direcao in ("pt-en", "en-pt"):
+        # EN ➜ PT usa as traduções fp32 das perguntas como entrada
+        textos = perguntas if direcao == "pt-en" else resultados["pt-en"]["fp32"]
+        saidas = {}
+        tempos = {}
+        for modo, quantizado in (("fp32", False), ("int8", True)):
+            inicio = time.perf_counter()
+            tradutor = carregar_tradutor(direcao, quantizado=quantizado)
+            carregamento = time.perf_counter() - inicio
+            traduzir_com(tradutor, textos[:1])  # aquecimento
+            saidas[modo], tempos[modo] = traduzir_com(tradutor, textos)
+            print(f"   {direcao} {modo}: carregamento {carregamento:.2f}s, {tempos[modo] * 1000:.0f} ms/frase")
+            del tradutor
+
+        sims = [semelhanca(a, b) for a, b in zip(saidas["fp32"], saidas["int8"])]
+        resultados[direcao] = {
+            **saidas,
+            "tempo_fp32": tempos["fp32"],
+            "tempo_int8": tempos["int8"],
+            "semelhanca": sum(sims) / len(sims),
+            "iguais": sum(a == b for a, b in zip(saidas["fp32"], saidas["int8"]))
+        }
+        for texto, a, b, sim in zip(textos, saidas["fp32"], saidas["int8"], sims):
+            linhas.append(f"| {direcao} | {texto} | {a} | {b} | {sim:.2f} |")
+
+    relatorio_md_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(relatorio_md_path, "w", encoding="utf-8") as f_md:
+        f_md.write("# Comparação MarianMT fp32 vs int8\n\n")
+        f_md.write(f"**Perguntas analisadas:** {len(perguntas)}\n\n")
+        f_md.write("| Direção | ms/frase fp32 | ms/frase int8 | Aceleração | Semelhança média | Traduções iguais |\n")
+        f_md.write("|---|---|---|---|---|---|\n")
+        for direcao, r in resultados.items():
+            f_md.write(
+                f"| {direcao} | {r['tempo_fp32'] * 1000:.0f} | {r['tempo_int8'] * 1000:.0f} | "
+                f"{r['tempo_fp32'] / r['tempo_int8']:.2f}x | {r['semelhanca']:.3f} | "
+                f"{r['iguais']}/{len(r['fp32'])} |\n"
+            )
+        f_md.write("\n## Traduções\n\n")
+        f_md.write("| Direção | Original | fp32 | int8 | Semelhança |\n|---|---|---|---|---|\n")
+        f_md.write("\n".join(linhas) + "\n")
+
+    print(f"✅ Relatório gerado em {relatorio_md_path}")
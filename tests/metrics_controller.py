@@ -9,29 +9,27 @@
 #     - Gráficos (.png)
 # ============================================================
 
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
-import json
 
-# Caminho do histórico de respostas
-respostas_path = Path("data/respostas/velvet_respostas.json")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.historico import iterar_historico, HISTORICO_FILE, HISTORICO_JSON_ANTIGO
+
 relatorio_md_path = Path("tests/relatorios/relatorio_velvet_local.md")
 grafico_tempo_path = Path("tests/relatorios/grafico_tempo_velvet.png")
 grafico_valida_path = Path("tests/relatorios/grafico_valida_velvet.png")
 
-# Verifica se o ficheiro existe
-if not respostas_path.exists():
-    print(f"⚠️ O ficheiro {respostas_path} não foi encontrado.")
+# Verifica se o histórico existe (JSONL ou o antigo JSON, migrado na leitura)
+if not HISTORICO_FILE.exists() and not HISTORICO_JSON_ANTIGO.exists():
+    print(f"⚠️ O ficheiro {HISTORICO_FILE} não foi encontrado.")
     exit()
 
-# Lê todas as respostas
-with open(respostas_path, encoding="utf-8") as f:
-    respostas = json.load(f)
-
-# Extrai métricas (ignora respostas sem campo 'metricas')
+# Extrai métricas entrada a entrada (ignora respostas sem campo 'metricas')
 dados_metricas = []
-for resp in respostas:
+for resp in iterar_historico():
     metricas = resp.get("metricas")
     if metricas:
         dados_metricas.append({
@@ -0,0 +1,76 @@
+# ============================================================
+# test_agendador_lotes.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar o batching dinâmico (models/agendador_lotes.py) sem o Velvet.
+#
+# 🔹 Pedidos na mesma janela juntam-se num lote (até `max_lote`)
+# 🔹 Lote com erro ➜ pedidos repetidos um a um
+# 🔹 StreamerLote: texto de cada linha só enviado em palavras completas
+# ============================================================
+
+import pytest
+
+from models.agendador_lotes import AgendadorLotes, PedidoGeracao, StreamerLote
+
+
+class AgendadorFalso(AgendadorLotes):
+    """Gera "<prompt>!" para cada pedido e regista os lotes recebidos."""
+
+    def __init__(self, falhar_com=None, **kwargs):
+        self.lotes = []
+        self.falhar_com = falhar_com
+        super().__init__(obter_gerador=None, parametros={}, **kwargs)
+
+    def _gerar_lote(self, lote):
+        self.lotes.append([p.prompt for p in lote])
+        if self.falhar_com and any(self.falhar_com in p.prompt for p in lote):
+            raise RuntimeError("falha na geração")
+        return [p.prompt + "!" for p in lote]
+
+
+def test_pedidos_da_mesma_janela_partilham_lote():
+    agendador = AgendadorFalso(janela=0.5, max_lote=2)
+    pedidos = [agendador.submeter(p) for p in ("a", "b", "c")]
+    assert [p.esperar() for p in pedidos] == ["a!", "b!", "c!"]
+    assert agendador.lotes == [["a", "b"], ["c"]]
+
+
+def test_lote_com_erro_repete_um_a_um():
+    agendador = AgendadorFalso(falhar_com="mau", janela=0.5, max_lote=3)
+    pedidos = [agendador.submeter(p) for p in ("a", "mau", "c")]
+    assert pedidos[0].esperar() == "a!"
+    assert pedidos[2].esperar() == "c!"
+    with pytest.raises(RuntimeError):
+        pedidos[1].esperar()
+    assert agendador.lotes == [["a", "mau", "c"], ["a"], ["mau"], ["c"]]
+
+
+def test_pedido_ja_transmitido_nao_e_repetido():
+    agendador = AgendadorFalso(falhar_com="mau", janela=0.5, max_lote=2)
+    transmitido, outro = PedidoGeracao("a", streaming=True), PedidoGeracao("mau")
+    transmitido.transmitido = True
+    agendador._processar([transmitido, outro])
+    with pytest.raises(RuntimeError):
+        list(transmitido.iterar())
+    assert agendador.lotes == [["a", "mau"], ["mau"]]
+
+
+class TokenizerFalso:
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids)
+
+
+def test_streamer_envia_palavras_completas_por_linha():
+    np = pytest.importorskip("numpy")
+    pedidos = [PedidoGeracao("p1", streaming=True), PedidoGeracao("p2", streaming=True)]
+    streamer = StreamerLote(TokenizerFalso(), pedidos, eos_ids={0})
+    streamer.put(np.array([[1, 1], [1, 1]]))   # IDs do prompt: ignorados
+    for passo in zip("ola mundo", "sim\0\0\0\0\0\0"):
+        streamer.put(np.array([[ord(c) if c != "\0" else 0] for c in passo]))
+    streamer.end()
+    for pedido in pedidos:
+        pedido.concluir()
+
+    assert list(pedidos[0].iterar()) == ["ola ", "mundo"]
+    assert list(pedidos[1].iterar()) == ["sim"]
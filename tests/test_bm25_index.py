@@ -0,0 +1,90 @@
+# ============================================================
+# test_bm25_index.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar o índice BM25 e a fusão híbrida por RRF (rag_engine.py).
+#
+# 🔹 Ranking BM25: termos mais frequentes/raros pesam mais, sem acentos
+# 🔹 Remoção de chunks e persistência em disco
+# 🔹 RRF: BM25 + pesquisa vetorial (Chroma falsa), chunks só lexicais
+#     vêm da Chroma pelo ID
+# ============================================================
+
+from types import SimpleNamespace
+
+import pytest
+
+from models import rag_engine
+from models.bm25_index import BM25Index, tokenizar
+
+CHUNKS = {
+    "classes": "O diagrama de classes mostra as classes do sistema e as suas associações.",
+    "sequencia": "O diagrama de sequência mostra a troca de mensagens entre objetos.",
+    "ator": "Um ator é um papel externo que interage com o sistema.",
+}
+
+
+@pytest.fixture
+def indice(tmp_path):
+    bm25 = BM25Index(str(tmp_path / "bm25_index.json"))
+    for chunk_id, texto in CHUNKS.items():
+        bm25.add(chunk_id, texto)
+    return bm25
+
+
+def test_tokenizar_sem_acentos_nem_stopwords():
+    assert tokenizar("O Diagrama de Sequência é útil") == ["diagrama", "sequencia", "util"]
+
+
+def test_ranking_bm25(indice):
+    resultados = indice.search("diagrama de classes", k=3)
+    assert [r[0] for r in resultados] == ["classes", "sequencia"]
+    assert resultados[0][1] > resultados[1][1]
+    assert [r[2] for r in resultados] == [2, 1]          # termos da pergunta presentes
+    assert indice.search("SEQUENCIA", k=3)[0][0] == "sequencia"
+    assert indice.search("inexistente", k=3) == []
+
+
+def test_remover_e_persistir(indice, tmp_path):
+    indice.remove(["classes"])
+    assert [r[0] for r in indice.search("diagrama", k=3)] == ["sequencia"]
+    indice.save()
+    reaberto = BM25Index(str(tmp_path / "bm25_index.json"))
+    assert len(reaberto) == 2
+    assert reaberto.search("ator", k=1)[0][0] == "ator"
+
+
+class ChromaFalsa:
+    def __init__(self, densos):
+        self.densos = densos
+        self.pesquisas = 0
+
+    def similarity_search(self, query, k):
+        self.pesquisas += 1
+        return [SimpleNamespace(page_content=CHUNKS[i], metadata={"hash_norm": i}) for i in self.densos[:k]]
+
+    def get(self, ids):
+        return {"ids": ids, "documents": [CHUNKS[i] for i in ids], "metadatas": [{"hash_norm": i} for i in ids]}
+
+
+def test_fusao_rrf(indice, monkeypatch):
+    pytest.importorskip("langchain")
+    chroma = ChromaFalsa(["ator", "classes"])
+    monkeypatch.setattr(rag_engine, "get_bm25_index", lambda: indice)
+    monkeypatch.setattr(rag_engine, "get_chroma_db", lambda: chroma)
+
+    # BM25: sequencia, classes | denso: ator, classes ➜ "classes" aparece nos dois
+    docs = rag_engine.recuperar_candidatos_hibridos("diagrama de sequência", "sequence diagram", k=3)
+    assert [d.metadata["hash_norm"] for d in docs] == ["classes", "ator", "sequencia"]
+    assert docs[2].page_content == CHUNKS["sequencia"]   # só lexical: lido da Chroma pelo ID
+
+
+def test_sem_pesquisa_densa_com_termos_todos_presentes(indice, monkeypatch):
+    pytest.importorskip("langchain")
+    chroma = ChromaFalsa(["ator"])
+    monkeypatch.setattr(rag_engine, "get_bm25_index", lambda: indice)
+    monkeypatch.setattr(rag_engine, "get_chroma_db", lambda: chroma)
+
+    docs = rag_engine.recuperar_candidatos_hibridos("diagrama de classes", "class diagram", k=1)
+    assert chroma.pesquisas == 0
+    assert [d.metadata["hash_norm"] for d in docs] == ["classes"]
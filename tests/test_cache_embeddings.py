@@ -0,0 +1,62 @@
+# ============================================================
+# test_cache_embeddings.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a cache persistente de embeddings (models/cache_embeddings.py).
+#
+# 🔹 Vetores lidos de volta iguais aos guardados (também após reabrir)
+# 🔹 Índice só acrescentado: cada batch escreve apenas as linhas novas
+# 🔹 Migração do índice antigo (rows dentro do .json)
+# ============================================================
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from models.cache_embeddings import CacheEmbeddings
+
+
+def test_guarda_e_le_vetores_apos_reabrir(tmp_path):
+    cache = CacheEmbeddings("intfloat/e5", cache_path=str(tmp_path))
+    cache.add_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    cache.add_many(["b", "c"], [[9.0, 9.0], [5.0, 6.0]])  # "b" já existe: não é substituído
+
+    reaberta = CacheEmbeddings("intfloat/e5", cache_path=str(tmp_path))
+    assert len(reaberta) == 3
+    assert reaberta.get_many(["a", "b", "c", "x"]) == {"a": [1.0, 2.0], "b": [3.0, 4.0], "c": [5.0, 6.0]}
+
+
+def test_indice_so_acrescenta_linhas_novas(tmp_path):
+    cache = CacheEmbeddings("modelo", cache_path=str(tmp_path))
+    cache.add_many(["a"], [[1.0, 2.0]])
+    cache.add_many(["b", "c"], [[3.0, 4.0], [5.0, 6.0]])
+    with open(cache.rows_path, encoding="utf-8") as f:
+        assert [json.loads(linha) for linha in f] == [["a", 0], ["b", 1], ["c", 2]]
+
+    # Última linha meio escrita (escrita interrompida) é ignorada
+    with open(cache.rows_path, "a", encoding="utf-8") as f:
+        f.write('["d", 3')
+    assert len(CacheEmbeddings("modelo", cache_path=str(tmp_path))) == 3
+
+
+def test_dimensao_diferente_falha(tmp_path):
+    cache = CacheEmbeddings("modelo", cache_path=str(tmp_path))
+    cache.add_many(["a"], [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        cache.add_many(["b"], [[1.0, 2.0, 3.0]])
+
+
+def test_migra_indice_antigo(tmp_path):
+    cache = CacheEmbeddings("modelo", cache_path=str(tmp_path))
+    cache.add_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    # Simula o formato antigo: índice completo no .json e sem .rows.jsonl
+    with open(cache.index_path, "w", encoding="utf-8") as f:
+        json.dump({"model": "modelo", "dim": 2, "rows": {"a": 0, "b": 1}}, f)
+    (tmp_path / "modelo.rows.jsonl").unlink()
+
+    migrada = CacheEmbeddings("modelo", cache_path=str(tmp_path))
+    assert migrada.get_many(["b"]) == {"b": [3.0, 4.0]}
+    with open(migrada.index_path, encoding="utf-8") as f:
+        assert "rows" not in json.load(f)
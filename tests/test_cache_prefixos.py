@@ -0,0 +1,95 @@
+# ============================================================
+# test_cache_prefixos.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a KV-cache de prefixos (models/cache_prefixos.py) sem o Velvet.
+#
+# 🔹 Divisão do prompt em contexto (prefixo) + pergunta (sufixo)
+# 🔹 Orçamento em bytes: sai a entrada usada há mais tempo
+# 🔹 Prefixos maiores que o orçamento inteiro não são guardados
+# 🔹 preparar(): hit reaproveita a KV do prefixo; a cópia devolvida não altera a cache
+# ============================================================
+
+import pytest
+
+from models.cache_prefixos import CachePrefixos, dividir_prompt
+
+MB = 1024 * 1024
+
+
+def test_dividir_prompt():
+    prompt = "Context:\nUML é uma linguagem.\n\nQuestion: O que é UML?\nAnswer:"
+    prefixo, sufixo = dividir_prompt(prompt)
+    assert prefixo == "Context:\nUML é uma linguagem.\n\nQuestion:"
+    assert sufixo == " O que é UML?\nAnswer:"
+    assert prefixo + sufixo == prompt
+    assert dividir_prompt("Sem contexto nenhum") is None
+
+
+def test_orcamento_em_bytes_remove_as_mais_antigas():
+    cache = CachePrefixos(orcamento_mb=3)
+    cache._guardar("a", (None, None, 1 * MB))
+    cache._guardar("b", (None, None, 1 * MB))
+    cache._entradas.move_to_end("a")              # "a" usada agora (como num hit em preparar)
+    cache._guardar("c", (None, None, 2 * MB))     # 4 MB > 3 MB: sai "b"
+
+    assert list(cache._entradas) == ["a", "c"]
+    assert cache.estatisticas()["ocupado_mb"] == 3.0
+
+    cache._guardar("d", (None, None, 3 * MB))     # ocupa o orçamento todo
+    assert list(cache._entradas) == ["d"]
+
+
+def test_prefixo_maior_que_o_orcamento_nao_e_guardado():
+    cache = CachePrefixos(orcamento_mb=1)
+    cache._guardar("a", (None, None, MB // 2))
+    cache._guardar("grande", (None, None, 2 * MB))
+    cache._guardar("a", (None, None, MB // 2))    # repetido: não conta duas vezes
+    assert list(cache._entradas) == ["a"]
+    assert cache.estatisticas()["ocupado_mb"] == 0.5
+
+
+class TokenizerFalso:
+    """Um token por carácter."""
+
+    def __call__(self, texto, return_tensors="pt", add_special_tokens=True):
+        import torch
+        return {"input_ids": torch.tensor([[ord(c) for c in texto]])}
+
+
+class ModeloFalso:
+    """Prefill falso: uma camada com key/value derivados dos IDs recebidos."""
+    device = "cpu"
+
+    def __init__(self):
+        self.prefills = 0
+
+    def __call__(self, input_ids, use_cache=True):
+        from types import SimpleNamespace
+        self.prefills += 1
+        kv = input_ids.float()
+        return SimpleNamespace(past_key_values=[(kv.clone(), kv.clone())])
+
+
+def test_preparar_reaproveita_prefixo_e_devolve_copia():
+    torch = pytest.importorskip("torch")
+    cache, modelo, tokenizer = CachePrefixos(orcamento_mb=1), ModeloFalso(), TokenizerFalso()
+    contexto = "Context:\nUML é uma linguagem.\n\nQuestion:"
+
+    ids, kv = cache.preparar(modelo, tokenizer, contexto + " O que é UML?\nAnswer:")
+    assert modelo.prefills == 1
+    ids, kv = cache.preparar(modelo, tokenizer, contexto + " Quem criou a UML?\nAnswer:")
+    assert modelo.prefills == 1           # hit: o prefixo não volta a passar pelo modelo
+    assert cache.estatisticas()["hits"] == 1
+    assert ids[0].tolist() == [ord(c) for c in contexto + " Quem criou a UML?\nAnswer:"]
+
+    _, kv_guardada, _ = next(iter(cache._entradas.values()))
+    assert torch.equal(kv[0][0], kv_guardada[0][0])
+    assert kv[0][0] is not kv_guardada[0][0]
+    # generate escreve na cache recebida: camadas substituídas (DynamicCache) ou alteradas no lugar
+    kv[0] = (torch.cat([kv[0][0], kv[0][0]], dim=1), kv[0][1])
+    with torch.inference_mode():
+        kv[0][1].add_(1)
+    original = torch.tensor([[float(ord(c)) for c in contexto]])
+    assert torch.equal(kv_guardada[0][0], original)
+    assert torch.equal(kv_guardada[0][1], original)
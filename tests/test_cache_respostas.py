@@ -0,0 +1,111 @@
+# ============================================================
+# test_cache_respostas.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a cache semântica de respostas (models/cache_respostas.py).
+#
+# 🔹 Embeddings falsos (vetores fixos por pergunta): sem carregar o e5
+# 🔹 Pares de perguntas: semelhança alta só conta com os mesmos termos-chave
+# 🔹 Invalidação pela versão do índice RAG e pelo TTL
+# 🔹 LRU: acima de `max_entradas` sai a usada há mais tempo
+# 🔹 Embedding de uma pergunta nova calculado uma só vez (procurar ➜ guardar)
+# ============================================================
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from models import cache_respostas
+from models.cache_respostas import CacheRespostas, normalizar_pergunta
+
+# Perguntas com a mesma forma têm vetores quase iguais (como no e5)
+VETORES = {
+    "o que é agregação": [1.0, 0.10, 0.0],
+    "o que é composição": [1.0, 0.12, 0.0],
+    "explica o que é agregação": [1.0, 0.11, 0.01],
+    "o que é uml": [0.0, 0.0, 1.0],
+}
+
+
+def embed(texto):
+    return VETORES[texto]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheRespostas(caminho=str(tmp_path / "respostas.sqlite3"), limiar=0.95, max_entradas=10, ttl=3600)
+
+
+def test_normalizar_pergunta():
+    assert normalizar_pergunta("  O que é   UML ? ") == "o que é uml"
+
+
+def test_pergunta_igual_nao_calcula_embedding(cache):
+    cache.guardar("O que é UML?", "Linguagem de modelação.", 1.0, embed)
+    assert cache.procurar("o que é UML", 1.0, embed_fn=None)[0] == "Linguagem de modelação."
+    assert cache.estatisticas()["hits_exatos"] == 1
+
+
+@pytest.mark.parametrize("pergunta, esperado", [
+    ("Explica o que é agregação?", "Relação todo-parte fraca."),  # mesma pergunta por outras palavras
+    ("O que é composição?", None),                                 # forma igual, conceito diferente
+])
+def test_pares_de_perguntas_parecidas(cache, pergunta, esperado):
+    cache.guardar("O que é agregação?", "Relação todo-parte fraca.", 1.0, embed)
+    assert cache.procurar(pergunta, 1.0, embed)[0] == esperado
+
+
+def test_abaixo_do_limiar_nao_responde(cache):
+    cache.guardar("O que é agregação?", "Relação todo-parte fraca.", 1.0, embed)
+    assert cache.procurar("O que é UML?", 1.0, embed)[0] is None
+    assert cache.estatisticas()["misses"] == 1
+
+
+def test_embedding_calculado_uma_vez_por_pergunta_nova(cache):
+    chamadas = []
+
+    def embed_contado(texto):
+        chamadas.append(texto)
+        return embed(texto)
+
+    cache.guardar("O que é agregação?", "Relação todo-parte fraca.", 1.0, embed)
+    resposta, vetor = cache.procurar("O que é UML?", 1.0, embed_contado)
+    assert resposta is None
+    cache.guardar("O que é UML?", "Linguagem de modelação.", 1.0, embed_contado, vetor=vetor)
+    assert chamadas == ["o que é uml"]
+    assert cache.procurar("O que é UML?", 1.0, embed_fn=None)[0] == "Linguagem de modelação."
+
+
+def test_nova_versao_do_indice_invalida_tudo(cache, tmp_path):
+    cache.guardar("O que é UML?", "Linguagem de modelação.", 1.0, embed)
+    assert cache.procurar("O que é UML?", 2.0, embed)[0] is None
+    assert len(cache) == 0
+    # Também em disco: uma nova instância não recupera a entrada antiga
+    assert len(CacheRespostas(caminho=str(tmp_path / "respostas.sqlite3"))) == 0
+
+
+def test_ttl_expira_entradas(tmp_path, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache_respostas, "time", SimpleNamespace(time=lambda: agora[0]))
+    cache = CacheRespostas(caminho=str(tmp_path / "r.sqlite3"), limiar=0.95, max_entradas=10, ttl=60)
+    cache.guardar("O que é UML?", "Linguagem de modelação.", 1.0, embed)
+    agora[0] += 61
+    assert cache.procurar("O que é UML?", 1.0, embed)[0] is None
+
+
+def test_lru_remove_a_usada_ha_mais_tempo(tmp_path, monkeypatch):
+    relogio = itertools.count(1000)
+    monkeypatch.setattr(cache_respostas, "time", SimpleNamespace(time=lambda: next(relogio)))
+    cache = CacheRespostas(caminho=str(tmp_path / "r.sqlite3"), limiar=0.95, max_entradas=2, ttl=3600)
+    cache.guardar("O que é agregação?", "A", 1.0, embed)
+    cache.guardar("O que é UML?", "U", 1.0, embed)
+    assert cache.procurar("O que é agregação?", 1.0, embed)[0] == "A"   # UML passa a ser a menos usada
+    cache.guardar("O que é composição?", "C", 1.0, embed)
+
+    reaberta = CacheRespostas(caminho=str(tmp_path / "r.sqlite3"), max_entradas=2, ttl=3600)
+    assert len(reaberta) == 2
+    assert reaberta.procurar("O que é UML?", 1.0, embed)[0] is None
+    assert reaberta.procurar("O que é agregação?", 1.0, embed)[0] == "A"
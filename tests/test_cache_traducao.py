@@ -0,0 +1,95 @@
+# ============================================================
+# test_cache_traducao.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a cache de traduções em dois níveis (models/cache_traducao.py).
+#
+# 🔹 LRU em memória: remove a entrada usada há mais tempo
+# 🔹 Disco (SQLite): sobrevive a novas instâncias e respeita `max_disco`
+# 🔹 Chave normalizada por direção e modelo
+# 🔹 traduzir_lote(usar_cache=False) (indexação) não lê nem escreve na cache
+# ============================================================
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from models import cache_traducao, tradutor_local
+from models.cache_traducao import CacheTraducao
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "traducoes.sqlite3")
+
+
+def test_lru_em_memoria_remove_a_menos_usada(caminho):
+    cache = CacheTraducao(caminho, max_memoria=2, max_disco=100)
+    cache.set("pt-en", "m", "um", "one")
+    cache.set("pt-en", "m", "dois", "two")
+    assert cache.get("pt-en", "m", "um") == "one"      # "um" passa a ser a mais recente
+    cache.set("pt-en", "m", "três", "three")           # sai "dois" da memória
+
+    assert cache.estatisticas()["entradas_memoria"] == 2
+    assert cache.get("pt-en", "m", "dois") == "two"    # continua no disco
+    assert cache.estatisticas()["hits_disco"] == 1
+
+
+def test_persiste_entre_instancias_e_normaliza_espacos(caminho):
+    CacheTraducao(caminho).set("pt-en", "m", "Olá   mundo", "Hello world")
+    nova = CacheTraducao(caminho)
+    assert nova.get("pt-en", "m", " Olá mundo ") == "Hello world"
+    assert nova.get("en-pt", "m", "Olá mundo") is None   # outra direção, outra entrada
+    assert nova.get("pt-en", "outro", "Olá mundo") is None
+    assert nova.estatisticas()["misses"] == 2
+
+
+def test_disco_limitado_remove_as_menos_acedidas(caminho, monkeypatch):
+    relogio = itertools.count(1)
+    monkeypatch.setattr(cache_traducao, "time", SimpleNamespace(time=lambda: next(relogio)))
+    cache = CacheTraducao(caminho, max_memoria=1, max_disco=2)
+    cache.INTERVALO_LIMPEZA = 1
+    cache.set("pt-en", "m", "a", "A")
+    cache.set("pt-en", "m", "b", "B")
+    cache.get("pt-en", "m", "a")                       # disco: "a" acedida depois de "b"
+    cache.set("pt-en", "m", "c", "C")
+
+    nova = CacheTraducao(caminho, max_memoria=1, max_disco=2)
+    assert [nova.get("pt-en", "m", t) for t in "abc"] == ["A", None, "C"]
+
+
+def test_limpar(caminho):
+    cache = CacheTraducao(caminho)
+    cache.set("pt-en", "m", "a", "A")
+    cache.limpar()
+    assert cache.get("pt-en", "m", "a") is None
+    assert CacheTraducao(caminho).get("pt-en", "m", "a") is None
+
+
+class TokenizerFalso:
+    def __call__(self, frases, **kwargs):
+        return {"frases": frases}
+
+    def batch_decode(self, traducoes, skip_special_tokens=True):
+        return traducoes
+
+
+class ModeloFalso:
+    def generate(self, frases):
+        return [f.upper() for f in frases]
+
+
+def test_traducao_da_indexacao_nao_passa_pela_cache(caminho, monkeypatch):
+    cache = CacheTraducao(caminho)
+    monkeypatch.setattr(tradutor_local, "TRADUCAO_CACHE_ATIVA", True)
+    monkeypatch.setattr(tradutor_local, "get_cache_traducao", lambda: cache)
+    monkeypatch.setattr(tradutor_local, "get_tradutor",
+                        lambda direcao: {"tokenizer": TokenizerFalso(), "model": ModeloFalso()})
+
+    assert tradutor_local.traduzir_lote(["um chunk."], usar_cache=False) == ["UM CHUNK."]
+    assert cache.estatisticas()["entradas_memoria"] == 0
+    assert cache.get("pt-en", tradutor_local.modelo_id("pt-en"), "um chunk.") is None
+
+    assert tradutor_local.traduzir_lote(["uma pergunta."]) == ["UMA PERGUNTA."]
+    assert cache.get("pt-en", tradutor_local.modelo_id("pt-en"), "uma pergunta.") == "UMA PERGUNTA."
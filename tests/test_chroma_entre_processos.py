@@ -0,0 +1,71 @@
+# ============================================================
+# test_chroma_entre_processos.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Garantir que um processo de longa duração (servidor de inferência)
+# vê os chunks escritos por outro processo (painel / RAGLibraryManager).
+#
+# 🔹 Escritor num processo Python novo: add_texts + marcar_indice_atualizado
+# 🔹 Leitor neste processo: get_chroma_db() antes e depois de cada escrita
+# 🔹 Inclui um rebuild completo (pasta apagada e recriada)
+# 🔹 Embeddings falsos (sem carregar o e5)
+# ============================================================
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from models import rag_engine
+
+RAIZ_PROJETO = Path(__file__).resolve().parent.parent
+
+EMBEDDINGS_FALSOS = (
+    "class EmbeddingsFalsos:\n"
+    "    def embed_documents(self, textos):\n"
+    "        return [self.embed_query(t) for t in textos]\n"
+    "    def embed_query(self, texto):\n"
+    "        return [float(len(texto)), 1.0, 0.5]\n"
+)
+
+CODIGO_ESCRITOR = EMBEDDINGS_FALSOS + (
+    "import shutil, sys\n"
+    "from langchain_chroma import Chroma\n"
+    "from models.rag_engine import marcar_indice_atualizado\n"
+    "caminho, rebuild, ids = sys.argv[1], sys.argv[2] == '1', sys.argv[3:]\n"
+    "if rebuild:\n"
+    "    shutil.rmtree(caminho)\n"
+    "db = Chroma(persist_directory=caminho, embedding_function=EmbeddingsFalsos())\n"
+    "db.add_texts(['texto do chunk ' + i for i in ids], ids=ids)\n"
+    "marcar_indice_atualizado(caminho)\n"
+)
+
+exec(EMBEDDINGS_FALSOS)
+
+
+def _escrever(caminho, ids, rebuild=False):
+    proc = subprocess.run(
+        [sys.executable, "-c", CODIGO_ESCRITOR, str(caminho), "1" if rebuild else "0", *ids],
+        cwd=RAIZ_PROJETO, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_chunks_de_outro_processo_ficam_visiveis(tmp_path, monkeypatch):
+    caminho = tmp_path / "chroma"
+    monkeypatch.setattr(rag_engine, "CHROMA_PATH", str(caminho))
+    monkeypatch.setattr(rag_engine, "get_embeddings", lambda: EmbeddingsFalsos())
+    rag_engine.invalidar_chroma_db()
+
+    _escrever(caminho, ["a"])
+    assert sorted(rag_engine.get_chroma_db().get()["ids"]) == ["a"]
+
+    _escrever(caminho, ["b"])
+    assert sorted(rag_engine.get_chroma_db().get()["ids"]) == ["a", "b"]
+
+    _escrever(caminho, ["c"], rebuild=True)
+    assert sorted(rag_engine.get_chroma_db().get()["ids"]) == ["c"]
+    rag_engine.invalidar_chroma_db()
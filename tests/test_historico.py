@@ -0,0 +1,55 @@
+# ============================================================
+# test_historico.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar o histórico em JSON Lines (models/historico.py).
+#
+# 🔹 Cada interação acrescenta uma linha (também com escritas em paralelo)
+# 🔹 Leitura em streaming ignora linhas corrompidas
+# 🔹 Migração do histórico antigo (lista JSON), mantendo a ordem
+# ============================================================
+
+import json
+import threading
+
+from models.historico import iterar_historico, migrar_historico_json, registar_interacao
+
+
+def test_acrescenta_e_le_por_ordem(tmp_path):
+    caminho = tmp_path / "respostas" / "historico.jsonl"
+    registar_interacao({"pergunta": "O que é UML?", "resposta": "Uma linguagem."}, caminho)
+    registar_interacao({"pergunta": "O que é um ator?", "resposta": "Um papel."}, caminho)
+
+    assert len(caminho.read_text(encoding="utf-8").splitlines()) == 2
+    assert [e["pergunta"] for e in iterar_historico(caminho)] == ["O que é UML?", "O que é um ator?"]
+
+
+def test_escritas_em_paralelo_nao_se_misturam(tmp_path):
+    caminho = tmp_path / "historico.jsonl"
+    threads = [threading.Thread(target=registar_interacao, args=({"n": i, "texto": "x" * 5000}, caminho))
+               for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(e["n"] for e in iterar_historico(caminho)) == list(range(20))
+
+
+def test_ignora_linhas_corrompidas_e_ficheiro_inexistente(tmp_path):
+    caminho = tmp_path / "historico.jsonl"
+    assert list(iterar_historico(caminho)) == []
+    caminho.write_text('{"n": 1}\n\n{"n": 2, "meia linha\n{"n": 3}\n', encoding="utf-8")
+    assert [e["n"] for e in iterar_historico(caminho)] == [1, 3]
+
+
+def test_migra_json_antigo_antes_das_entradas_novas(tmp_path):
+    antigo = tmp_path / "velvet_respostas.json"
+    destino = tmp_path / "velvet_respostas.jsonl"
+    antigo.write_text(json.dumps([{"n": 1}, {"n": 2}]), encoding="utf-8")
+    registar_interacao({"n": 3}, destino)
+
+    assert migrar_historico_json(antigo, destino) == 2
+    assert [e["n"] for e in iterar_historico(destino)] == [1, 2, 3]
+    assert not antigo.exists()
+    assert (tmp_path / "velvet_respostas.json.migrado").exists()
+    assert migrar_historico_json(antigo, destino) == 0
@@ -0,0 +1,90 @@
+# ============================================================
+# test_import_time.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Garantir que importar os módulos do projeto não carrega modelos.
+#
+# 🔹 Cada módulo é importado num processo Python novo (sem cache)
+# 🔹 Falha se o import demorar mais que IMPORT_TIME_BUDGET segundos
+# 🔹 Verifica também o arranque de `cli_interface --help`
+# 🔹 Orçamento configurável pela variável de ambiente IMPORT_TIME_BUDGET
+# ============================================================
+
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+RAIZ_PROJETO = Path(__file__).resolve().parent.parent
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+PACOTES_DO_PROJETO = {"config", "models", "controllers", "views", "tests"}
+
+MODULOS = [
+    "config",
+    "models.tradutor_local",
+    "models.rag_engine",
+    "models.velvet_runner",
+    "models.rag_library_manager",
+    "controllers.logger",
+    "controllers.chatbot_engine",
+    "controllers.chatbot_controller",
+    "controllers.llm_local",
+    "controllers.cliente_inferencia",
+    # Pontos de entrada das interfaces
+    "views.interface",
+    "views.cli_interface",
+    "views.discord_interface",
+]
+
+# Mede só o import (exclui o arranque do interpretador)
+# O nome do módulo sai do sys.argv antes do import (o cli_interface faz parse_args ao importar)
+CODIGO_MEDICAO = (
+    "import importlib, sys, time\n"
+    "modulo = sys.argv.pop(1)\n"
+    "inicio = time.perf_counter()\n"
+    "importlib.import_module(modulo)\n"
+    "print(time.perf_counter() - inicio)\n"
+)
+
+
+def _saltar_se_dependencia_em_falta(stderr: str):
+    """Salta o teste se faltar uma dependência externa (ex: ambiente sem torch)."""
+    em_falta = re.search(r"No module named '([^'.]+)", stderr)
+    if em_falta and em_falta.group(1) not in PACOTES_DO_PROJETO:
+        pytest.skip(f"Dependência não instalada: {em_falta.group(1)}")
+
+
+@pytest.mark.parametrize("modulo", MODULOS)
+def test_import_dentro_do_orcamento(modulo):
+    proc = subprocess.run(
+        [sys.executable, "-c", CODIGO_MEDICAO, modulo],
+        cwd=RAIZ_PROJETO, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        _saltar_se_dependencia_em_falta(proc.stderr)
+        pytest.fail(f"Import de {modulo} falhou:\n{proc.stderr}")
+
+    duracao = float(proc.stdout.strip().splitlines()[-1])
+    assert duracao < IMPORT_TIME_BUDGET, (
+        f"Import de {modulo} demorou {duracao:.2f}s (orçamento: {IMPORT_TIME_BUDGET:.2f}s)"
+    )
+
+
+def test_cli_help_dentro_do_orcamento():
+    inicio = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "views.cli_interface", "--help"],
+        cwd=RAIZ_PROJETO, capture_output=True, text=True
+    )
+    duracao = time.perf_counter() - inicio
+    if proc.returncode != 0:
+        _saltar_se_dependencia_em_falta(proc.stderr)
+        pytest.fail(f"cli_interface --help falhou:\n{proc.stderr}")
+
+    assert duracao < IMPORT_TIME_BUDGET, (
+        f"cli_interface --help demorou {duracao:.2f}s (orçamento: {IMPORT_TIME_BUDGET:.2f}s)"
+    )
@@ -0,0 +1,55 @@
+# ============================================================
+# test_logger.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a escrita de logs em segundo plano (controllers/logger.py).
+#
+# 🔹 As linhas só chegam ao disco no flush/intervalo, pela ordem de chegada
+# 🔹 LOG_FLUSH_LINHAS em espera ➜ escrita sem esperar pelo intervalo
+# 🔹 Várias linhas para vários ficheiros no mesmo lote
+# ============================================================
+
+import time
+
+from controllers.logger import EscritorEmFundo
+
+
+def _esperar_ficheiro(caminho, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while not caminho.exists() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return caminho.exists()
+
+
+def test_flush_escreve_tudo_por_ordem(tmp_path):
+    escritor = EscritorEmFundo(intervalo=30, max_linhas=1000)
+    metricas = tmp_path / "metrics" / "velvet_metrics.jsonl"
+    eventos = tmp_path / "velvet_logs.txt"
+    for i in range(50):
+        escritor.escrever(str(metricas), f"{i}\n")
+        escritor.escrever(str(eventos), f"evento {i}\n")
+    assert not metricas.exists()   # ainda dentro do intervalo
+
+    escritor.flush()
+    assert metricas.read_text(encoding="utf-8").splitlines() == [str(i) for i in range(50)]
+    assert len(eventos.read_text(encoding="utf-8").splitlines()) == 50
+
+
+def test_limite_de_linhas_escreve_sem_esperar_pelo_intervalo(tmp_path):
+    escritor = EscritorEmFundo(intervalo=30, max_linhas=3)
+    caminho = tmp_path / "velvet_logs.txt"
+    for i in range(3):
+        escritor.escrever(str(caminho), f"{i}\n")
+    assert _esperar_ficheiro(caminho)
+    assert caminho.read_text(encoding="utf-8") == "0\n1\n2\n"
+
+
+def test_flush_sem_linhas_nao_bloqueia(tmp_path):
+    escritor = EscritorEmFundo(intervalo=30, max_linhas=10)
+    inicio = time.monotonic()
+    escritor.flush()
+    escritor.escrever(str(tmp_path / "a.txt"), "x\n")
+    escritor.flush()
+    escritor.flush()
+    assert time.monotonic() - inicio < 2.0
+    assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "x\n"
@@ -0,0 +1,57 @@
+# ============================================================
+# test_memoria_respostas.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a memória de respostas do Mini LLM Local (models/memoria_respostas.py).
+#
+# 🔹 Guardar, substituir e reler entradas (SQLite)
+# 🔹 Migração do JSON antigo (lista ou dicionário)
+# ============================================================
+
+import json
+
+import pytest
+
+from models.memoria_respostas import MemoriaRespostas
+
+
+def normalizar(pergunta):
+    return pergunta.lower().strip(" ?")
+
+
+@pytest.fixture
+def caminhos(tmp_path):
+    return str(tmp_path / "memoria.sqlite3"), str(tmp_path / "respostas_memoria.json")
+
+
+def test_guardar_substituir_e_reabrir(caminhos):
+    db, json_antigo = caminhos
+    memoria = MemoriaRespostas(normalizar, caminho=db, json_antigo=json_antigo)
+    memoria.guardar("o que é uml", "UML é...", 0.5, "uml.pdf", 3, timestamp="2025-01-01 10:00:00")
+    memoria.guardar("o que é uml", "UML é uma linguagem", 0.9, "uml.pdf", 4)
+
+    reaberta = MemoriaRespostas(normalizar, caminho=db, json_antigo=json_antigo)
+    assert len(reaberta) == 1
+    assert "o que é uml" in reaberta
+    entrada = reaberta.get("o que é uml")
+    assert (entrada["contexto"], entrada["score"], entrada["pagina"]) == ("UML é uma linguagem", 0.9, "4")
+    assert reaberta.get("outra") is None
+
+
+@pytest.mark.parametrize("formato", ["lista", "dicionario"])
+def test_migra_json_antigo(caminhos, formato):
+    db, json_antigo = caminhos
+    if formato == "lista":
+        dados = [{"pergunta": "O que é UML?", "contexto": "UML é...", "score": 0.7,
+                  "fonte": "uml.pdf", "pagina": 2, "data": "2024-05-01 09:00:00"}]
+    else:
+        dados = {"o que é uml": {"contexto": "UML é...", "score": 0.7, "fonte": "uml.pdf",
+                                 "pagina": 2, "timestamp": "2024-05-01 09:00:00"}}
+    with open(json_antigo, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+
+    memoria = MemoriaRespostas(normalizar, caminho=db, json_antigo=json_antigo)
+    assert memoria.get("o que é uml") == {"contexto": "UML é...", "score": 0.7, "fonte": "uml.pdf",
+                                          "pagina": "2", "timestamp": "2024-05-01 09:00:00"}
+    # Já migrado: reabrir não duplica nem volta a ler o JSON
+    assert len(MemoriaRespostas(normalizar, caminho=db, json_antigo=json_antigo)) == 1
@@ -0,0 +1,89 @@
+# ============================================================
+# test_rag_library_manager.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar o update incremental do RAGLibraryManager sem modelos.
+#
+# 🔹 Load/split e escrita na Chroma substituídos por versões simples
+# 🔹 Ficheiros novos têm de ser indexados no 1º update
+# 🔹 Updates seguidos sem alterações não voltam a ler nada
+# 🔹 Batches já escritos publicados a cada `publicar_batches`
+# ============================================================
+
+from types import SimpleNamespace
+
+import pytest
+
+from models.rag_library_manager import RAGLibraryManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    m = RAGLibraryManager(documents_path=str(docs), chroma_path=str(tmp_path / "chroma"), workers=1)
+    m.lidos = []
+
+    def iter_files(paths):
+        for path in paths:
+            m.lidos.append(path)
+            with open(path, encoding="utf-8") as f:
+                texto = f.read()
+            yield path, [], [SimpleNamespace(page_content=texto, metadata={"source": path})]
+
+    def open_db():
+        raise AssertionError("Não devia abrir a Chroma (nada a apagar)")
+
+    monkeypatch.setattr(m, "_iter_files", iter_files)
+    monkeypatch.setattr(m, "_index_chunks", lambda chunks: len(list(chunks)))
+    monkeypatch.setattr(m, "_open_db", open_db)
+    return m
+
+
+def test_update_indexa_ficheiro_novo_e_depois_nada(manager, tmp_path):
+    (tmp_path / "docs" / "a.txt").write_text("Uma classe é um modelo para criar objetos.", encoding="utf-8")
+    manager.update()
+    assert len(manager.lidos) == 1
+
+    novo = tmp_path / "docs" / "b.txt"
+    novo.write_text("Um ator representa um papel externo ao sistema.", encoding="utf-8")
+    manager.update()
+    assert manager.lidos[1:] == [str(novo)]
+
+    indice = manager._load_indexed_docs()
+    assert all(entry["chunks"] for entry in indice.values())
+
+    manager.update()
+    manager.update()
+    assert len(manager.lidos) == 2
+    assert manager._load_indexed_docs() == indice
+
+
+def test_entrada_antiga_sem_chunks_conta_como_alterada(manager, tmp_path):
+    caminho = tmp_path / "docs" / "a.txt"
+    caminho.write_text("Texto de um ficheiro indexado por uma versão antiga.", encoding="utf-8")
+    estado = manager._file_state(str(caminho))
+    assert "chunks" not in estado
+    assert manager._file_state(str(caminho), estado) is None
+
+
+def test_indexacao_publica_batches_durante_a_ingestao(tmp_path, monkeypatch):
+    m = RAGLibraryManager(documents_path=str(tmp_path / "docs"), chroma_path=str(tmp_path / "chroma"),
+                          workers=1, batch_size=2, publicar_batches=2)
+    escritos, publicados = [], []
+
+    class ChromaFalsa:
+        def add_texts(self, textos, metadatas=None, ids=None):
+            escritos.extend(ids)
+
+        def persist(self):
+            pass
+
+    monkeypatch.setattr(m, "_open_db", ChromaFalsa)
+    monkeypatch.setattr(m, "_annotate_chunks", lambda batch: None)
+    monkeypatch.setattr(m, "_embed_batch", lambda batch: [[0.0]] * len(batch))
+    monkeypatch.setattr(m, "_publicar_parcial", lambda: publicados.append(len(escritos)))
+
+    chunks = [SimpleNamespace(page_content=f"chunk {i}", metadata={}) for i in range(9)]
+    assert m._index_chunks(chunks) == 9
+    assert publicados == [4, 8]     # 5 batches: publicado após o 2º e o 4º
@@ -5,7 +5,7 @@
 # Este script analisa o histórico de respostas do chatbot Velvet-2B.
 #
 # Funcionalidades:
-# 🔹 Carrega e processa o ficheiro `velvet_respostas.json`
+# 🔹 Lê o histórico `velvet_respostas.jsonl` entrada a entrada (streaming)
 # 🔹 Calcula métricas: tempo, validade, número de tokens e documentos
 # 🔹 Identifica e guarda respostas inválidas
 # 🔹 Gera relatórios em CSV, JSON e Markdown
@@ -13,29 +13,28 @@
 # ============================================================
 
 import json
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 from collections import Counter
 from pathlib import Path
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.historico import iterar_historico
 
-# Diretórios de entrada e saída (ajustados para uso local)
-entrada_json = Path("data/respostas/velvet_respostas.json")
+
+# Diretório de saída (ajustado para uso local)
 saida_dir = Path("tests/relatorios")
 saida_dir.mkdir(parents=True, exist_ok=True)
 
-
-# Leitura do JSON de respostas
-with open(entrada_json, 'r', encoding='utf-8') as f:
-    respostas = json.load(f)
-
 # Inicializar listas para o DataFrame
 dados_metricas = []
 respostas_invalidas = []
 frequencia_perguntas = Counter()
 
 # Processamento de cada entrada
-for entrada in respostas:
+for entrada in iterar_historico():
     pergunta = entrada.get("pergunta_original", "").strip()
     resposta = entrada.get("resposta_pt", "").strip()
     tempo = entrada.get("tempo_execucao", 0)
@@ -85,7 +84,7 @@ plt.savefig(grafico_path)
 relatorio_md = saida_dir / "relatorio_respostas.md"
 with open(relatorio_md, "w", encoding="utf-8") as f_md:
     f_md.write("# Relatório de Respostas do Chatbot Velvet-2B\n\n")
-    f_md.write("Este relatório foi gerado automaticamente com base no histórico de respostas guardado no ficheiro `velvet_respostas.json`.\n\n")
+    f_md.write("Este relatório foi gerado automaticamente com base no histórico de respostas guardado no ficheiro `velvet_respostas.jsonl`.\n\n")
     f_md.write("## Top 10 Perguntas Mais Frequentes\n\n")
     f_md.write(top_perguntas.to_markdown(index=False))
     f_md.write("\n\n![Gráfico](grafico_perguntas_frequentes.png)\n\n")
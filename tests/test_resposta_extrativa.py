@@ -0,0 +1,49 @@
+# ============================================================
+# test_resposta_extrativa.py - Duarte Grilo 2201320 - Projeto Informático
+# ============================================================
+# Objetivo:
+# Testar a resposta extrativa do chatbot_controller (sem modelos).
+#
+# 🔹 Abaixo do limiar ➜ None (a pergunta segue para o Velvet)
+# 🔹 Só chunks com padrão de definição
+# 🔹 Usa o melhor chunk que entrou no contexto, com fonte e página
+# ============================================================
+
+from types import SimpleNamespace
+
+from controllers.chatbot_controller import resposta_extrativa
+
+DEFINICAO = (
+    "Um ator é um papel desempenhado por uma entidade externa ao sistema. "
+    "Os diagramas mostram vários elementos. "
+    "O ator interage com os casos de uso."
+)
+
+
+def _doc(texto, source="docs/uml/capitulo2.pdf", page=7):
+    return SimpleNamespace(page_content=texto, metadata={"texto_limpo": texto, "source": source, "page": page})
+
+
+def test_abaixo_do_limiar_nao_responde():
+    assert resposta_extrativa("O que é um ator?", [(_doc(DEFINICAO), 7.9)], limiar=8.0) is None
+    assert resposta_extrativa("O que é um ator?", [], limiar=8.0) is None
+
+
+def test_sem_padrao_de_definicao_nao_responde():
+    texto = "Os diagramas UML mostram vários elementos ligados entre si por setas e linhas."
+    assert resposta_extrativa("O que mostram os diagramas?", [(_doc(texto), 9.5)], limiar=8.0) is None
+
+
+def test_frases_relevantes_com_fonte_e_pagina():
+    resposta = resposta_extrativa("O que é um ator?", [(_doc(DEFINICAO), 9.0)], limiar=8.0, max_frases=2)
+    assert resposta == (
+        "Um ator é um papel desempenhado por uma entidade externa ao sistema. "
+        "O ator interage com os casos de uso."
+        "\n\n📄 Fonte: capitulo2.pdf (pág. 7)"
+    )
+
+
+def test_usa_o_melhor_chunk_selecionado():
+    fraco = _doc("Uma classe é um modelo para criar objetos com atributos e métodos.", source="outro.pdf", page=1)
+    selecionados = [(fraco, 8.5), (_doc(DEFINICAO), 9.2)]
+    assert "Fonte: capitulo2.pdf (pág. 7)" in resposta_extrativa("O que é um ator?", selecionados, limiar=8.0)
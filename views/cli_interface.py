@@ -3,10 +3,12 @@
 # ============================================================
 # Objetivo:
 # 🔹 _Interface assíncrona por linha de comandos (CLI) para o chatbot
-# 🔹 Suporte a argumentos de linha de comandos (--debug, --simple)
+# 🔹 Suporte a argumentos de linha de comandos (--simple)
 # 🔹 Apresentação colorida com Colorama (compatível com Windows)
 # 🔹 Utiliza asyncio para interações não bloqueantes
-# 🔹 Integra-se com o controlador principal do chatbot
+# 🔹 Cliente do servidor de inferência local (os modelos não são carregados aqui)
+#     - Os prints de debug do pipeline ficam no log do servidor
+# 🔹 Resposta mostrada em streaming, frase a frase, enquanto o Velvet gera
 # 🔹 Histórico de sessão disponível por comando especial (!historico)
 # 🔹 Ajuda disponível (!ajuda)
 # 🔹 Operaçáo amigável de Ctrl+C
@@ -22,12 +24,11 @@ from colorama import Fore, init
 init(autoreset=True)
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from controllers.chatbot_controller import process_user_input
+from controllers.cliente_inferencia import perguntar, SERVIDOR_LOG
 
 # Argumentos da linha de comandos
 parser = argparse.ArgumentParser(description="Chatbot CLI com Velvet-2B")
-parser.add_argument('--debug', action='store_true', help='Ativar modo de debug completo')
-parser.add_argument('--simple', action='store_true', help='Mostrar apenas a resposta final')
+parser.add_argument('--simple', action='store_true', help='Mostrar apenas a resposta final (sem métricas)')
 args = parser.parse_args()
 
 INSTRUCOES = f"""{Fore.MAGENTA}
@@ -38,8 +39,9 @@ Comandos especiais:
   {Fore.YELLOW}sair{Fore.MAGENTA}        ➔ Termina o chat
 
 Opções:
-  {Fore.YELLOW}--debug{Fore.MAGENTA}   ➔ Ativa modo de debug detalhado
-  {Fore.YELLOW}--simple{Fore.MAGENTA}  ➔ Só mostra resposta final (ignora prints intermédios)
+  {Fore.YELLOW}--simple{Fore.MAGENTA}  ➔ Só mostra a resposta final (sem métricas)
+
+Debug (contexto, prompt, resposta bruta): {SERVIDOR_LOG}
 
 Comece a conversar! (Ctrl+C para sair a qualquer momento)
 """
@@ -72,29 +74,38 @@ async def chat():
                         print(Fore.GREEN + f"   Resposta: {r}\n")
                 continue
 
-            if args.debug:
-                resposta = await asyncio.to_thread(process_user_input, pergunta)
-            else:
-                from contextlib import redirect_stdout
-                import io
-                buffer = io.StringIO()
-                with redirect_stdout(buffer):
-                    resposta = await asyncio.to_thread(process_user_input, pergunta)
+            # Frases impressas à medida que chegam
+            inicio_stream = [True]
+
+            def mostrar_frase(frase):
+                if inicio_stream[0]:
+                    sys.stdout.write(Fore.GREEN + "\nResposta: ")
+                    inicio_stream[0] = False
+                sys.stdout.write(Fore.GREEN + frase)
+                sys.stdout.flush()
+
+            resposta = await asyncio.to_thread(perguntar, pergunta, mostrar_frase)
 
             # Apresentação da resposta e métricas
             if isinstance(resposta, dict):
-                print(Fore.GREEN + f"\nResposta: {resposta.get('resposta_pt', '')}")
+                if resposta.get("transmitida"):
+                    print()
+                else:
+                    if not inicio_stream[0]:
+                        print(Fore.RED + "\n[Aviso] A resposta acima não passou a validação.")
+                    print(Fore.GREEN + f"\nResposta: {resposta.get('resposta_pt', '')}")
             else:
                 print(Fore.GREEN + f"\nResposta: {resposta}")
 
-            # Mostrar métricas se existirem
-            if isinstance(resposta, dict):
-                print(Fore.CYAN + "\n--- Métricas da Resposta ---")
-                print(f"Tempo de execução: {resposta.get('tempo_execucao', 0):.2f} segundos")
-                print(f"Número de tokens na resposta: {resposta.get('resposta_tokens', 'N/A')}")
-                print(f"Validação por palavras-chave: {'✅ Sim' if resposta.get('validacao_keywords') else '❌ Não'}")
-            else:
-                print(Fore.RED + "\n[Aviso] Estrutura inesperada da resposta – não foi possível mostrar métricas.")
+            # Mostrar métricas se existirem (exceto em modo --simple)
+            if not args.simple:
+                if isinstance(resposta, dict):
+                    print(Fore.CYAN + "\n--- Métricas da Resposta ---")
+                    print(f"Tempo de execução: {resposta.get('tempo_execucao', 0):.2f} segundos")
+                    print(f"Número de tokens na resposta: {resposta.get('resposta_tokens', 'N/A')}")
+                    print(f"Validação por palavras-chave: {'✅ Sim' if resposta.get('validacao_keywords') else '❌ Não'}")
+                else:
+                    print(Fore.RED + "\n[Aviso] Estrutura inesperada da resposta – não foi possível mostrar métricas.")
 
             resposta_final = resposta.get('resposta_pt', resposta) if isinstance(resposta, dict) else resposta
             historico.append((pergunta, resposta_final))
@@ -4,7 +4,12 @@
 # Objetivo:
 # 🔹 Integrar o chatbot com o Discord _através de um _bot_
 # 🔹 Responder a mensagens que comecem por um prefixo (!)
-# 🔹 Utiliza asyncio e threading para chamadas ao controlador
+# 🔹 Utiliza asyncio e threading para chamadas ao servidor de inferência local
+# 🔹 Resposta em streaming: a mensagem de estado é editada com as frases
+#     já traduzidas, no máximo uma vez a cada EDICAO_INTERVALO segundos
+# 🔹 Controlo de admissão: fila limitada, MAX_CONCORRENTES perguntas em paralelo,
+#     limite de pedidos por utilizador e mensagem com a posição na fila
+#     (atualizada no máximo a cada POSICOES_INTERVALO segundos)
 # 🔹 Divide mensagens longas em vários envios
 # 🔹 Usa reações (_emoji_) para estado
 # 🔹 Usa commands._Bot_ para fácil expansão de comandos
@@ -15,13 +20,15 @@
 import discord
 from discord.ext import commands
 import asyncio
+import time
+from collections import defaultdict, deque
 from dotenv import load_dotenv
 import sys
 import os
 import logging
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from controllers.chatbot_controller import process_user_input
+from controllers.cliente_inferencia import perguntar
 
 # Logger simples para auditoria
 logging.basicConfig(
@@ -35,6 +42,11 @@ DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
 COMMAND_PREFIX = "!"
 MAX_DISCORD_LENGTH = 1900  # margem para não rebentar limite de 2000 chars
+EDICAO_INTERVALO = 1.5     # segundos entre edições da resposta parcial (rate limit do Discord)
+MAX_CONCORRENTES = int(os.getenv("DISCORD_MAX_CONCORRENTES", "2"))  # perguntas processadas em simultâneo
+MAX_FILA = int(os.getenv("DISCORD_MAX_FILA", "10"))                # perguntas à espera antes de rejeitar
+PEDIDOS_POR_MINUTO = int(os.getenv("DISCORD_PEDIDOS_POR_MINUTO", "3"))  # por utilizador
+POSICOES_INTERVALO = 5.0   # segundos entre atualizações das posições na fila (agrupa várias saídas)
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -44,8 +56,14 @@ bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
 
 @bot.event
 async def on_ready():
+    global fila_pedidos
     print(f'✅ Bot conectado como {bot.user}')
     logging.info(f'Bot iniciado como {bot.user}')
+    # on_ready pode repetir-se após reconexões: os trabalhadores só arrancam uma vez
+    if fila_pedidos is None:
+        fila_pedidos = asyncio.Queue(maxsize=MAX_FILA)
+        for _ in range(MAX_CONCORRENTES):
+            asyncio.create_task(trabalhador())
 
 
 def dividir_mensagem(texto, max_length=MAX_DISCORD_LENGTH):
@@ -74,18 +92,171 @@ async def ajuda(ctx):
     await ctx.send(msg)
 
 
+async def responder(message, conteudo, status_msg):
+    """Processa uma pergunta já admitida, editando a mensagem de estado em streaming."""
+    try:
+        await status_msg.add_reaction("🤖")
+    except Exception:
+        pass
+
+    try:
+        await status_msg.edit(content="🤖 A pensar...")
+        # As frases chegam numa thread de trabalho; list.append é seguro entre threads
+        frases = []
+        tarefa = asyncio.ensure_future(asyncio.to_thread(perguntar, conteudo, frases.append))
+        mostrado = ""
+        while not tarefa.done():
+            await asyncio.wait({tarefa}, timeout=EDICAO_INTERVALO)
+            parcial = "".join(frases)
+            if parcial and parcial != mostrado and not tarefa.done():
+                await status_msg.edit(content="📌 Resposta:\n" + dividir_mensagem(parcial)[0] + " ✍️")
+                mostrado = parcial
+
+        resposta = tarefa.result()
+        if isinstance(resposta, dict):
+            texto = resposta.get("resposta_pt", "❌ Erro: resposta mal formatada.")
+        else:
+            texto = resposta
+
+        # Divide resposta longa: a 1ª parte substitui a mensagem de estado, as restantes são enviadas
+        partes = dividir_mensagem(str(texto))
+        for idx, parte in enumerate(partes):
+            prefixo = f"📌 Resposta (Parte {idx+1}/{len(partes)}):\n" if len(partes) > 1 else "📌 Resposta:\n"
+            if idx == 0:
+                await status_msg.edit(content=prefixo + parte)
+            else:
+                await message.channel.send(prefixo + parte)
+
+        logging.info(f"Respondido para {message.author}: {texto[:200]}...")
+
+    except Exception as e:
+        logging.error(f"Erro ao processar de {message.author}: {e}")
+        try:
+            await message.channel.send("❌ Erro ao processar a pergunta.")
+            await status_msg.add_reaction("❌")
+        except Exception:
+            pass
+
+    try:
+        await status_msg.clear_reactions()
+    except Exception:
+        pass
+
+
+# ========== Controlo de admissão ==========
+# Fila limitada, N perguntas em simultâneo e limite de pedidos por utilizador
+fila_pedidos = None           # asyncio.Queue criada no on_ready (precisa do event loop do bot)
+pedidos_em_espera = []        # PedidoDiscord pela ordem de chegada
+utilizadores_com_pedido = set()
+historico_pedidos = defaultdict(deque)  # id do utilizador ➜ instantes dos últimos pedidos
+
+
+class PedidoDiscord:
+    """Pergunta admitida na fila; a mensagem de estado é anexada depois de enviada."""
+
+    def __init__(self, message, conteudo):
+        self.message = message
+        self.conteudo = conteudo
+        self.status_msg = None
+        self.posicao_mostrada = None
+        self.status_pronto = asyncio.Event()
+
+    def anexar_status(self, status_msg, posicao=None):
+        self.status_msg = status_msg
+        self.posicao_mostrada = posicao
+        self.status_pronto.set()
+
+
+def excede_limite_utilizador(user_id) -> bool:
+    agora = time.monotonic()
+    pedidos = historico_pedidos[user_id]
+    while pedidos and agora - pedidos[0] > 60:
+        pedidos.popleft()
+    if len(pedidos) >= PEDIDOS_POR_MINUTO:
+        return True
+    pedidos.append(agora)
+    return False
+
+
+def admitir_pedido(message, conteudo):
+    """
+    Verifica e reserva o lugar na fila sem nenhum await pelo meio
+    (outra mensagem não pode ser admitida entre a verificação e a reserva).
+    Devolve (pedido, None) se admitido ou (None, mensagem de rejeição).
+    """
+    user_id = message.author.id
+    if user_id in utilizadores_com_pedido:
+        return None, "⏳ Já tens uma pergunta em processamento. Aguarda a resposta."
+    if fila_pedidos is None or fila_pedidos.full():
+        logging.info(f"Rejeitado (fila cheia): {message.author}")
+        return None, "🚧 O bot está sobrecarregado neste momento. Tenta novamente dentro de alguns minutos."
+    if excede_limite_utilizador(user_id):
+        logging.info(f"Rejeitado (limite por utilizador): {message.author}")
+        return None, f"🚦 Limite de {PEDIDOS_POR_MINUTO} perguntas por minuto atingido. Tenta daqui a pouco."
+
+    pedido = PedidoDiscord(message, conteudo)
+    utilizadores_com_pedido.add(user_id)
+    pedidos_em_espera.append(pedido)
+    try:
+        fila_pedidos.put_nowait(pedido)
+    except asyncio.QueueFull:
+        # Desfaz a reserva (incluindo o pedido contado no limite por minuto)
+        utilizadores_com_pedido.discard(user_id)
+        pedidos_em_espera.remove(pedido)
+        historico_pedidos[user_id].pop()
+        return None, "🚧 O bot está sobrecarregado neste momento. Tenta novamente dentro de alguns minutos."
+    return pedido, None
+
+
+_posicoes_agendadas = False
+
+
+def agendar_atualizacao_posicoes():
+    """Atualiza as posições no máximo uma vez a cada POSICOES_INTERVALO segundos."""
+    global _posicoes_agendadas
+    if not _posicoes_agendadas:
+        _posicoes_agendadas = True
+        asyncio.create_task(atualizar_posicoes())
+
+
+async def atualizar_posicoes():
+    global _posicoes_agendadas
+    await asyncio.sleep(POSICOES_INTERVALO)
+    _posicoes_agendadas = False
+    # Só edita as mensagens cuja posição mudou desde a última edição
+    for posicao, pedido in enumerate(list(pedidos_em_espera), start=1):
+        if pedido.status_msg is None or pedido.posicao_mostrada == posicao:
+            continue
+        try:
+            await pedido.status_msg.edit(content=f"🕒 Na fila (posição {posicao})...")
+            pedido.posicao_mostrada = posicao
+        except Exception:
+            pass
+
+
+async def trabalhador():
+    while True:
+        pedido = await fila_pedidos.get()
+        pedidos_em_espera.remove(pedido)
+        try:
+            agendar_atualizacao_posicoes()
+            await pedido.status_pronto.wait()
+            if pedido.status_msg is not None:
+                await responder(pedido.message, pedido.conteudo, pedido.status_msg)
+        except Exception:
+            # Um erro do Discord (ex: mensagem apagada) não pode matar o trabalhador
+            logging.exception(f"Erro no trabalhador ao responder a {pedido.message.author}")
+        finally:
+            utilizadores_com_pedido.discard(pedido.message.author.id)
+            fila_pedidos.task_done()
+
+
 @bot.event
 async def on_message(message):
     if message.author == bot.user:
         return
 
     if message.content.startswith(COMMAND_PREFIX):
-        # Reage para indicar que recebeu e _está a processar
-        try:
-            await message.add_reaction("👀")
-        except Exception:
-            pass
-
         conteudo = message.content[len(COMMAND_PREFIX):].strip()
         logging.info(f"Recebido de {message.author}: {conteudo}")
 
@@ -94,41 +265,27 @@ async def on_message(message):
             await bot.process_commands(message)
             return
 
-        # Mensagem de estado
-        status_msg = await message.channel.send("🤖 A pensar...")
+        # Rejeições rápidas: não ocupam a fila nem o modelo
+        pedido, rejeicao = admitir_pedido(message, conteudo)
+        if rejeicao:
+            await message.reply(rejeicao)
+            return
 
+        # Reage para indicar que recebeu e _está na fila
         try:
-            await status_msg.add_reaction("🤖")
+            await message.add_reaction("👀")
         except Exception:
             pass
 
+        status_msg = None
+        posicao = pedidos_em_espera.index(pedido) + 1 if pedido in pedidos_em_espera else 1
         try:
-            resposta = await asyncio.to_thread(process_user_input, conteudo)
-            if isinstance(resposta, dict):
-                texto = resposta.get("resposta", "❌ Erro: resposta mal formatada.")
-            else:
-                texto = resposta
-
-            # Divide resposta longa e envia em partes
-            partes = dividir_mensagem(str(texto))
-            for idx, parte in enumerate(partes):
-                prefixo = f"📌 Resposta (Parte {idx+1}/{len(partes)}):\n" if len(partes) > 1 else "📌 Resposta:\n"
-                await message.channel.send(prefixo + parte)
-
-            logging.info(f"Respondido para {message.author}: {texto[:200]}...")
-
+            status_msg = await message.channel.send(f"🕒 Na fila (posição {posicao})...")
         except Exception as e:
-            await message.channel.send("❌ Erro ao processar a pergunta.")
-            try:
-                await status_msg.add_reaction("❌")
-            except Exception:
-                pass
-            logging.error(f"Erro ao processar de {message.author}: {e}")
-
-        try:
-            await status_msg.clear_reactions()
-        except Exception:
-            pass
+            logging.error(f"Erro ao enviar mensagem de estado para {message.author}: {e}")
+        # Sem mensagem de estado o trabalhador descarta o pedido (e liberta o utilizador)
+        pedido.anexar_status(status_msg, posicao)
+        return
 
     # Permite comandos funcionarem
     await bot.process_commands(message)
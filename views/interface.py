@@ -21,7 +21,6 @@ import platform
 from datetime import datetime
 import threading
 import json
-from models.rag_library_manager import RAGLibraryManager
 
 
 # ========== Strings para Internacionalização ==========
@@ -36,7 +35,7 @@ STRINGS = {
     "test": "Gerar Respostas de Teste",
     "metrics": "Avaliar Métricas",
     "files": "FICHEIROS",
-    "open_json": "Abrir velvet_respostas.json",
+    "open_json": "Abrir velvet_respostas.jsonl",
     "open_csv": "Abrir Relatório Comparativo (.csv)",
     "open_log": "Abrir Log do Painel",
     "config": "Configurações",
@@ -59,7 +58,7 @@ STRINGS = {
     "tooltip_rag": "Abrir gestor da biblioteca vetorial RAG.",
     "tooltip_test": "Executa testes automáticos (gera respostas de teste).",
     "tooltip_metrics": "Abre o painel de avaliação de métricas.",
-    "tooltip_json": "Abre o ficheiro velvet_respostas.json para consulta.",
+    "tooltip_json": "Abre o ficheiro velvet_respostas.jsonl para consulta.",
     "tooltip_csv": "Abre um ficheiro .csv de comparação de respostas.",
     "tooltip_log": "Abre o ficheiro de log do painel de controlo.",
     "tooltip_config": "Abrir janela de configurações (paths e preferências).",
@@ -82,7 +81,7 @@ DEFAULT_CONFIG = {
         "logo": "assets/logoUAb.png",
     },
     "DATA_PATHS": {
-        "respostas_json": "data/respostas/velvet_respostas.json",
+        "respostas_json": "data/respostas/velvet_respostas.jsonl",
         "data_dir": "data",
     },
     "LOG_PATH": "logs/painel_log.txt"
@@ -235,8 +234,8 @@ def open_respostas_json():
     if not validar_arquivo(caminho, STRINGS["open_json"]):
         return
     abrir_ficheiro(caminho)
-    salvar_log("Arquivo velvet_respostas.json aberto.")
-    atualizar_status("Arquivo velvet_respostas.json aberto.")
+    salvar_log("Arquivo velvet_respostas.jsonl aberto.")
+    atualizar_status("Arquivo velvet_respostas.jsonl aberto.")
 
 
 def open_csv_comparativo():
@@ -295,6 +294,8 @@ def open_log():
 
 
 def abrir_rag_library_manager():
+    # Import tardio: o painel abre sem carregar langchain/modelos
+    from models.rag_library_manager import RAGLibraryManager
 
     janela = tk.Toplevel(root)
     janela.title("Gestão Biblioteca RAG")
@@ -389,10 +390,10 @@ def open_config():
 # ========== GUI ==========
 
 
-root = tk.Tk()
-root.title(STRINGS["title"])
-root.geometry("700x760")
-root.minsize(700, 800)
+# A janela só é criada em criar_janela(), no arranque do painel: importar este
+# módulo (ex: processos filhos do multiprocessing) não abre uma janela Tk.
+root = None
+status_texto = None
 
 
 # Variáveis globais para imagens
@@ -422,29 +423,12 @@ def load_logo():
         logo_label.image = logo_photo
         logo_label.grid(row=0, column=0, columnspan=3, pady=10)
 
-# ========== Estilização ==========
-
-
-style = ttk.Style()
-style.theme_use("default")
-style.configure("TButton", font=("Arial", 10), padding=(1, 1), background="#d9eaff", foreground="black", borderwidth=2)
-style.map("TButton", background=[("active", "#b3d1ff")], foreground=[("active", "black")])
-style.configure("Title.TLabel", font=("Arial", 12, "bold"), background="#ffffff")
-style.configure("Danger.TButton", foreground="white", background="#e57373")
-style.map("Danger.TButton", background=[("active", "#c62828")])
-
 # ========== Barra de status ==========
-status_texto = tk.StringVar()
 
 
 def atualizar_status(msg: str):
     status_texto.set(f"{msg} | {datetime.now():%d/%m/%Y %H:%M}")
 
-
-atualizar_status(STRINGS["status_ready"])
-status_bar = tk.Label(root, textvariable=status_texto, bd=1, relief="sunken", anchor="w", font=("Arial", 9), bg="#eeeeee")
-status_bar.grid(row=99, column=0, columnspan=3, sticky="we")
-
 # ========== Tooltips ==========
 
 
@@ -464,95 +448,118 @@ def add_tooltip(widget, text):
     widget.bind("<Enter>", show_tip)
     widget.bind("<Leave>", hide_tip)
 
-# ========== Layout principal (grid) ==========
+# ========== Função de fecho seguro ==========
+
 
+def on_exit():
+    if messagebox.askokcancel(STRINGS["exit"], STRINGS["confirm_exit"]):
+        root.destroy()
 
-main_frame = tk.Frame(root, bg="#ffffff", width=400)
-main_frame.grid(row=1, column=0, pady=10)
+# ========== Janela principal ==========
 
-# INTERFACES
-ttk.Label(main_frame, text=STRINGS["interfaces"], style="Title.TLabel").grid(row=0, column=0, pady=5, sticky="w")
-btn_cli = ttk.Button(main_frame, text=STRINGS["cli"], width=32, command=run_cli)
-btn_cli.grid(row=1, column=0, pady=0, sticky="ew")
-add_tooltip(btn_cli, STRINGS["tooltip_cli"])
-root.bind_all('<Alt-c>', run_cli)
 
-btn_gui = ttk.Button(main_frame, text=STRINGS["gui_local"], width=32, command=run_llm_local_gui)
-btn_gui.grid(row=2, column=0, pady=2, sticky="ew")
-add_tooltip(btn_gui, STRINGS["tooltip_gui"])
+def criar_janela():
+    """Cria a janela principal do painel: estilos, barra de status, botões e imagens."""
+    global root, status_texto
+    root = tk.Tk()
+    root.title(STRINGS["title"])
+    root.geometry("700x760")
+    root.minsize(700, 800)
 
-btn_discord = ttk.Button(main_frame, text=STRINGS["discord"], width=32, command=run_discord)
-btn_discord.grid(row=3, column=0, pady=2, sticky="ew")
-add_tooltip(btn_discord, STRINGS["tooltip_discord"])
+    # Estilização
+    style = ttk.Style()
+    style.theme_use("default")
+    style.configure("TButton", font=("Arial", 10), padding=(1, 1), background="#d9eaff", foreground="black", borderwidth=2)
+    style.map("TButton", background=[("active", "#b3d1ff")], foreground=[("active", "black")])
+    style.configure("Title.TLabel", font=("Arial", 12, "bold"), background="#ffffff")
+    style.configure("Danger.TButton", foreground="white", background="#e57373")
+    style.map("Danger.TButton", background=[("active", "#c62828")])
 
-# PROCESSAMENTO
-ttk.Label(main_frame, text=STRINGS["processing"], style="Title.TLabel").grid(row=4, column=0, pady=(20, 5), sticky="ew")
+    # Barra de status
+    status_texto = tk.StringVar()
+    atualizar_status(STRINGS["status_ready"])
+    status_bar = tk.Label(root, textvariable=status_texto, bd=1, relief="sunken", anchor="w", font=("Arial", 9), bg="#eeeeee")
+    status_bar.grid(row=99, column=0, columnspan=3, sticky="we")
 
-btn_lote = ttk.Button(main_frame, text="Teste em Lote", width=32, command=lambda: executar_script("test_lote", "Teste em Lote"))
-btn_lote.grid(row=5, column=0, pady=2, sticky="ew")
-add_tooltip(btn_lote, "Executa um conjunto fixo de perguntas para testes rápidos")
+    # Layout principal (grid)
+    main_frame = tk.Frame(root, bg="#ffffff", width=400)
+    main_frame.grid(row=1, column=0, pady=10)
 
-btn_rag = ttk.Button(main_frame, text=STRINGS["rag"], width=32, command=abrir_rag_library_manager)
-btn_rag.grid(row=6, column=0, pady=2, sticky="ew")
-add_tooltip(btn_rag, STRINGS["tooltip_rag"])
+    # INTERFACES
+    ttk.Label(main_frame, text=STRINGS["interfaces"], style="Title.TLabel").grid(row=0, column=0, pady=5, sticky="w")
+    btn_cli = ttk.Button(main_frame, text=STRINGS["cli"], width=32, command=run_cli)
+    btn_cli.grid(row=1, column=0, pady=0, sticky="ew")
+    add_tooltip(btn_cli, STRINGS["tooltip_cli"])
+    root.bind_all('<Alt-c>', run_cli)
 
-btn_test = ttk.Button(main_frame, text=STRINGS["test"], width=32, command=run_test_request)
-btn_test.grid(row=7, column=0, pady=2, sticky="ew")
-add_tooltip(btn_test, STRINGS["tooltip_test"])
+    btn_gui = ttk.Button(main_frame, text=STRINGS["gui_local"], width=32, command=run_llm_local_gui)
+    btn_gui.grid(row=2, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_gui, STRINGS["tooltip_gui"])
 
-btn_metrics = ttk.Button(main_frame, text=STRINGS["metrics"], width=32, command=run_metrics)
-btn_metrics.grid(row=8, column=0, pady=2, sticky="ew")
-add_tooltip(btn_metrics, STRINGS["tooltip_metrics"])
+    btn_discord = ttk.Button(main_frame, text=STRINGS["discord"], width=32, command=run_discord)
+    btn_discord.grid(row=3, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_discord, STRINGS["tooltip_discord"])
 
-# FICHEIROS
-ttk.Label(main_frame, text=STRINGS["files"], style="Title.TLabel").grid(row=9, column=0, pady=12, sticky="ew")
+    # PROCESSAMENTO
+    ttk.Label(main_frame, text=STRINGS["processing"], style="Title.TLabel").grid(row=4, column=0, pady=(20, 5), sticky="ew")
 
-btn_json = ttk.Button(main_frame, text=STRINGS["open_json"], width=32, command=open_respostas_json)
-btn_json.grid(row=10, column=0, pady=2, sticky="ew")
-add_tooltip(btn_json, STRINGS["tooltip_json"])
+    btn_lote = ttk.Button(main_frame, text="Teste em Lote", width=32, command=lambda: executar_script("test_lote", "Teste em Lote"))
+    btn_lote.grid(row=5, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_lote, "Executa um conjunto fixo de perguntas para testes rápidos")
 
-btn_csv = ttk.Button(main_frame, text=STRINGS["open_csv"], width=32, command=open_csv_comparativo)
-btn_csv.grid(row=11, column=0, pady=2, sticky="ew")
-add_tooltip(btn_csv, STRINGS["tooltip_csv"])
+    btn_rag = ttk.Button(main_frame, text=STRINGS["rag"], width=32, command=abrir_rag_library_manager)
+    btn_rag.grid(row=6, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_rag, STRINGS["tooltip_rag"])
 
-btn_log = ttk.Button(main_frame, text=STRINGS["open_log"], width=32, command=open_log)
-btn_log.grid(row=12, column=0, pady=2, sticky="ew")
-add_tooltip(btn_log, STRINGS["tooltip_log"])
+    btn_test = ttk.Button(main_frame, text=STRINGS["test"], width=32, command=run_test_request)
+    btn_test.grid(row=7, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_test, STRINGS["tooltip_test"])
 
-btn_config = ttk.Button(main_frame, text=STRINGS["config"], width=32, command=open_config)
-btn_config.grid(row=13, column=0, pady=8, sticky="ew")
-add_tooltip(btn_config, STRINGS["tooltip_config"])
+    btn_metrics = ttk.Button(main_frame, text=STRINGS["metrics"], width=32, command=run_metrics)
+    btn_metrics.grid(row=8, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_metrics, STRINGS["tooltip_metrics"])
 
-btn_ajuda = ttk.Button(main_frame, text="Ajuda / Sobre", width=32, command=abrir_ajuda)
-btn_ajuda.grid(row=14, column=0, pady=8, sticky="ew")
-add_tooltip(btn_ajuda, "Informações sobre o projeto e documentação.")
+    # FICHEIROS
+    ttk.Label(main_frame, text=STRINGS["files"], style="Title.TLabel").grid(row=9, column=0, pady=12, sticky="ew")
 
-btn_exit = ttk.Button(main_frame, text=STRINGS["exit"], width=32, command=lambda: on_exit(), style="Danger.TButton")
-btn_exit.grid(row=15, column=0, pady=20, sticky="ew")
-add_tooltip(btn_exit, STRINGS["tooltip_exit"])
+    btn_json = ttk.Button(main_frame, text=STRINGS["open_json"], width=32, command=open_respostas_json)
+    btn_json.grid(row=10, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_json, STRINGS["tooltip_json"])
 
+    btn_csv = ttk.Button(main_frame, text=STRINGS["open_csv"], width=32, command=open_csv_comparativo)
+    btn_csv.grid(row=11, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_csv, STRINGS["tooltip_csv"])
 
-# ========== Função de fecho seguro ==========
+    btn_log = ttk.Button(main_frame, text=STRINGS["open_log"], width=32, command=open_log)
+    btn_log.grid(row=12, column=0, pady=2, sticky="ew")
+    add_tooltip(btn_log, STRINGS["tooltip_log"])
 
+    btn_config = ttk.Button(main_frame, text=STRINGS["config"], width=32, command=open_config)
+    btn_config.grid(row=13, column=0, pady=8, sticky="ew")
+    add_tooltip(btn_config, STRINGS["tooltip_config"])
 
-def on_exit():
-    if messagebox.askokcancel(STRINGS["exit"], STRINGS["confirm_exit"]):
-        root.destroy()
+    btn_ajuda = ttk.Button(main_frame, text="Ajuda / Sobre", width=32, command=abrir_ajuda)
+    btn_ajuda.grid(row=14, column=0, pady=8, sticky="ew")
+    add_tooltip(btn_ajuda, "Informações sobre o projeto e documentação.")
 
+    btn_exit = ttk.Button(main_frame, text=STRINGS["exit"], width=32, command=lambda: on_exit(), style="Danger.TButton")
+    btn_exit.grid(row=15, column=0, pady=20, sticky="ew")
+    add_tooltip(btn_exit, STRINGS["tooltip_exit"])
 
-root.protocol("WM_DELETE_WINDOW", on_exit)
+    root.protocol("WM_DELETE_WINDOW", on_exit)
 
-# ========== Imagens ==========
-load_logo()
-load_background()
+    # Imagens
+    load_logo()
+    load_background()
 
+    # Layout expandido
+    root.columnconfigure(0, weight=1)
+    root.rowconfigure(1, weight=1)
+    main_frame.columnconfigure(0, weight=1)
 
-# ========== Layout expandido ==========
-root.columnconfigure(0, weight=1)
-root.rowconfigure(1, weight=1)
-main_frame.columnconfigure(0, weight=1)
 
 # ========== Executar aplicação ==========
 if __name__ == "__main__":
+    criar_janela()
     salvar_log("Painel iniciado.")
     root.mainloop()